@@ -1,14 +1,20 @@
-from typing import Generator
+import math
+from typing import AsyncGenerator, Generator
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt
 from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app import crud, models, schemas
 from app.core import security
+from app.core.cache.auth import auth_cache
 from app.core.config import settings
-from app.db.session import SessionLocal
+from app.core.gateway_keys import gateway_key_index
+from app.core.limiter import key_rate_limiter
+from app.core.revocation import revocation_store
+from app.db.session import SessionLocal, AsyncSessionLocal
 
 reusable_oauth2 = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_V1_STR}/auth/login/access-token"
@@ -21,28 +27,84 @@ def get_db() -> Generator:
     finally:
         db.close()
 
-def get_current_user(
-    db: Session = Depends(get_db), token: str = Depends(reusable_oauth2)
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def get_current_user(
+    db: AsyncSession = Depends(get_async_db), token: str = Depends(reusable_oauth2)
 ) -> models.User:
-    # Check if token is revoked
-    revoked = db.query(models.RevokedToken).filter(models.RevokedToken.token == token).first()
-    if revoked:
+    # Warm tokens skip signature verification and the user lookup entirely
+    cached = auth_cache.get(token)
+    if cached:
+        payload, user = cached
+    else:
+        user = None
+        try:
+            payload = jwt.decode(
+                token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
+            )
+            token_data = schemas.TokenPayload(**payload)
+        except (jwt.JWTError, ValidationError):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Could not validate credentials",
+            )
+
+    # Check if token is revoked (in-memory, backed by the revoked_tokens table)
+    if await revocation_store.is_revoked(token, payload):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token has been revoked",
         )
 
-    try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
+    if user is None:
+        user = await crud.user.get_user_by_email_async(db, email=token_data.sub)
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+        auth_cache.store(token, payload, user)
+    return user
+
+async def get_current_admin_user(
+    current_user: models.User = Depends(get_current_user),
+) -> models.User:
+    if current_user.email not in settings.ADMIN_EMAILS:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin privileges required",
         )
-        token_data = schemas.TokenPayload(**payload)
-    except (jwt.JWTError, ValidationError):
+    return current_user
+
+async def get_gateway_caller(
+    db: AsyncSession = Depends(get_async_db), token: str = Depends(reusable_oauth2)
+) -> schemas.gateway_key.GatewayCaller:
+    """
+    Authenticate a gateway call with either a `gw_` API key or a dashboard JWT.
+    API keys are rate limited per key according to their `rate_limit` (requests per minute).
+    """
+    if not gateway_key_index.is_gateway_key(token):
+        user = await get_current_user(db=db, token=token)
+        return schemas.gateway_key.GatewayCaller(user_id=user.id)
+
+    key = await gateway_key_index.authenticate(db, token)
+    if not key:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid API key",
+        )
+    if not key.is_active:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
-            detail="Could not validate credentials",
+            detail="API key is disabled",
         )
-    user = crud.user.get_user_by_email(db, email=token_data.sub)
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    return user
+
+    retry_after = key_rate_limiter.hit(key.id, key.rate_limit)
+    if retry_after is not None:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Rate limit of {key.rate_limit} requests per minute exceeded for this API key",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+
+    gateway_key_index.touch(key.id)
+    return schemas.gateway_key.GatewayCaller(user_id=key.user_id, gateway_key_id=key.id)
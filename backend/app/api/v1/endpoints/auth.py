@@ -3,7 +3,6 @@ from typing import Any
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
-import uuid
 
 from app.crud.user import get_user_by_email, create_user, authenticate
 from app.schemas.user import User, UserCreate
@@ -11,7 +10,7 @@ from app.schemas.auth import Token
 from app.api.deps import get_db, get_current_user, reusable_oauth2
 from app.core.security import create_access_token
 from app.core.config import settings
-from app.models.revoked_token import RevokedToken
+from app.core.revocation import revocation_store
 from app.models.user import User as UserModel
 
 router = APIRouter()
@@ -96,11 +95,6 @@ def logout(
     """
     Invalidate the current token
     """
-    # Check if already revoked
-    existing = db.query(RevokedToken).filter(RevokedToken.token == token).first()
-    if not existing:
-        revoked_token = RevokedToken(id=str(uuid.uuid4()), token=token)
-        db.add(revoked_token)
-        db.commit()
-    
+    revocation_store.revoke(db, token)
+
     return {"message": "Successfully logged out"}
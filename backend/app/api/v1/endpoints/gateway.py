@@ -1,18 +1,33 @@
 from typing import Any, List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Response, status, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+import asyncio
+import io
+import json
 import logging
 
 from app import crud, models, schemas
 from app.api import deps
-from app.core.classifier.service import request_classifier
 from app.core.router.engine import routing_engine
+from app.core.router.failover import failover_executor, FailoverError
+from app.core.router.hedging import hedged_executor
 from app.core.providers.manager import provider_manager
-from app.schemas.router import RoutingRequirements, RoutingStrategy
-from app.schemas.llm import GenerationRequest, GenerationResponse 
+from app.schemas.router import RoutingRequirements, RoutingResult, RoutingStrategy, RoutingMode, FailoverAttempt
+from app.schemas.llm import GenerationRequest, GenerationResponse, GenerationChunk, GenerationUsage
 from app.core.registry import model_registry
+from app.core.config import settings
+from app.core.cache.canonical import RESOLVED_MODEL_PARAM
+from app.core.cache.classification import classification_cache
+from app.core.classifier.executor import tokenization_executor
 from app.core.cache.service import cache_manager
+from app.core.cache.snapshot import read_snapshot, write_snapshot
+from app.core.cache.warmup import prompt_recorder
+from app.core.cache.user_context import user_context_cache
+from app.core.cache.auth import auth_cache
+from app.core.cache.singleflight import request_coalescer
 from app.core.usage.logger import usage_logger
+from app.core.usage.writer import usage_writer
+from app.db.session import AsyncSessionLocal
 from app.schemas.gateway_key import GatewayKeyCreate
 import uuid
 import time
@@ -24,12 +39,20 @@ router = APIRouter()
 logger = logging.getLogger(__name__)
 
 from fastapi import Request
+from fastapi.responses import StreamingResponse
 from app.core.limiter import limiter
+from app.core.classifier.tokenizer import token_counter
 
 class GatewayRequest(schemas.llm.GenerationRequest):
     # We inherit basic fields like messages, max_tokens, etc.
     # We can add a strategy field here if we want users to control it
     routing_strategy: RoutingStrategy = RoutingStrategy.BALANCED
+    # Opt-in: "hedged" races the next-best model when the primary is slow (non-streaming only)
+    routing_mode: RoutingMode = RoutingMode.STANDARD
+    # Opt-in: cache the completion in the shared public partition, visible to every tenant
+    cache_shareable: bool = False
+    # Opt-in: on an exact cache miss, reuse the response of a near-identical prompt
+    cache_fuzzy: bool = False
 
 @router.get("/cache/metrics")
 async def get_cache_metrics(
@@ -38,60 +61,176 @@ async def get_cache_metrics(
     """
     Get cache performance metrics.
     """
-    # We could restrict this to admins if needed
-    return cache_manager.metrics
+    return {
+        **cache_manager.metrics,
+        "tenant": cache_manager.tenant_metrics(current_user.id),
+        "classification": classification_cache.metrics,
+        "token_counts": token_counter.metrics,
+        "tokenization": tokenization_executor.metrics,
+        "user_context": user_context_cache.metrics,
+        "auth": auth_cache.metrics,
+        "coalescing": request_coalescer.metrics,
+    }
+
+@router.get("/cache/metrics/tenants")
+async def get_cache_tenant_metrics(
+    current_user: models.User = Depends(deps.get_current_admin_user),
+) -> Any:
+    """
+    Get hit rate and occupancy of every cache partition (admins only).
+    """
+    return cache_manager.all_tenant_metrics()
+
+@router.get("/cache/snapshot")
+async def export_cache_snapshot(
+    current_user: models.User = Depends(deps.get_current_admin_user),
+) -> Any:
+    """
+    Download the response cache and recorded prompt counts as a snapshot (admins only).
+    """
+    buffer = io.BytesIO()
+    counts = write_snapshot(buffer, cache_manager, prompt_recorder)
+    return Response(
+        content=buffer.getvalue(),
+        media_type="application/gzip",
+        headers={
+            "Content-Disposition": 'attachment; filename="cache-snapshot.jsonl.gz"',
+            "X-Snapshot-Entries": str(counts["entries"]),
+        },
+    )
+
+@router.post("/cache/snapshot")
+async def import_cache_snapshot(
+    request: Request,
+    current_user: models.User = Depends(deps.get_current_admin_user),
+) -> Any:
+    """
+    Load a snapshot (the request body) into the response cache (admins only).
+    """
+    try:
+        return read_snapshot(io.BytesIO(await request.body()), cache_manager, prompt_recorder)
+    except (OSError, ValueError, KeyError) as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid cache snapshot: {str(e)}")
+
+@router.post("/cache/warmup")
+async def warm_up_response_cache(
+    top_n: int = Query(100, ge=1, le=10000),
+    current_user: models.User = Depends(deps.get_current_admin_user),
+) -> Any:
+    """
+    Replay the most frequent recent prompts that are not cached (admins only).
+    """
+    return await warm_up_cache(top_n)
+
+@router.get("/usage/metrics")
+async def get_usage_metrics(
+    current_user: models.User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Get write-behind usage logger metrics (queue depth, batch size, flush latency).
+    """
+    return usage_writer.metrics
+
+@router.get("/providers/metrics")
+async def get_provider_metrics(
+    current_user: models.User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Get connection-pool metrics for the shared provider HTTP clients.
+    """
+    return provider_manager.metrics
+
+@router.get("/router/metrics")
+async def get_router_metrics(
+    current_user: models.User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Get routing metrics (hedge fire and win rates).
+    """
+    return {"hedging": hedged_executor.metrics}
 
 @router.post("/chat/completions", response_model=GenerationResponse)
 @limiter.limit("100/minute")
 async def gateway_chat_completions(
     request: Request,
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     payload: GatewayRequest,
-    current_user: models.User = Depends(deps.get_current_user),
+    caller: schemas.gateway_key.GatewayCaller = Depends(deps.get_gateway_caller),
+    http_response: Response,
 ) -> Any:
     """
     Main Gateway Endpoint.
     Orchestrates classification, intelligent routing, and multi-provider execution.
+    Accepts a dashboard JWT or a `gw_` API key as the bearer token.
+    The X-Cache response header is HIT, STALE (served while being refreshed) or MISS.
     """
     try:
         start_time = time.time()
         
         # 0. Auth & Key Setup (needed for logging)
-        # Get or create a gateway key for the user (Auto-provision for dashboard)
-        user_keys = crud.gateway_key.get_keys_by_user(db, user_id=current_user.id)
-        if user_keys:
-            gateway_key_id = user_keys[0].id
-        else:
-            new_key = crud.gateway_key.create_gateway_key(
-                db, 
-                obj_in=GatewayKeyCreate(name="Default Dashboard Key", rate_limit=1000), 
-                user_id=current_user.id, 
-                key_hash=f"auto-{uuid.uuid4()}",
-                prefix="sk-auto"
-            )
-            gateway_key_id = new_key.id
+        # Gateway key and provider keys come from the per-user context cache
+        user_context = await user_context_cache.get(db, caller.user_id)
+        gateway_key_id = caller.gateway_key_id or user_context.gateway_key_id
 
-        # 1. Classification (Always run to determine complexity for logging)
-        classification = request_classifier.analyze(payload.messages)
+        # 1. Classification (needed for routing and logging). Cached per message content
+        # and stored with cached responses (looked up in L2 on a miss), so a prompt any
+        # worker has cached never tokenizes. Large prompts are classified off the event loop.
+        classification = await classification_cache.classify_async(payload.messages)
         logger.info(f"Request classification: {classification.json()}")
 
-        # 2. Cache Lookup
-        cache_params = {
-            "max_tokens": payload.max_tokens,
-            "temperature": payload.temperature,
-            "top_p": payload.top_p,
-            "stop_sequences": payload.stop_sequences,
-            "routing_strategy": payload.routing_strategy
-        }
-        
-        cached_response = cache_manager.get_response(payload.messages, cache_params)
+        # 2. Routing (providers the user has keys for). Runs before the cache lookup
+        # because the resolved model, not the strategy, is part of the canonical cache key.
+        routing_result = _route(payload, classification, user_context.providers)
+
+        # 3. Cache Lookup
+        cache_params = _cache_params(payload, routing_result)
+        cache_key = cache_manager.cache_key(payload.messages, cache_params)
+        # Request frequency per key, for warming the cache after a deploy
+        prompt_recorder.record(caller.user_id, cache_key, payload)
+
+        fuzzy = _fuzzy_enabled(payload, gateway_key_id)
+        cached = await cache_manager.lookup_async(
+            payload.messages, cache_params, tenant=caller.user_id, shareable=payload.cache_shareable, fuzzy=fuzzy
+        )
+        cached_response = cached.response
+        log_context = dict(
+            user_id=caller.user_id,
+            gateway_key_id=gateway_key_id,
+            complexity=classification.complexity,
+        )
         if cached_response:
-            logger.info("Returning cached response")
+            logger.info("Returning stale cached response" if cached.stale else "Returning cached response")
+            cache_status = "STALE" if cached.stale else "HIT"
+            if cached.stale:
+                # Refresh in the background; only the first stale hit per entry starts one
+                refresh_key = f"{caller.user_id}:{cache_key}"
+                if cache_manager.begin_refresh(refresh_key):
+                    _spawn(_revalidate_cached_response(
+                        payload, cache_params, classification, user_context.providers, log_context, refresh_key
+                    ))
+            if payload.stream:
+                # Replay the cached completion as a single SSE chunk
+                await usage_logger.record_request(
+                    user_id=caller.user_id,
+                    gateway_key_id=gateway_key_id,
+                    endpoint="/chat/completions",
+                    provider="cache",
+                    model=cached_response.model_used,
+                    complexity=classification.complexity,
+                    usage=cached_response.usage,
+                    latency_ms=int((time.time() - start_time) * 1000),
+                    status_code=200,
+                    cache_hit=True
+                )
+                return StreamingResponse(
+                    _stream_cached_response(cached_response),
+                    media_type="text/event-stream",
+                    headers={"X-Cache": cache_status},
+                )
             # Log Cache Hit
-            await usage_logger.log_request(
-                db,
-                user_id=current_user.id,
+            await usage_logger.record_request(
+                user_id=caller.user_id,
                 gateway_key_id=gateway_key_id,
                 endpoint="/chat/completions",
                 provider="cache",
@@ -102,65 +241,103 @@ async def gateway_chat_completions(
                 status_code=200,
                 cache_hit=True
             )
+            http_response.headers["X-Cache"] = cache_status
             return cached_response
 
-        # 3. Routing
-        # Get providers for which the user has keys
-        user_keys_db = crud.provider_key.get_provider_keys_by_user(db, user_id=current_user.id)
-        available_providers = [pk.provider for pk in user_keys_db]
-        
-        # Determine the best model based on classification result and user strategy
-        requirements = RoutingRequirements(
-            input_tokens=classification.tokens,
-            max_output_tokens=payload.max_tokens or 1024,
-            required_features=classification.detected_features,
-            # we could add more constraints from payload here
-        )
-        
-        routing_result = routing_engine.select_model(
-            requirements, 
-            strategy=payload.routing_strategy,
-            available_providers=available_providers
-        )
-        logger.info(f"Routing result: {routing_result.json()}")
- 
         # 4. Execution
-        # Find the original model ID in registry
-        model_def = model_registry.get_model(routing_result.selected_model_id)
-        if not model_def:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Selected model not found in registry."
+        exec_request, candidates = _plan_execution(payload, routing_result)
+
+        # Try the selected model, then fail over down the fallback list on
+        # timeouts/5xx/429. All attempts share one deadline.
+        deadline = failover_executor.deadline_from(start_time)
+
+        async def _execute():
+            try:
+                if payload.stream:
+                    # The first chunk is pulled before sending headers so that auth/HTTP
+                    # errors still surface as regular HTTP error responses.
+                    result = await failover_executor.open_stream(
+                        db, exec_request, candidates, user_id=caller.user_id, deadline=deadline
+                    )
+                elif payload.routing_mode == RoutingMode.HEDGED:
+                    result = await hedged_executor.execute(
+                        db, exec_request, candidates, user_id=caller.user_id, deadline=deadline,
+                        input_tokens=classification.tokens
+                    )
+                else:
+                    result = await failover_executor.execute(
+                        db, exec_request, candidates, user_id=caller.user_id, deadline=deadline
+                    )
+            except FailoverError as e:
+                await _log_failed_attempts(e.attempts, **log_context)
+                raise
+            await _log_failed_attempts(result.failed_attempts, **log_context)
+
+            if result.response is not None:
+                # 5. Success Response
+                # We might want to inject our internal model id back into the response
+                result.response.model_used = result.model.id
+
+                # 6. Cache Store
+                cache_manager.store_response(
+                    payload.messages, cache_params, result.response,
+                    tenant=caller.user_id, shareable=payload.cache_shareable, fuzzy=fuzzy,
+                    classification=classification,
+                )
+            return result
+
+        try:
+            if payload.stream:
+                result, shared = await _execute(), False
+            else:
+                # Identical concurrent requests share one provider call. Scoped per user:
+                # the call runs on the caller's provider keys and its errors are theirs.
+                flight_key = f"{caller.user_id}:{cache_key}"
+                result, shared = await request_coalescer.do(flight_key, _execute)
+        except FailoverError as e:
+            raise HTTPException(status_code=e.status_code, detail=str(e))
+
+        model_def = result.model
+
+        if payload.stream:
+            return StreamingResponse(
+                _relay_stream(
+                    result.chunks,
+                    result.first_chunk,
+                    payload=payload,
+                    cache_params=cache_params,
+                    model_def=model_def,
+                    classification=classification,
+                    user_id=caller.user_id,
+                    gateway_key_id=gateway_key_id,
+                    start_time=start_time,
+                ),
+                media_type="text/event-stream",
+                headers={"X-Cache": "MISS"},
             )
 
-        # Prepare execution request
-        # Note: We use the original_model_id for the provider call
-        exec_request = GenerationRequest(
-            messages=payload.messages,
-            model_id=model_def.original_model_id,
-            max_tokens=payload.max_tokens,
-            temperature=payload.temperature,
-            top_p=payload.top_p,
-            stop_sequences=payload.stop_sequences
-        )
+        response = result.response
+        http_response.headers["X-Cache"] = "HIT" if shared else "MISS"
 
-        response = await provider_manager.execute_request(
-            db, 
-            exec_request, 
-            user_id=current_user.id
-        )
+        if shared:
+            # Served by another request's provider call, log it like a cache hit
+            await usage_logger.record_request(
+                user_id=caller.user_id,
+                gateway_key_id=gateway_key_id,
+                endpoint="/chat/completions",
+                provider="cache",
+                model=response.model_used,
+                complexity=classification.complexity,
+                usage=response.usage,
+                latency_ms=int((time.time() - start_time) * 1000),
+                status_code=200,
+                cache_hit=True
+            )
+            return response
 
-        # 5. Success Response
-        # We might want to inject our internal model id back into the response
-        response.model_used = model_def.id
-        
-        # 6. Cache Store
-        cache_manager.store_response(payload.messages, cache_params, response)
-        
         # 7. Usage Logging
-        await usage_logger.log_request(
-            db,
-            user_id=current_user.id,
+        await usage_logger.record_request(
+            user_id=caller.user_id,
             gateway_key_id=gateway_key_id,
             endpoint="/chat/completions",
             provider=model_def.provider,
@@ -174,6 +351,8 @@ async def gateway_chat_completions(
 
         return response
 
+    except HTTPException:
+        raise
     except ValueError as e:
         # Business logic errors (e.g. no models found, auth issues with provider)
         logger.error(f"Gateway logic error: {str(e)}")
@@ -188,3 +367,283 @@ async def gateway_chat_completions(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An unexpected error occurred during processing: {str(e)}"
         )
+
+
+def _cache_params(payload: GatewayRequest, routing_result: RoutingResult) -> dict:
+    return {
+        "max_tokens": payload.max_tokens,
+        "temperature": payload.temperature,
+        "top_p": payload.top_p,
+        "stop_sequences": payload.stop_sequences,
+        "routing_strategy": payload.routing_strategy,
+        RESOLVED_MODEL_PARAM: routing_result.selected_model_id,
+    }
+
+def _fuzzy_enabled(payload: GatewayRequest, gateway_key_id: Optional[str]) -> bool:
+    return payload.cache_fuzzy or gateway_key_id in settings.CACHE_FUZZY_GATEWAY_KEYS
+
+def _route(payload: GatewayRequest, classification, available_providers: List[str]) -> RoutingResult:
+    """
+    Determine the best model based on classification result and user strategy.
+    """
+    requirements = RoutingRequirements(
+        input_tokens=classification.tokens,
+        max_output_tokens=payload.max_tokens or 1024,
+        required_features=classification.detected_features,
+        # we could add more constraints from payload here
+    )
+
+    routing_result = routing_engine.select_model(
+        requirements,
+        strategy=payload.routing_strategy,
+        available_providers=available_providers
+    )
+    logger.info(f"Routing result: {routing_result.json()}")
+    return routing_result
+
+def _plan_execution(payload: GatewayRequest, routing_result: RoutingResult):
+    """
+    Prepare the provider request. Returns the execution request and the failover candidates.
+    """
+    # Find the original model ID in registry
+    model_def = model_registry.get_model(routing_result.selected_model_id)
+    if not model_def:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Selected model not found in registry."
+        )
+
+    # Note: We use the original_model_id for the provider call
+    exec_request = GenerationRequest(
+        messages=payload.messages,
+        model_id=model_def.original_model_id,
+        max_tokens=payload.max_tokens,
+        temperature=payload.temperature,
+        top_p=payload.top_p,
+        stop_sequences=payload.stop_sequences
+    )
+    return exec_request, failover_executor.candidates(routing_result)
+
+# Background refreshes in flight (the event loop only keeps weak references to tasks)
+_background_tasks = set()
+
+def _spawn(coro) -> None:
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+async def _revalidate_cached_response(
+    payload: GatewayRequest,
+    cache_params: dict,
+    classification,
+    available_providers: List[str],
+    log_context: dict,
+    refresh_key: str,
+):
+    """
+    Refresh a stale cache entry through the normal routing and provider path.
+    """
+    try:
+        routing_result = _route(payload, classification, available_providers)
+        if await _refresh_cache_entry(payload, cache_params, classification, routing_result, log_context):
+            logger.info(f"Refreshed stale cache entry {refresh_key.split(':')[-1][:8]}...")
+    except Exception:
+        logger.exception("Background refresh of stale cache entry failed")
+    finally:
+        cache_manager.end_refresh(refresh_key)
+
+async def _refresh_cache_entry(
+    payload: GatewayRequest,
+    cache_params: dict,
+    classification,
+    routing_result: RoutingResult,
+    log_context: dict,
+) -> bool:
+    """
+    Execute a request outside of a client call (stale refresh, warm-up) and
+    store the response. Uses its own database session, since there is no
+    request-scoped one. Returns whether a response was cached.
+    """
+    start_time = time.time()
+    try:
+        exec_request, candidates = _plan_execution(payload, routing_result)
+        async with AsyncSessionLocal() as db:
+            result = await failover_executor.execute(
+                db, exec_request, candidates, user_id=log_context["user_id"],
+                deadline=failover_executor.deadline_from(start_time)
+            )
+    except FailoverError as e:
+        await _log_failed_attempts(e.attempts, **log_context)
+        logger.warning(f"Background cache fill failed: {str(e)}")
+        return False
+    except Exception:
+        logger.exception("Background cache fill failed")
+        return False
+
+    await _log_failed_attempts(result.failed_attempts, **log_context)
+    result.response.model_used = result.model.id
+    cache_manager.store_response(
+        payload.messages, cache_params, result.response,
+        tenant=log_context["user_id"], shareable=payload.cache_shareable,
+        fuzzy=_fuzzy_enabled(payload, log_context["gateway_key_id"]),
+        classification=classification,
+    )
+    await usage_logger.record_request(
+        endpoint="/chat/completions",
+        provider=result.model.provider,
+        model=result.model.id,
+        usage=result.response.usage,
+        latency_ms=int((time.time() - start_time) * 1000),
+        status_code=200,
+        cache_hit=False,
+        **log_context,
+    )
+    return True
+
+async def warm_up_cache(top_n: int) -> dict:
+    """
+    Replay the top_n most frequent prompts recorded in the warm-up window that
+    are not cached, through the normal routing and provider path on each
+    tenant's own provider keys.
+    """
+    counts = {"replayed": 0, "already_cached": 0, "failed": 0}
+    async with AsyncSessionLocal() as db:
+        for prompt in prompt_recorder.top(top_n):
+            try:
+                payload = GatewayRequest.model_validate({**prompt.request, "stream": False})
+                if await cache_manager.contains_async(prompt.key, tenant=prompt.tenant, shareable=payload.cache_shareable):
+                    counts["already_cached"] += 1
+                    continue
+                user_context = await user_context_cache.get(db, prompt.tenant)
+                classification = await classification_cache.classify_async(payload.messages)
+                routing_result = _route(payload, classification, user_context.providers)
+            except Exception as e:
+                logger.warning(f"Skipping warm-up of {prompt.key[:8]}...: {str(e)}")
+                counts["failed"] += 1
+                continue
+
+            log_context = dict(
+                user_id=prompt.tenant,
+                gateway_key_id=user_context.gateway_key_id,
+                complexity=classification.complexity,
+            )
+            cache_params = _cache_params(payload, routing_result)
+            if await _refresh_cache_entry(payload, cache_params, classification, routing_result, log_context):
+                counts["replayed"] += 1
+            else:
+                counts["failed"] += 1
+    logger.info(f"Cache warm-up finished: {counts}")
+    return counts
+
+async def _log_failed_attempts(attempts: List[FailoverAttempt], **log_context):
+    """One RequestLog row per failed attempt, so failovers show up in analytics."""
+    for attempt in attempts:
+        await usage_logger.record_request(
+            endpoint="/chat/completions",
+            provider=attempt.provider,
+            model=attempt.model_id,
+            usage=GenerationUsage(input_tokens=0, output_tokens=0, total_tokens=0),
+            latency_ms=attempt.latency_ms,
+            status_code=attempt.status_code,
+            error_message=attempt.error,
+            cache_hit=False,
+            **log_context
+        )
+
+def _sse_event(data: str) -> str:
+    return f"data: {data}\n\n"
+
+async def _stream_cached_response(response: GenerationResponse):
+    chunk = GenerationChunk(
+        delta=response.content,
+        model_used=response.model_used,
+        finish_reason=response.finish_reason,
+        usage=response.usage
+    )
+    yield _sse_event(chunk.model_dump_json())
+    yield _sse_event("[DONE]")
+
+async def _relay_stream(
+    chunks,
+    first_chunk: Optional[GenerationChunk],
+    *,
+    payload: GatewayRequest,
+    cache_params: dict,
+    model_def,
+    classification,
+    user_id: str,
+    gateway_key_id: str,
+    start_time: float,
+):
+    """
+    Forward provider chunks to the client as SSE events while accumulating
+    the full completion, then cache it and log usage once the stream completes.
+    """
+    content_parts: List[str] = []
+    usage: Optional[GenerationUsage] = None
+    finish_reason: Optional[str] = None
+    status_code = 200
+    error_message = None
+
+    async def _all_chunks():
+        if first_chunk is not None:
+            yield first_chunk
+        async for chunk in chunks:
+            yield chunk
+
+    try:
+        async for chunk in _all_chunks():
+            chunk.model_used = model_def.id
+            content_parts.append(chunk.delta)
+            if chunk.usage:
+                # Providers report usage on the final event(s); keep the latest one
+                usage = chunk.usage
+            if chunk.finish_reason:
+                finish_reason = chunk.finish_reason
+            yield _sse_event(chunk.model_dump_json())
+    except Exception as e:
+        logger.exception("Error while streaming from provider")
+        status_code = 502
+        error_message = str(e)
+        yield _sse_event(json.dumps({"error": {"code": "stream_error", "message": str(e)}}))
+    yield _sse_event("[DONE]")
+
+    content = "".join(content_parts)
+    if usage is None:
+        # Provider did not send a usage event, fall back to local estimates
+        output_tokens = token_counter.count_tokens(content)
+        usage = GenerationUsage(
+            input_tokens=classification.tokens,
+            output_tokens=output_tokens,
+            total_tokens=classification.tokens + output_tokens
+        )
+
+    if status_code == 200:
+        cache_manager.store_response(
+            payload.messages,
+            cache_params,
+            GenerationResponse(
+                content=content,
+                usage=usage,
+                model_used=model_def.id,
+                finish_reason=finish_reason
+            ),
+            tenant=user_id,
+            shareable=payload.cache_shareable,
+            fuzzy=_fuzzy_enabled(payload, gateway_key_id),
+            classification=classification,
+        )
+
+    await usage_logger.record_request(
+        user_id=user_id,
+        gateway_key_id=gateway_key_id,
+        endpoint="/chat/completions",
+        provider=model_def.provider,
+        model=model_def.id,
+        complexity=classification.complexity,
+        usage=usage,
+        latency_ms=int((time.time() - start_time) * 1000),
+        status_code=status_code,
+        error_message=error_message,
+        cache_hit=False
+    )
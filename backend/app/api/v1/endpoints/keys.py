@@ -5,6 +5,8 @@ from sqlalchemy.orm import Session
 from app import crud, models, schemas
 from app.api import deps
 from app.core import security
+from app.core.cache.user_context import user_context_cache
+from app.core.gateway_keys import gateway_key_index
 
 router = APIRouter()
 
@@ -35,6 +37,8 @@ def create_key(
     db_obj = crud.gateway_key.create_gateway_key(
         db, obj_in=key_in, user_id=current_user.id, key_hash=key_hash, prefix=prefix
     )
+    user_context_cache.invalidate(current_user.id)
+    gateway_key_index.add(db_obj)
     
     return {
         "id": db_obj.id,
@@ -62,4 +66,7 @@ def delete_key(
     if key.user_id != current_user.id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
     
-    return crud.gateway_key.remove_gateway_key(db, key_id=key_id)
+    removed = crud.gateway_key.remove_gateway_key(db, key_id=key_id)
+    user_context_cache.invalidate(current_user.id)
+    gateway_key_index.remove(removed.key_hash)
+    return removed
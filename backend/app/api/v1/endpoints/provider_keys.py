@@ -6,6 +6,7 @@ from app import crud, models, schemas
 from app.api import deps
 
 from app.core.providers.validator import validate_provider_key
+from app.core.cache.user_context import user_context_cache
 from datetime import datetime, timezone
 
 router = APIRouter()
@@ -53,6 +54,7 @@ async def add_provider_key(
         db.add(existing)
         db.commit()
         db.refresh(existing)
+        user_context_cache.invalidate(current_user.id)
         return existing
     
     # 3. Create new
@@ -66,6 +68,7 @@ async def add_provider_key(
     db.add(db_obj)
     db.commit()
     db.refresh(db_obj)
+    user_context_cache.invalidate(current_user.id)
     return db_obj
 
 @router.delete("/{provider_key_id}", response_model=schemas.provider_key.ProviderKey)
@@ -83,4 +86,5 @@ def delete_provider_key(
     )
     if not db_obj:
         raise HTTPException(status_code=404, detail="Provider key not found")
+    user_context_cache.invalidate(current_user.id)
     return db_obj
@@ -0,0 +1,121 @@
+import hashlib
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional, Set, Tuple
+from cachetools import LRUCache
+from sqlalchemy import event
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.core.config import settings
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+class AuthCache:
+    def __init__(self, maxsize: Optional[int] = None, ttl: Optional[int] = None):
+        """
+        Bounded LRU of verified JWT claims and user snapshots, keyed by token hash.
+
+        Args:
+            maxsize: Maximum number of tokens kept in memory.
+            ttl: Upper bound in seconds for an entry; an entry never outlives its token's `exp`.
+        """
+        self._cache = LRUCache(maxsize=maxsize or settings.AUTH_CACHE_MAXSIZE)
+        self.ttl = ttl or settings.AUTH_CACHE_TTL_SECONDS
+        self._tokens_by_user: Dict[str, Set[str]] = {}
+        # User update events can fire from sync endpoints running in the threadpool
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> Optional[Tuple[Dict[str, Any], User]]:
+        """
+        Return (claims, user) for a token verified earlier, or None.
+        The user is a fresh detached instance so callers cannot leak changes between requests.
+        """
+        key = self._key(token)
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None and entry[0] <= time.time():
+                self._drop(key)
+                entry = None
+            if entry is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+        _, claims, user_data = entry
+        user = User(**user_data)
+        make_transient_to_detached(user)
+        return claims, user
+
+    def store(self, token: str, claims: Dict[str, Any], user: User) -> None:
+        key = self._key(token)
+        expires_at = min(float(claims.get("exp", 0)) or float("inf"), time.time() + self.ttl)
+        user_data = {c.key: getattr(user, c.key) for c in User.__table__.columns}
+        with self._lock:
+            evicted = len(self._cache) >= self._cache.maxsize and key not in self._cache
+            if evicted:
+                # Keep the per-user index in step with LRU eviction
+                old_key, old_entry = self._cache.popitem()
+                self._unindex(old_key, old_entry[2]["id"])
+            self._cache[key] = (expires_at, claims, user_data)
+            self._tokens_by_user.setdefault(user.id, set()).add(key)
+
+    def invalidate_user(self, user_id: str) -> None:
+        """
+        Drop every cached token of a user. Called when the user row is updated or deleted.
+        """
+        with self._lock:
+            keys = self._tokens_by_user.pop(user_id, set())
+            for key in keys:
+                self._cache.pop(key, None)
+            if keys:
+                self._invalidations += 1
+                logger.info(f"Invalidated {len(keys)} cached tokens for user {user_id}")
+
+    def _drop(self, key: str) -> None:
+        entry = self._cache.pop(key, None)
+        if entry is not None:
+            self._unindex(key, entry[2]["id"])
+
+    def _unindex(self, key: str, user_id: str) -> None:
+        keys = self._tokens_by_user.get(user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._tokens_by_user[user_id]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+            self._tokens_by_user.clear()
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        total = self._hits + self._misses
+        hit_rate = (self._hits / total) if total > 0 else 0
+
+        return {
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": hit_rate,
+            "invalidations": self._invalidations,
+            "current_size": len(self._cache),
+            "max_size": self._cache.maxsize,
+            "ttl": self.ttl
+        }
+
+# Global instance
+auth_cache = AuthCache()
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_cached_user(mapper, connection, target: User) -> None:
+    # Covers ORM flushes (profile edits, deactivation); bulk query.update() bypasses this
+    auth_cache.invalidate_user(target.id)
@@ -0,0 +1,54 @@
+from typing import Any, Dict, List
+
+from app.schemas.llm import GenerationRequest, Message
+
+# Param the gateway sets to the model routing selected for the request. When
+# present it replaces routing_strategy in the canonical key, since strategies
+# that resolve to the same model produce the same completion.
+RESOLVED_MODEL_PARAM = "resolved_model"
+
+# Sampling defaults of GenerationRequest: explicitly sending one is the same request as omitting it
+_PARAM_DEFAULTS = {
+    name: field.default
+    for name, field in GenerationRequest.model_fields.items()
+    if name not in ("messages", "model_id") and field.default is not None
+}
+
+def canonical_content(content: str) -> str:
+    """Unify line endings and drop trailing whitespace on every line and around the text."""
+    lines = content.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines).strip()
+
+def canonical_messages(messages: List[Message]) -> List[Dict[str, Any]]:
+    canonical = []
+    for m in messages:
+        message = {"role": m.role.value, "content": canonical_content(m.content)}
+        if m.name is not None:
+            message["name"] = m.name
+        canonical.append(message)
+    return canonical
+
+def _canonical_value(value: Any) -> Any:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return value.value if hasattr(value, "value") else value
+    return float(value)
+
+def canonical_params(params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Params that change the completion: unset values, defaults and empty stop
+    lists are dropped, numbers compared as floats, and routing_strategy replaced
+    by the resolved model when the caller provides it.
+    """
+    canonical = {}
+    for name in sorted(params):
+        value = params[name]
+        if value is None or value == [] or (name in _PARAM_DEFAULTS and value == _PARAM_DEFAULTS[name]):
+            continue
+        if name == "routing_strategy" and params.get(RESOLVED_MODEL_PARAM) is not None:
+            continue
+        canonical[name] = _canonical_value(value)
+    return canonical
+
+def raw_params(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Params as the pre-canonicalization key saw them, for measuring what canonicalization adds."""
+    return {k: params[k] for k in sorted(params) if params[k] is not None and k != RESOLVED_MODEL_PARAM}
@@ -0,0 +1,128 @@
+import asyncio
+import hashlib
+import json
+import threading
+from typing import Any, Dict, List, Optional
+from cachetools import TTLCache
+
+from app.core.cache.canonical import canonical_messages
+from app.core.cache.disk import DiskCache, l2_cache
+from app.core.classifier.executor import prompt_chars, tokenization_executor
+from app.core.classifier.service import request_classifier
+from app.core.config import settings
+from app.schemas.classifier import ClassificationResult
+from app.schemas.llm import Message
+
+class ClassificationCache:
+    """
+    ClassificationResult per message content, so a repeated prompt is tokenized
+    and scanned for features once. The response cache stores the classification
+    with each entry (in L1, L2 and snapshots) and refreshes it here, so a
+    response-cache hit finds its classification (needed for routing, which
+    resolves the cache key) without tokenizing. Misses are looked up in L2
+    before classifying, since routing runs before the response-cache lookup:
+    a prompt another worker cached is routed without tokenizing here either.
+    """
+    def __init__(self, maxsize: Optional[int] = None, ttl: Optional[int] = None, l2: Optional[DiskCache] = None):
+        """
+        Args:
+            maxsize: Maximum number of classifications kept. Results are small;
+                keep this above the number of cached responses.
+            ttl: Seconds an unused classification is kept. Keep it at least the
+                response cache TTL, so entries outlive the responses they route.
+            l2: The response cache's L2 tier, whose entries carry classifications.
+        """
+        self._cache = TTLCache(
+            maxsize=maxsize or settings.CLASSIFICATION_CACHE_MAXSIZE,
+            ttl=ttl or settings.CLASSIFICATION_CACHE_TTL,
+        )
+        self._l2 = l2
+        self._hits = 0
+        self._misses = 0
+        self._l2_hits = 0
+        # Large prompts are classified on tokenization threads (see TokenizationExecutor)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def content_hash(messages: List[Message]) -> str:
+        """
+        Hash of the canonical messages, as in the response cache key: requests that
+        hit the same cache entry share a classification. Canonicalization only drops
+        whitespace the classifier barely counts.
+        """
+        payload_str = json.dumps(canonical_messages(messages), sort_keys=True)
+        return hashlib.sha256(payload_str.encode()).hexdigest()
+
+    def get(self, content_hash: str) -> Optional[ClassificationResult]:
+        with self._lock:
+            return self._cache.get(content_hash)
+
+    def put(self, content_hash: str, classification: ClassificationResult) -> None:
+        with self._lock:
+            self._cache[content_hash] = classification
+
+    def classify(self, messages: List[Message], content_hash: Optional[str] = None) -> ClassificationResult:
+        """
+        Return the cached classification of the messages. On a miss, use the one
+        stored in L2 with a cached response, and run the classifier without one.
+        """
+        content_hash = content_hash or self.content_hash(messages)
+        classification = self._get_counted(content_hash)
+        if classification is None and self._l2 is not None:
+            classification = self._from_l2(content_hash, self._l2.get_classification(content_hash))
+        if classification is None:
+            classification = request_classifier.analyze(messages)
+            self.put(content_hash, classification)
+        return classification
+
+    async def classify_async(self, messages: List[Message]) -> ClassificationResult:
+        """
+        classify for the event loop: L2 is read on a worker thread, and large
+        prompts are classified on the tokenization pool.
+        """
+        content_hash = self.content_hash(messages)
+        classification = self._get_counted(content_hash)
+        if classification is None and self._l2 is not None:
+            stored = await asyncio.to_thread(self._l2.get_classification, content_hash)
+            classification = self._from_l2(content_hash, stored)
+        if classification is None:
+            classification = await tokenization_executor.run(
+                prompt_chars(messages), request_classifier.analyze, messages
+            )
+            self.put(content_hash, classification)
+        return classification
+
+    def _get_counted(self, content_hash: str) -> Optional[ClassificationResult]:
+        with self._lock:
+            classification = self._cache.get(content_hash)
+            if classification is not None:
+                self._hits += 1
+            else:
+                self._misses += 1
+            return classification
+
+    def _from_l2(self, content_hash: str, classification: Optional[ClassificationResult]) -> Optional[ClassificationResult]:
+        if classification is not None:
+            self._l2_hits += 1
+            self.put(content_hash, classification)
+        return classification
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        total = self._hits + self._misses
+        return {
+            "hits": self._hits,
+            "misses": self._misses,
+            "l2_hits": self._l2_hits,
+            "hit_rate": (self._hits / total) if total > 0 else 0,
+            "current_size": len(self._cache),
+            "max_size": self._cache.maxsize,
+            "ttl": self._cache.ttl,
+        }
+
+# Global instance
+classification_cache = ClassificationCache(l2=l2_cache)
@@ -0,0 +1,251 @@
+import json
+import logging
+import queue
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from app.core.config import settings
+from app.schemas.classifier import ClassificationResult
+from app.schemas.llm import GenerationResponse
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    expires_at REAL NOT NULL,
+    created_at REAL NOT NULL,
+    content_hash TEXT,
+    classification TEXT
+)
+"""
+# Columns added after the first release, for files created without them
+_ADDED_COLUMNS = {"content_hash": "TEXT", "classification": "TEXT"}
+
+class DiskEntry(NamedTuple):
+    response: GenerationResponse
+    stored_at: float
+    content_hash: Optional[str] = None  # ClassificationCache key of the request's messages
+    classification: Optional[ClassificationResult] = None
+
+class DiskCache:
+    """
+    L2 response cache in a local SQLite file, shared by every worker on the host
+    and surviving restarts. Values are zlib-compressed JSON of GenerationResponse,
+    stored with the request's classification so hits here are routed without
+    tokenizing.
+
+    SQLite runs in WAL mode so readers never block the (single) writer; each
+    thread gets its own connection. Reads never write. Writes are queued and
+    applied in batches by a background thread, so a caller never waits on the
+    file's write lock (held by another worker for up to the busy timeout).
+    Disk errors are logged and treated as misses.
+    """
+    PURGE_EVERY = 100  # writes between sweeps of expired rows
+    WRITE_BATCH = 100  # rows per write transaction
+
+    def __init__(self, path: str, ttl: int = 3600, max_pending: Optional[int] = None):
+        """
+        Args:
+            path: SQLite file, created with its directory if missing.
+            ttl: Default time-to-live of a row in seconds.
+            max_pending: Writes queued for the writer thread; further writes are
+                dropped (and counted) until it catches up.
+        """
+        self.path = path
+        self.ttl = ttl
+        self._local = threading.local()
+        self._pending: queue.Queue = queue.Queue(maxsize=max_pending or settings.CACHE_L2_WRITE_QUEUE_SIZE)
+        self._writer: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()
+        self._writes = 0
+        self._dropped = 0
+        self._errors = 0
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(_SCHEMA)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(responses)")}
+            for name, sql_type in _ADDED_COLUMNS.items():
+                if name not in columns:
+                    conn.execute(f"ALTER TABLE responses ADD COLUMN {name} {sql_type}")
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_content_hash ON responses (content_hash)")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def encode(response: GenerationResponse) -> bytes:
+        return zlib.compress(response.model_dump_json().encode())
+
+    @staticmethod
+    def decode(value: bytes) -> GenerationResponse:
+        return GenerationResponse.model_validate(json.loads(zlib.decompress(value)))
+
+    def get(self, key: str) -> Optional[GenerationResponse]:
+        entry = self.get_entry(key)
+        return entry[0] if entry else None
+
+    def get_entry(self, key: str) -> Optional[DiskEntry]:
+        """The response, the time it was stored and the request's classification."""
+        return self.get_entries([key]).get(key)
+
+    def get_entries(self, keys: Iterable[str]) -> Dict[str, DiskEntry]:
+        """
+        Unexpired entries of the keys, in one query. Expired rows are left to
+        purge_expired, so reading never takes the write lock.
+        """
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        try:
+            rows = self._connect().execute(
+                "SELECT key, value, created_at, content_hash, classification FROM responses "
+                f"WHERE key IN ({', '.join('?' * len(keys))}) AND expires_at > ?",
+                (*keys, time.time()),
+            ).fetchall()
+            return {
+                key: DiskEntry(
+                    self.decode(value),
+                    created_at,
+                    content_hash,
+                    ClassificationResult.model_validate_json(classification) if classification else None,
+                )
+                for key, value, created_at, content_hash, classification in rows
+            }
+        except (sqlite3.Error, zlib.error, ValueError) as e:
+            self._errors += 1
+            logger.error(f"L2 cache read failed for {keys[0][:8]}...: {str(e)}")
+            return {}
+
+    def get_classification(self, content_hash: str) -> Optional[ClassificationResult]:
+        """Classification stored with any unexpired entry of the same messages (ClassificationCache key)."""
+        try:
+            row = self._connect().execute(
+                "SELECT classification FROM responses "
+                "WHERE content_hash = ? AND classification IS NOT NULL AND expires_at > ? LIMIT 1",
+                (content_hash, time.time()),
+            ).fetchone()
+            return ClassificationResult.model_validate_json(row[0]) if row else None
+        except (sqlite3.Error, ValueError) as e:
+            self._errors += 1
+            logger.error(f"L2 classification read failed for {content_hash[:8]}...: {str(e)}")
+            return None
+
+    def set(
+        self,
+        key: str,
+        response: GenerationResponse,
+        ttl: Optional[int] = None,
+        content_hash: Optional[str] = None,
+        classification: Optional[ClassificationResult] = None,
+    ) -> None:
+        """Queue a row for the writer thread; other workers see it once written."""
+        self._start_writer()
+        try:
+            self._pending.put_nowait((key, response, ttl or self.ttl, content_hash, classification))
+        except queue.Full:
+            self._dropped += 1
+            logger.warning(f"L2 cache write queue full, dropped {key[:8]}...")
+
+    def flush(self) -> None:
+        """Wait until every queued write has been applied."""
+        self._pending.join()
+
+    def _start_writer(self) -> None:
+        if self._writer is not None and self._writer.is_alive():
+            return
+        with self._writer_lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._drain, name="l2-cache-writer", daemon=True)
+                self._writer.start()
+
+    def _drain(self) -> None:
+        while True:
+            batch = [self._pending.get()]
+            while len(batch) < self.WRITE_BATCH:
+                try:
+                    batch.append(self._pending.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write(batch)
+            finally:
+                for _ in batch:
+                    self._pending.task_done()
+
+    def _write(self, batch: List[Tuple]) -> None:
+        now = time.time()
+        rows = [
+            (
+                key, self.encode(response), now + ttl, now,
+                content_hash, classification.model_dump_json() if classification else None,
+            )
+            for key, response, ttl, content_hash, classification in batch
+        ]
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(
+                "INSERT OR REPLACE INTO responses (key, value, expires_at, created_at, content_hash, classification) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            self._errors += 1
+            logger.error(f"L2 cache write of {len(rows)} rows failed: {str(e)}")
+            return
+        previous, self._writes = self._writes, self._writes + len(rows)
+        if previous // self.PURGE_EVERY != self._writes // self.PURGE_EVERY:
+            try:
+                self.purge_expired()
+            except sqlite3.Error as e:
+                self._errors += 1
+                logger.error(f"L2 cache purge failed: {str(e)}")
+
+    def purge_expired(self) -> int:
+        cursor = self._connect().execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+        if cursor.rowcount:
+            logger.info(f"Purged {cursor.rowcount} expired entries from the L2 cache")
+        return cursor.rowcount
+
+    def clear(self) -> None:
+        self.flush()
+        self._connect().execute("DELETE FROM responses")
+
+    def __len__(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        try:
+            size, size_bytes = self._connect().execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(value)), 0) FROM responses"
+            ).fetchone()
+        except sqlite3.Error:
+            size, size_bytes = None, None
+        return {
+            "path": self.path,
+            "current_size": size,
+            "stored_bytes": size_bytes,
+            "ttl": self.ttl,
+            "pending_writes": self._pending.qsize(),
+            "dropped_writes": self._dropped,
+            "errors": self._errors,
+        }
+
+# Global instance
+l2_cache = DiskCache(settings.CACHE_L2_PATH, ttl=3600) if settings.CACHE_L2_ENABLED else None
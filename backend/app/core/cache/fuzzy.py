@@ -0,0 +1,188 @@
+import json
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Set, Tuple
+
+from app.core.cache.canonical import canonical_params
+from app.schemas.llm import Message
+
+_MASK64 = (1 << 64) - 1
+_SENTENCE_RE = re.compile(r"[.!?;\n]+")
+# ISO dates (with an optional time of day) and times of day
+_DATETIME_RE = re.compile(
+    r"\d{4}-\d{2}-\d{2}(?:[t ]\d{1,2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:z|[+-]\d{2}:?\d{2})?)?"
+    r"|\b\d{1,2}:\d{2}(?::\d{2}(?:\.\d+)?)?\b"
+)
+_NUMBER_RE = re.compile(r"\d+(?:[.,]\d+)*")
+_WORD_RE = re.compile(r"\w+")
+
+Signature = Tuple[int, ...]
+
+def mask_datetimes(text: str) -> str:
+    """
+    Lowercased text with dates and times masked, so a prompt stamped with the
+    current time still matches. Other numbers are kept: amounts, ids and operands
+    change the answer.
+    """
+    return _DATETIME_RE.sub(" datetime ", text.lower())
+
+def numbers(messages: List[Message]) -> Tuple[str, ...]:
+    """The numbers of the messages, dates and times excluded, in sorted order."""
+    return tuple(sorted(n for m in messages for n in _NUMBER_RE.findall(mask_datetimes(m.content))))
+
+def normalize_sentences(text: str) -> List[List[str]]:
+    """Lowercased words per sentence, with dates and times masked."""
+    sentences = []
+    for sentence in _SENTENCE_RE.split(mask_datetimes(text)):
+        words = _WORD_RE.findall(sentence)
+        if words:
+            sentences.append(words)
+    return sentences
+
+def shingles(messages: List[Message], size: int = 3) -> Set[int]:
+    """
+    Hashed word n-grams of every message. N-grams never span a sentence
+    boundary, so reordering sentences leaves the set unchanged.
+    """
+    hashes = set()
+    for index, message in enumerate(messages):
+        for words in normalize_sentences(message.content):
+            if len(words) < size:
+                hashes.add(hash((index, *words)) & _MASK64)
+            for i in range(len(words) - size + 1):
+                hashes.add(hash((index, *words[i:i + size])) & _MASK64)
+    return hashes
+
+class FuzzyIndex:
+    """
+    Near-duplicate lookup over cached prompts: maps a request to the cache key
+    of a previously stored request whose messages are similar enough and whose
+    params are identical.
+
+    Messages are reduced to a one-permutation MinHash signature (one pass over
+    the shingle hashes, empty bins filled from their neighbours) and indexed with
+    LSH banding, so a lookup only compares against prompts sharing a band.
+    Everything is in-process and CPU-only; the index holds signatures and cache
+    keys, never responses, so cache TTL and eviction still apply.
+    """
+    def __init__(
+        self,
+        threshold: float = 0.8,
+        num_bins: int = 64,
+        bands: int = 16,
+        max_entries: int = 10000,
+    ):
+        if num_bins % bands:
+            raise ValueError("num_bins must be a multiple of bands")
+        self.threshold = threshold
+        self.num_bins = num_bins
+        self.bands = bands
+        self.rows = num_bins // bands
+        self.max_entries = max_entries
+        # (scope, cache key) -> signature; one cache key may be indexed in several partitions
+        self._entries: "OrderedDict[Tuple[Hashable, str], Signature]" = OrderedDict()
+        self._buckets: Dict[Tuple[Hashable, int, Signature], Set[str]] = {}
+
+        # Metrics
+        self._lookups = 0
+        self._matches = 0
+        self._lookup_seconds = 0.0
+
+    @staticmethod
+    def scope(partition: Optional[str], messages: List[Message], params: Dict[str, Any]) -> Hashable:
+        """
+        Only requests in the same partition, with the same roles, identical params
+        and the same numbers are compared. A prompt differing only in a number
+        (an amount, an account, an operand) must not reuse another's answer,
+        however long and similar the rest of it is.
+        """
+        sorted_params = json.dumps(canonical_params(params), default=str)
+        return partition, tuple(m.role for m in messages), sorted_params, numbers(messages)
+
+    def signature(self, messages: List[Message]) -> Optional[Signature]:
+        hashes = shingles(messages)
+        if not hashes:
+            return None
+        bins = [_MASK64] * self.num_bins
+        for h in hashes:
+            b = h % self.num_bins
+            value = h // self.num_bins
+            if value < bins[b]:
+                bins[b] = value
+        # Densify: an empty bin borrows the next non-empty bin's value (rotation)
+        for b in range(self.num_bins):
+            if bins[b] == _MASK64:
+                for offset in range(1, self.num_bins):
+                    borrowed = bins[(b + offset) % self.num_bins]
+                    if borrowed != _MASK64:
+                        bins[b] = borrowed + offset
+                        break
+        return tuple(bins)
+
+    def similarity(self, a: Signature, b: Signature) -> float:
+        """Estimated Jaccard similarity of the two shingle sets."""
+        return sum(1 for x, y in zip(a, b) if x == y) / self.num_bins
+
+    def _band_keys(self, scope: Hashable, signature: Signature):
+        for band in range(self.bands):
+            yield scope, band, signature[band * self.rows:(band + 1) * self.rows]
+
+    def add(self, scope: Hashable, messages: List[Message], cache_key: str) -> None:
+        signature = self.signature(messages)
+        if signature is None:
+            return
+        self.remove(scope, cache_key)
+        self._entries[(scope, cache_key)] = signature
+        for band_key in self._band_keys(scope, signature):
+            self._buckets.setdefault(band_key, set()).add(cache_key)
+        while len(self._entries) > self.max_entries:
+            self.remove(*next(iter(self._entries)))
+
+    def remove(self, scope: Hashable, cache_key: str) -> None:
+        signature = self._entries.pop((scope, cache_key), None)
+        if signature is None:
+            return
+        for band_key in self._band_keys(scope, signature):
+            bucket = self._buckets.get(band_key)
+            if bucket is not None:
+                bucket.discard(cache_key)
+                if not bucket:
+                    del self._buckets[band_key]
+
+    def find(self, scope: Hashable, messages: List[Message]) -> Optional[str]:
+        """
+        Cache key of the most similar indexed request in the scope, if it clears
+        the threshold.
+        """
+        start = time.perf_counter()
+        self._lookups += 1
+        try:
+            signature = self.signature(messages)
+            if signature is None:
+                return None
+            candidates: Set[str] = set()
+            for band_key in self._band_keys(scope, signature):
+                candidates.update(self._buckets.get(band_key, ()))
+
+            best_key, best = None, self.threshold
+            for cache_key in candidates:
+                similarity = self.similarity(signature, self._entries[(scope, cache_key)])
+                if similarity >= best:
+                    best_key, best = cache_key, similarity
+            if best_key is not None:
+                self._matches += 1
+                self._entries.move_to_end((scope, best_key))
+            return best_key
+        finally:
+            self._lookup_seconds += time.perf_counter() - start
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "threshold": self.threshold,
+            "entries": len(self._entries),
+            "lookups": self._lookups,
+            "matches": self._matches,
+            "avg_lookup_ms": (self._lookup_seconds / self._lookups * 1000) if self._lookups else 0,
+        }
@@ -1,87 +1,584 @@
+import asyncio
 import hashlib
 import json
 import logging
-from typing import Any, Dict, List, Optional, Tuple
+import random
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
 from cachetools import TTLCache
 import time
 
-from app.schemas.llm import Message, GenerationResponse
+from app.core.cache.canonical import canonical_messages, canonical_params, raw_params
+from app.core.cache.classification import ClassificationCache, classification_cache
+from app.core.cache.disk import DiskCache, DiskEntry, l2_cache
+from app.core.cache.fuzzy import FuzzyIndex
+from app.core.cache.tinylfu import TinyLFUCache
+from app.core.config import settings
+from app.schemas.classifier import ClassificationResult
+from app.schemas.llm import GenerationRequest, Message, GenerationResponse
 
 logger = logging.getLogger(__name__)
 
+PUBLIC_PARTITION = "__public__"
+
+_DEFAULT_TEMPERATURE = GenerationRequest.model_fields["temperature"].default
+
+# Eviction policies for the L1 partitions
+CACHE_POLICIES = {"lru": TTLCache, "tinylfu": TinyLFUCache}
+
+class CacheEntry(NamedTuple):
+    response: GenerationResponse
+    stored_at: float
+    raw_key: Optional[str] = None  # pre-canonicalization key of the request that stored it
+    variants: Tuple[GenerationResponse, ...] = ()  # pooled responses of a sampled request
+    pool_full: bool = False
+    content_hash: Optional[str] = None  # ClassificationCache key of the request's messages
+    classification: Optional[ClassificationResult] = None
+
+class CacheLookup(NamedTuple):
+    response: Optional[GenerationResponse]
+    stale: bool = False  # past the soft TTL: serve it, but refresh in the background
+
+class _LookupPlan(NamedTuple):
+    key: str
+    partition_names: List[Optional[str]]
+    now: float
+    l1_entry: Optional[CacheEntry]
+    similar: List[Tuple[Optional[str], str]]  # (partition, key) of near-duplicate prompts
+    l2_keys: List[str]  # L2 rows the lookup may need
+
 class CacheManager:
-    def __init__(self, maxsize: int = 1000, ttl: int = 3600):
+    def __init__(
+        self,
+        maxsize: int = 1000,
+        ttl: int = 3600,
+        l2: Optional[DiskCache] = None,
+        max_bytes: Optional[int] = None,
+        strip_provider_response: bool = False,
+        tenant_quota: Optional[int] = None,
+        policy: str = "lru",
+        soft_ttl: Optional[int] = None,
+        fuzzy: Optional[FuzzyIndex] = None,
+        variant_pool_size: int = 1,
+        classifications: Optional[ClassificationCache] = None,
+    ):
         """
         Initialize the Cache Manager.
+
+        Entries live in per-tenant partitions so one tenant's completions are
+        never served to another, plus an opt-in shared "public" partition for
+        requests explicitly marked shareable.
         
         Args:
             maxsize: Maximum number of items in the cache.
-            ttl: Time-to-live for cache items in seconds (default 1 hour).
+            ttl: Time-to-live for cache items in seconds (default 1 hour). With a
+                soft_ttl this is the hard TTL, after which entries are misses.
+            l2: Optional shared on-disk tier consulted on L1 misses.
+            max_bytes: If set, bound the cache by the serialized size of its entries
+                instead of by count (maxsize is then ignored).
+            strip_provider_response: Drop the raw provider payload before caching.
+            tenant_quota: Capacity of each partition, in the same unit as the cache
+                (entries or bytes). Defaults to the whole cache.
+            policy: "lru" (LRU within TTL) or "tinylfu" (W-TinyLFU admission, which
+                keeps a frequently requested hot set from being flushed by one-off prompts).
+            soft_ttl: Enables stale-while-revalidate: entries older than this are
+                still served but reported stale so the caller can refresh them.
+            fuzzy: Near-duplicate index consulted on exact misses by requests that opt in.
+            variant_pool_size: Above 1, sampled (temperature > 0) requests keep up to
+                this many distinct responses per key instead of a single one.
+            classifications: Classification cache kept warm for cached responses:
+                stored classifications are refreshed there, and seeded on import.
         """
-        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        if policy not in CACHE_POLICIES:
+            raise ValueError(f"Unknown cache policy: {policy}")
+        self.policy = policy
+        self.max_bytes = max_bytes
+        self.capacity = max_bytes or maxsize
+        self.tenant_quota = min(tenant_quota or self.capacity, self.capacity)
+        self.ttl = ttl
+        self.soft_ttl = soft_ttl if soft_ttl and soft_ttl < ttl else None
+        self._partitions: Dict[Optional[str], TTLCache] = {}  # or TinyLFUCache, same interface
+        self._partition_stats: Dict[Optional[str], List[int]] = {}  # partition -> [hits, misses]
+        self._l2 = l2
+        self.strip_provider_response = strip_provider_response
+        self._too_large = 0
+        self._fair_evictions = 0
         self._hits = 0
         self._misses = 0
+        self._l2_hits = 0
+        self._l2_misses = 0
+        self._stale_hits = 0
+        self._refreshes = 0
+        self._refreshing: Set[str] = set()
+        self._fuzzy = fuzzy
+        self._fuzzy_hits = 0
+        self._canonical_hits = 0
+        self.variant_pool_size = variant_pool_size
+        self._variant_fresh = 0
+        self._variant_served = 0
+        self._classifications = classifications
 
     def _generate_key(self, messages: List[Message], params: Dict[str, Any]) -> str:
         """
-        Generate a unique cache key based on messages and request parameters.
+        Generate a unique cache key from the canonical form of the messages and
+        request parameters, so semantically identical requests share an entry.
         """
-        # Convert messages to a stable list of dicts
-        msg_data = [m.model_dump() if hasattr(m, 'model_dump') else m.dict() for m in messages]
-        
-        # Sort params to ensure consistent hashing
-        sorted_params = {k: params[k] for k in sorted(params.keys()) if params[k] is not None}
-        
-        # Create a payload for hashing
         payload = {
-            "messages": msg_data,
-            "params": sorted_params
+            "messages": canonical_messages(messages),
+            "params": canonical_params(params)
         }
         
         # Serialize and hash
         payload_str = json.dumps(payload, sort_keys=True)
         return hashlib.sha256(payload_str.encode()).hexdigest()
 
-    def get_response(self, messages: List[Message], params: Dict[str, Any]) -> Optional[GenerationResponse]:
+    def _raw_key(self, messages: List[Message], params: Dict[str, Any]) -> str:
+        """
+        The key before canonicalization (messages and params as sent).
+        """
+        msg_data = [m.model_dump() for m in messages]
+        payload_str = json.dumps({"messages": msg_data, "params": raw_params(params)}, sort_keys=True)
+        return hashlib.sha256(payload_str.encode()).hexdigest()
+
+    @staticmethod
+    def _sizeof(entry: CacheEntry) -> int:
+        return sum(len(r.model_dump_json()) for r in entry.variants or (entry.response,))
+
+    def _partition(self, name: Optional[str]) -> TTLCache:
+        partition = self._partitions.get(name)
+        if partition is None:
+            cache_class = CACHE_POLICIES[self.policy]
+            if self.max_bytes:
+                partition = cache_class(maxsize=self.tenant_quota, ttl=self.ttl, getsizeof=self._sizeof)
+            else:
+                partition = cache_class(maxsize=self.tenant_quota, ttl=self.ttl)
+            self._partitions[name] = partition
+        return partition
+
+    def _put(self, partition_name: Optional[str], key: str, entry: CacheEntry) -> bool:
+        try:
+            self._partition(partition_name)[key] = entry
+        except ValueError:
+            # Larger than the whole byte budget
+            self._too_large += 1
+            logger.warning(f"Response for key {key[:8]}... exceeds the cache byte budget, not cached in L1")
+            return False
+        self._enforce_capacity()
+        return True
+
+    def _enforce_capacity(self) -> None:
+        """
+        Keep the sum of all partitions under the cache capacity. Evicts from the
+        partition using the most space, so a heavy tenant evicts its own entries
+        before anyone else's.
+        """
+        used = sum(p.currsize for p in self._partitions.values())
+        while used > self.capacity:
+            name, largest = max(self._partitions.items(), key=lambda item: item[1].currsize)
+            before = largest.currsize
+            largest.popitem()
+            used -= before - largest.currsize
+            self._fair_evictions += 1
+            if not largest:
+                del self._partitions[name]
+
+    @staticmethod
+    def _l2_key(partition_name: Optional[str], key: str) -> str:
+        return key if partition_name is None else f"{partition_name}:{key}"
+
+    def cache_key(self, messages: List[Message], params: Dict[str, Any]) -> str:
+        """
+        Public form of the cache key, for callers that need to correlate requests (e.g. coalescing).
+        """
+        return self._generate_key(messages, params)
+
+    def get_response(
+        self,
+        messages: List[Message],
+        params: Dict[str, Any],
+        tenant: Optional[str] = None,
+        shareable: bool = False,
+        fuzzy: bool = False,
+    ) -> Optional[GenerationResponse]:
         """
         Retrieve a response from the cache if available.
         """
+        return self.lookup(messages, params, tenant=tenant, shareable=shareable, fuzzy=fuzzy).response
+
+    def lookup(
+        self,
+        messages: List[Message],
+        params: Dict[str, Any],
+        tenant: Optional[str] = None,
+        shareable: bool = False,
+        fuzzy: bool = False,
+    ) -> CacheLookup:
+        """
+        Retrieve a response and whether it is past the soft TTL.
+        Looks in the tenant's partition, then in the public partition if the request is shareable.
+        Lookup order is L1 (in-process) then L2 (on-disk); L2 hits are promoted into L1.
+        With fuzzy, an exact miss falls back to the most similar prompt stored with fuzzy.
+        """
+        plan = self._plan_lookup(messages, params, tenant, shareable, fuzzy)
+        rows = self._l2.get_entries(plan.l2_keys) if plan.l2_keys else {}
+        return self._finish_lookup(plan, tenant, messages, params, rows)
+
+    async def lookup_async(
+        self,
+        messages: List[Message],
+        params: Dict[str, Any],
+        tenant: Optional[str] = None,
+        shareable: bool = False,
+        fuzzy: bool = False,
+    ) -> CacheLookup:
+        """
+        lookup for the event loop: the L2 rows it may need are read in one query
+        on a worker thread, so a slow disk never stalls other requests.
+        """
+        plan = self._plan_lookup(messages, params, tenant, shareable, fuzzy)
+        rows = await asyncio.to_thread(self._l2.get_entries, plan.l2_keys) if plan.l2_keys else {}
+        return self._finish_lookup(plan, tenant, messages, params, rows)
+
+    def _plan_lookup(
+        self,
+        messages: List[Message],
+        params: Dict[str, Any],
+        tenant: Optional[str],
+        shareable: bool,
+        fuzzy: bool,
+    ) -> _LookupPlan:
+        """The in-memory part of a lookup: the L1 hit, or the L2 rows needed without one."""
         key = self._generate_key(messages, params)
-        response = self._cache.get(key)
-        
-        if response:
+        partition_names = [tenant, PUBLIC_PARTITION] if shareable else [tenant]
+        now = time.time()
+        l1_entry = None
+        for name in partition_names:
+            l1_entry = self._get_l1(name, key, now)
+            if l1_entry:
+                break
+
+        similar, l2_keys = [], []
+        if l1_entry is None:
+            if self._l2 is not None:
+                l2_keys = [self._l2_key(name, key) for name in partition_names]
+            if fuzzy and self._fuzzy is not None:
+                for name in partition_names:
+                    similar_key = self._fuzzy.find(FuzzyIndex.scope(name, messages, params), messages)
+                    if similar_key:
+                        similar.append((name, similar_key))
+                        if self._l2 is not None and self._get_l1(name, similar_key, now) is None:
+                            l2_keys.append(self._l2_key(name, similar_key))
+        return _LookupPlan(key, partition_names, now, l1_entry, similar, l2_keys)
+
+    def _finish_lookup(
+        self,
+        plan: _LookupPlan,
+        tenant: Optional[str],
+        messages: List[Message],
+        params: Dict[str, Any],
+        rows: Dict[str, DiskEntry],
+    ) -> CacheLookup:
+        key, now = plan.key, plan.now
+        tier, entry, entry_key = None, None, key
+        if plan.l1_entry is not None:
+            tier, entry = "l1", plan.l1_entry
+        elif self._l2 is not None:
+            for name in plan.partition_names:
+                found = rows.get(self._l2_key(name, key))
+                if found and now - found.stored_at < self.ttl:
+                    tier, entry = "l2", self._promote(name, key, found)
+                    break
+            else:
+                self._l2_misses += 1
+
+        if entry is None:
+            for name, similar_key in plan.similar:
+                candidate = self._get_entry(name, similar_key, now, rows)
+                if candidate:
+                    tier, entry, entry_key = "fuzzy", candidate, similar_key
+                    break
+
+        response = self._pick_variant(entry, params) if entry is not None else None
+        if response is None:
+            self._misses += 1
+            self._count(tenant, hit=False)
+            logger.info(f"Cache MISS for key: {key[:8]}...")
+            return CacheLookup(None)
+
+        self._count(tenant, hit=True)
+        if tier == "l1":
             self._hits += 1
+            if entry.raw_key is not None and entry.raw_key != self._raw_key(messages, params):
+                # Only canonicalization made this a hit
+                self._canonical_hits += 1
             logger.info(f"Cache HIT for key: {key[:8]}...")
-            return response
-        
-        self._misses += 1
-        logger.info(f"Cache MISS for key: {key[:8]}...")
-        return None
+        elif tier == "l2":
+            self._l2_hits += 1
+            logger.info(f"L2 cache HIT for key: {key[:8]}...")
+        else:
+            self._hits += 1
+            self._fuzzy_hits += 1
+            logger.info(f"Fuzzy cache HIT for key: {key[:8]}... (matched {entry_key[:8]}...)")
+
+        if self.soft_ttl is not None and now - entry.stored_at >= self.soft_ttl:
+            self._stale_hits += 1
+            logger.info(f"Serving stale entry for key: {entry_key[:8]}... (age {now - entry.stored_at:.0f}s)")
+            return CacheLookup(response, stale=True)
+        return CacheLookup(response)
 
-    def store_response(self, messages: List[Message], params: Dict[str, Any], response: GenerationResponse):
+    def _is_stochastic(self, params: Dict[str, Any]) -> bool:
+        return self.variant_pool_size > 1 and params.get("temperature", _DEFAULT_TEMPERATURE) != 0
+
+    def _pick_variant(self, entry: CacheEntry, params: Dict[str, Any]) -> Optional[GenerationResponse]:
         """
-        Store a response in the cache.
+        For sampled (temperature > 0) requests, serve from the entry's pool of
+        responses. While the pool is filling, the request is sent to the provider
+        with probability 1 - pool/N (returns None) so the pool gains new samples;
+        once full, pooled responses are served uniformly.
+        """
+        if not self._is_stochastic(params):
+            return entry.response
+        pool = entry.variants or (entry.response,)
+        if not entry.pool_full and len(pool) < self.variant_pool_size:
+            if random.random() >= len(pool) / self.variant_pool_size:
+                self._variant_fresh += 1
+                return None
+        self._variant_served += 1
+        return random.choice(pool)
+
+    def _get_l1(self, name: Optional[str], key: str, now: float) -> Optional[CacheEntry]:
+        partition = self._partitions.get(name)
+        entry = partition.get(key) if partition is not None else None
+        # L2-promoted entries keep their original age, so check the hard TTL here too
+        return entry if entry and now - entry.stored_at < self.ttl else None
+
+    def _get_entry(self, name: Optional[str], key: str, now: float, rows: Dict[str, DiskEntry]) -> Optional[CacheEntry]:
+        """The key's entry from L1, or from the L2 rows read for this lookup."""
+        entry = self._get_l1(name, key, now)
+        if entry is None and self._l2 is not None:
+            found = rows.get(self._l2_key(name, key))
+            if found and now - found.stored_at < self.ttl:
+                entry = self._promote(name, key, found)
+        return entry
+
+    def _promote(self, name: Optional[str], key: str, found: DiskEntry) -> CacheEntry:
+        """Copy an L2 entry into L1, and its classification into the classification cache."""
+        entry = CacheEntry(
+            found.response, found.stored_at, content_hash=found.content_hash, classification=found.classification
+        )
+        if self._classifications is not None and found.classification is not None and found.content_hash:
+            self._classifications.put(found.content_hash, found.classification)
+        self._put(name, key, entry)
+        return entry
+
+    def begin_refresh(self, key: str) -> bool:
+        """
+        Claim the background refresh of a stale entry. Returns False if one is
+        already running, so each entry is refreshed by exactly one request.
+        """
+        if key in self._refreshing:
+            return False
+        self._refreshing.add(key)
+        self._refreshes += 1
+        return True
+
+    def end_refresh(self, key: str) -> None:
+        self._refreshing.discard(key)
+
+    def store_response(
+        self,
+        messages: List[Message],
+        params: Dict[str, Any],
+        response: GenerationResponse,
+        tenant: Optional[str] = None,
+        shareable: bool = False,
+        fuzzy: bool = False,
+        classification: Optional[ClassificationResult] = None,
+    ):
+        """
+        Store a response in the cache (both tiers), in the public partition if
+        the request is shareable and in the tenant's partition otherwise.
+        With fuzzy, the prompt is also indexed for near-duplicate lookups.
+        The request's classification is stored with the entry, so a later hit
+        on it can be routed without classifying the prompt again.
         """
         key = self._generate_key(messages, params)
-        self._cache[key] = response
+        if self.strip_provider_response and response.provider_specific_response is not None:
+            # The raw payload is often larger than the completion itself and is never replayed
+            response = response.model_copy(update={"provider_specific_response": None})
+        name = PUBLIC_PARTITION if shareable else tenant
+        entry = CacheEntry(response, time.time(), self._raw_key(messages, params))
+        if classification is not None:
+            content_hash = ClassificationCache.content_hash(messages)
+            entry = entry._replace(content_hash=content_hash, classification=classification)
+            if self._classifications is not None:
+                self._classifications.put(content_hash, classification)
+        if self._is_stochastic(params):
+            entry = self._add_variant(name, key, entry)
+        self._put(name, key, entry)
+        if self._l2 is not None:
+            self._l2.set(
+                self._l2_key(name, key), response,
+                content_hash=entry.content_hash, classification=entry.classification,
+            )
+        if fuzzy and self._fuzzy is not None:
+            self._fuzzy.add(FuzzyIndex.scope(name, messages, params), messages, key)
         logger.info(f"Stored response in cache with key: {key[:8]}...")
 
+    def _add_variant(self, name: Optional[str], key: str, entry: CacheEntry) -> CacheEntry:
+        """
+        Add a sampled response to the key's pool. A response identical to a pooled
+        one means the prompt has little diversity left, so the pool is closed.
+        In a full or closed pool (e.g. on a stale refresh) a new response
+        replaces the oldest one, so the pool stays diverse.
+        """
+        partition = self._partitions.get(name)
+        existing = partition.get(key) if partition is not None else None
+        if not existing or entry.stored_at - existing.stored_at >= self.ttl:
+            return entry._replace(variants=(entry.response,))
+        pool = existing.variants or (existing.response,)
+        duplicate = any(v.content == entry.response.content for v in pool)
+        if existing.pool_full or len(pool) >= self.variant_pool_size:
+            if not duplicate:
+                pool = (pool + (entry.response,))[-self.variant_pool_size:]
+            return existing._replace(stored_at=entry.stored_at, variants=pool)
+        if duplicate:
+            return existing._replace(stored_at=entry.stored_at, pool_full=True)
+        return existing._replace(stored_at=entry.stored_at, variants=pool + (entry.response,))
+
+    def contains(self, key: str, tenant: Optional[str] = None, shareable: bool = False) -> bool:
+        """Whether an unexpired entry exists for the key in L1 or L2, without counting a lookup."""
+        name = PUBLIC_PARTITION if shareable else tenant
+        if self._get_l1(name, key, time.time()) is not None:
+            return True
+        found = self._l2.get_entry(self._l2_key(name, key)) if self._l2 is not None else None
+        return bool(found) and time.time() - found.stored_at < self.ttl
+
+    async def contains_async(self, key: str, tenant: Optional[str] = None, shareable: bool = False) -> bool:
+        """contains for the event loop, reading L2 on a worker thread."""
+        name = PUBLIC_PARTITION if shareable else tenant
+        if self._get_l1(name, key, time.time()) is not None:
+            return True
+        if self._l2 is None:
+            return False
+        found = await asyncio.to_thread(self._l2.get_entry, self._l2_key(name, key))
+        return bool(found) and time.time() - found.stored_at < self.ttl
+
+    def flush(self) -> None:
+        """Wait until queued L2 writes are on disk, e.g. before shutdown."""
+        if self._l2 is not None:
+            self._l2.flush()
+
+    def export_entries(self) -> Iterator[Tuple[Optional[str], str, CacheEntry]]:
+        """Unexpired L1 entries as (partition, key, entry), for snapshots."""
+        now = time.time()
+        for name, partition in list(self._partitions.items()):
+            for key, entry in list(partition.items()):
+                if now - entry.stored_at < self.ttl:
+                    yield name, key, entry
+
+    def import_entry(self, partition_name: Optional[str], key: str, entry: CacheEntry) -> bool:
+        """
+        Load an entry from a snapshot. It keeps its original stored_at, so it
+        expires when it would have in the exporting process.
+        """
+        if time.time() - entry.stored_at >= self.ttl:
+            return False
+        if self._classifications is not None and entry.classification is not None:
+            self._classifications.put(entry.content_hash, entry.classification)
+        return self._put(partition_name, key, entry)
+
+    def _count(self, tenant: Optional[str], hit: bool) -> None:
+        stats = self._partition_stats.setdefault(tenant, [0, 0])
+        stats[0 if hit else 1] += 1
+
+    def tenant_metrics(self, tenant: Optional[str]) -> Dict[str, Any]:
+        """
+        Hit rate and occupancy of one partition, to size tenant quotas.
+        """
+        hits, misses = self._partition_stats.get(tenant, [0, 0])
+        partition = self._partitions.get(tenant)
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": (hits / (hits + misses)) if hits + misses > 0 else 0,
+            "current_size": len(partition) if partition is not None else 0,
+            "occupancy": partition.currsize if partition is not None else 0,
+            "quota": self.tenant_quota,
+        }
+
+    def all_tenant_metrics(self) -> Dict[str, Dict[str, Any]]:
+        names = set(self._partitions) | set(self._partition_stats)
+        return {str(name): self.tenant_metrics(name) for name in names}
+
     @property
     def metrics(self) -> Dict[str, Any]:
         """
-        Get cache performance metrics.
+        Get cache performance metrics, overall and per tier.
         """
-        total = self._hits + self._misses
-        hit_rate = (self._hits / total) if total > 0 else 0
+        l1_lookups = self._hits + self._l2_hits + self._misses
+        l2_lookups = self._l2_hits + self._l2_misses
+        hits = self._hits + self._l2_hits
+        hit_rate = (hits / l1_lookups) if l1_lookups > 0 else 0
         
-        return {
-            "hits": self._hits,
+        metrics = {
+            "hits": hits,
             "misses": self._misses,
             "hit_rate": hit_rate,
-            "current_size": len(self._cache),
-            "max_size": self._cache.maxsize,
-            "ttl": self._cache.ttl
+            "current_size": sum(len(p) for p in self._partitions.values()),
+            "max_size": None if self.max_bytes else self.capacity,
+            "current_bytes": sum(p.currsize for p in self._partitions.values()) if self.max_bytes else None,
+            "max_bytes": self.max_bytes,
+            "too_large": self._too_large,
+            "ttl": self.ttl,
+            "soft_ttl": self.soft_ttl,
+            "stale_hits": self._stale_hits,
+            "canonical_hits": self._canonical_hits,
+            "refreshes": self._refreshes,
+            "refreshes_in_flight": len(self._refreshing),
+            "policy": self.policy,
+            "partitions": len(self._partitions),
+            "tenant_quota": self.tenant_quota,
+            "fair_evictions": self._fair_evictions,
+            "l1": {
+                "hits": self._hits,
+                "misses": l1_lookups - self._hits,
+                "hit_rate": (self._hits / l1_lookups) if l1_lookups > 0 else 0,
+            },
         }
+        if self.policy == "tinylfu":
+            metrics["admission"] = {
+                "admitted": sum(p.admitted for p in self._partitions.values()),
+                "rejected": sum(p.rejected for p in self._partitions.values()),
+            }
+        if self.variant_pool_size > 1:
+            metrics["variants"] = {
+                "pool_size": self.variant_pool_size,
+                "served_from_pool": self._variant_served,
+                "fresh_calls": self._variant_fresh,
+            }
+        if self._fuzzy is not None:
+            metrics["fuzzy"] = {"hits": self._fuzzy_hits, **self._fuzzy.metrics}
+        if self._l2 is not None:
+            metrics["l2"] = {
+                "hits": self._l2_hits,
+                "misses": self._l2_misses,
+                "hit_rate": (self._l2_hits / l2_lookups) if l2_lookups > 0 else 0,
+                **self._l2.metrics,
+            }
+        return metrics
 
 # Global instance
-cache_manager = CacheManager()
+cache_manager = CacheManager(
+    l2=l2_cache,
+    max_bytes=settings.CACHE_MAX_BYTES or None,
+    strip_provider_response=settings.CACHE_STRIP_PROVIDER_RESPONSE,
+    tenant_quota=settings.CACHE_TENANT_QUOTA or None,
+    policy=settings.CACHE_POLICY,
+    soft_ttl=settings.CACHE_SOFT_TTL or None,
+    fuzzy=FuzzyIndex(
+        threshold=settings.CACHE_FUZZY_THRESHOLD,
+        max_entries=settings.CACHE_FUZZY_MAX_ENTRIES,
+    ),
+    variant_pool_size=settings.CACHE_VARIANT_POOL_SIZE,
+    classifications=classification_cache,
+)
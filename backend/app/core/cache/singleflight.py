@@ -0,0 +1,57 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+class SingleFlight:
+    """
+    Coalesces identical in-flight calls: the first caller for a key runs the
+    call, concurrent callers with the same key await its result (or exception)
+    instead of making their own.
+    """
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._leaders = 0
+        self._coalesced = 0
+        self._shared_errors = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Run `fn` once per key at a time. Returns (result, shared) where `shared`
+        is True when the result came from another caller's call.
+        """
+        task = self._inflight.get(key)
+        shared = task is not None
+        if shared:
+            self._coalesced += 1
+            logger.info(f"Coalesced request onto in-flight call {key[-8:]}...")
+        else:
+            self._leaders += 1
+            # The call runs in its own task so a disconnecting leader does not cancel it for the waiters
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._inflight.pop(key, None) if self._inflight.get(key) is t else None)
+
+        try:
+            return await asyncio.shield(task), shared
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            if shared:
+                self._shared_errors += 1
+            raise
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        total = self._leaders + self._coalesced
+        return {
+            "provider_calls": self._leaders,
+            "calls_saved": self._coalesced,
+            "shared_errors": self._shared_errors,
+            "coalesce_rate": (self._coalesced / total) if total > 0 else 0,
+            "in_flight": len(self._inflight),
+        }
+
+# Global instance (keys are cache keys scoped to the calling user)
+request_coalescer = SingleFlight()
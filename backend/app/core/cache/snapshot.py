@@ -0,0 +1,101 @@
+import gzip
+import json
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import IO, Any, Dict
+
+from app.core.cache.service import CacheEntry, CacheManager
+from app.core.cache.warmup import PromptRecorder
+from app.schemas.classifier import ClassificationResult
+from app.schemas.llm import GenerationResponse
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+
+def write_snapshot(fileobj: IO[bytes], cache: CacheManager, recorder: PromptRecorder) -> Dict[str, int]:
+    """
+    Write the L1 response cache and the recorded prompt counts as gzipped JSON
+    lines: a header, then one line per cache entry or recorded prompt.
+    """
+    counts = {"entries": 0, "prompts": 0}
+    with gzip.GzipFile(fileobj=fileobj, mode="wb") as out:
+        def write(record: Dict[str, Any]) -> None:
+            out.write(json.dumps(record, separators=(",", ":")).encode() + b"\n")
+
+        write({"type": "header", "version": SNAPSHOT_VERSION, "exported_at": time.time(), "ttl": cache.ttl})
+        for partition, key, entry in cache.export_entries():
+            write({
+                "type": "entry",
+                "partition": partition,
+                "key": key,
+                "stored_at": entry.stored_at,
+                "raw_key": entry.raw_key,
+                "pool_full": entry.pool_full,
+                "responses": [r.model_dump(mode="json") for r in entry.variants or (entry.response,)],
+                "content_hash": entry.content_hash,
+                "classification": entry.classification.model_dump() if entry.classification else None,
+            })
+            counts["entries"] += 1
+        for prompt in recorder.dump():
+            write({"type": "prompt", **prompt})
+            counts["prompts"] += 1
+    return counts
+
+def read_snapshot(fileobj: IO[bytes], cache: CacheManager, recorder: PromptRecorder) -> Dict[str, int]:
+    """
+    Load a snapshot. Entries keep their original age, so whatever TTL they had
+    left at export is what they have now; already expired ones are skipped.
+    """
+    counts = {"entries": 0, "expired": 0, "prompts": 0}
+    with gzip.GzipFile(fileobj=fileobj, mode="rb") as src:
+        for line in src:
+            record = json.loads(line)
+            if record["type"] == "header":
+                if record["version"] != SNAPSHOT_VERSION:
+                    raise ValueError(f"Unsupported cache snapshot version {record['version']}")
+            elif record["type"] == "entry":
+                responses = tuple(GenerationResponse.model_validate(r) for r in record["responses"])
+                classification = record.get("classification")
+                entry = CacheEntry(
+                    response=responses[0],
+                    stored_at=record["stored_at"],
+                    raw_key=record["raw_key"],
+                    variants=responses if len(responses) > 1 else (),
+                    pool_full=record["pool_full"],
+                    content_hash=record.get("content_hash"),
+                    classification=ClassificationResult.model_validate(classification) if classification else None,
+                )
+                if cache.import_entry(record["partition"], record["key"], entry):
+                    counts["entries"] += 1
+                else:
+                    counts["expired"] += 1
+            elif record["type"] == "prompt":
+                recorder.load(record)
+                counts["prompts"] += 1
+    return counts
+
+def save_snapshot(path: str, cache: CacheManager, recorder: PromptRecorder) -> Dict[str, int]:
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    # Write then rename, so a crash mid-export never leaves a truncated snapshot. The
+    # temp file is unique per call: every worker saves its snapshot at shutdown.
+    with tempfile.NamedTemporaryFile(dir=target.parent, prefix=target.name + ".", suffix=".tmp", delete=False) as f:
+        try:
+            counts = write_snapshot(f, cache, recorder)
+        except BaseException:
+            f.close()
+            os.unlink(f.name)
+            raise
+    os.replace(f.name, target)
+    logger.info(f"Saved cache snapshot to {path}: {counts}")
+    return counts
+
+def load_snapshot(path: str, cache: CacheManager, recorder: PromptRecorder) -> Dict[str, int]:
+    with open(path, "rb") as f:
+        counts = read_snapshot(f, cache, recorder)
+    logger.info(f"Loaded cache snapshot from {path}: {counts}")
+    return counts
@@ -0,0 +1,270 @@
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterator, List, NamedTuple, Optional, Tuple
+
+_MISSING = object()
+
+# Per-row hash seeds for the count-min sketch
+_SEEDS = (0x97CB3127, 0xC2B2AE35, 0x85EBCA6B, 0x27D4EB2F)
+_MIX = 0x9E3779B97F4A7C15
+_MASK64 = (1 << 64) - 1
+
+class FrequencySketch:
+    """
+    Count-min sketch estimating how often each key was requested recently.
+    Counters saturate at 15 (4 bits, as in TinyLFU) and are all halved once
+    10x width increments have been recorded, so old popularity fades out.
+    """
+    MAX_COUNT = 15
+
+    def __init__(self, width: int):
+        self.width = 1 << max(width - 1, 15).bit_length()  # power of two, at least 16
+        self.sample_size = 10 * self.width
+        self._mask = self.width - 1
+        self._rows = [bytearray(self.width) for _ in _SEEDS]
+        self._additions = 0
+        self.resets = 0
+
+    def _indexes(self, key: Hashable) -> Iterator[Tuple[bytearray, int]]:
+        h = hash(key) & _MASK64
+        for row, seed in zip(self._rows, _SEEDS):
+            yield row, (((h ^ seed) * _MIX & _MASK64) >> 32) & self._mask
+
+    def increment(self, key: Hashable) -> None:
+        added = False
+        for row, i in self._indexes(key):
+            if row[i] < self.MAX_COUNT:
+                row[i] += 1
+                added = True
+        if added:
+            self._additions += 1
+            if self._additions >= self.sample_size:
+                self._age()
+
+    def frequency(self, key: Hashable) -> int:
+        return min(row[i] for row, i in self._indexes(key))
+
+    def _age(self) -> None:
+        for row in self._rows:
+            row[:] = bytes(c >> 1 for c in row)
+        self._additions //= 2
+        self.resets += 1
+
+class _Entry(NamedTuple):
+    value: Any
+    expires_at: float
+    size: int
+
+class _Segment:
+    """An LRU-ordered region of the cache (oldest first) and its total size."""
+    def __init__(self):
+        self.entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self.size = 0
+
+    def add(self, key: Hashable, entry: _Entry) -> None:
+        self.entries[key] = entry
+        self.size += entry.size
+
+    def pop(self, key: Hashable) -> _Entry:
+        entry = self.entries.pop(key)
+        self.size -= entry.size
+        return entry
+
+    def lru(self) -> Hashable:
+        return next(iter(self.entries))
+
+class TinyLFUCache:
+    """
+    W-TinyLFU cache with per-entry TTL, a drop-in for cachetools.TTLCache as used by CacheManager.
+
+    New entries land in a small LRU admission window (1% of capacity). Entries
+    pushed out of the window only enter the main region (segmented LRU:
+    probation + protected) if the frequency sketch says they are requested more
+    often than the entries they would displace, so a burst of one-off keys
+    cannot flush a hot set that is requested over and over.
+
+    Like TTLCache, sizes come from ``getsizeof`` (default 1 per entry) and a
+    value larger than ``maxsize`` raises ValueError.
+    """
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        getsizeof: Optional[Callable[[Any], int]] = None,
+        window_ratio: float = 0.01,
+        protected_ratio: float = 0.8,
+        sketch_width: Optional[int] = None,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.timer = timer
+        self._getsizeof = getsizeof
+        self.window_max = max(1, int(maxsize * window_ratio))
+        self.main_max = maxsize - self.window_max
+        self.protected_max = int(self.main_max * protected_ratio)
+        # Byte-weighted caches size the sketch for ~1KB entries
+        self.sketch = FrequencySketch(sketch_width or (maxsize if getsizeof is None else maxsize // 1024))
+        self._window = _Segment()
+        self._probation = _Segment()
+        self._protected = _Segment()
+        self._expiry: "OrderedDict[Hashable, float]" = OrderedDict()  # ttl is fixed, so insertion order is expiry order
+
+        # Metrics
+        self.admitted = 0
+        self.rejected = 0
+
+    def getsizeof(self, value: Any) -> int:
+        return self._getsizeof(value) if self._getsizeof else 1
+
+    @property
+    def currsize(self) -> int:
+        return self._window.size + self._probation.size + self._protected.size
+
+    def __len__(self) -> int:
+        return len(self._window.entries) + len(self._probation.entries) + len(self._protected.entries)
+
+    def _segment_of(self, key: Hashable) -> Optional[_Segment]:
+        for segment in (self._window, self._probation, self._protected):
+            if key in segment.entries:
+                return segment
+        return None
+
+    def __contains__(self, key: Hashable) -> bool:
+        segment = self._segment_of(key)
+        return segment is not None and segment.entries[key].expires_at > self.timer()
+
+    def items(self) -> List[Tuple[Hashable, Any]]:
+        """Unexpired entries, without counting as accesses."""
+        now = self.timer()
+        return [
+            (key, entry.value)
+            for segment in (self._window, self._probation, self._protected)
+            for key, entry in segment.entries.items()
+            if entry.expires_at > now
+        ]
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        self.sketch.increment(key)
+        segment = self._segment_of(key)
+        if segment is None:
+            return default
+        entry = segment.entries[key]
+        if entry.expires_at <= self.timer():
+            self._remove(segment, key)
+            return default
+
+        if segment is self._probation:
+            # Second hit: promote, demoting the protected region's LRU entries if it overflows
+            self._protected.add(key, self._probation.pop(key))
+            while self._protected.size > self.protected_max and len(self._protected.entries) > 1:
+                demoted = self._protected.lru()
+                self._probation.add(demoted, self._protected.pop(demoted))
+        else:
+            segment.entries.move_to_end(key)
+        return entry.value
+
+    def __getitem__(self, key: Hashable) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: Hashable, value: Any) -> None:
+        size = self.getsizeof(value)
+        if size > self.maxsize:
+            raise ValueError("value too large")
+        self.expire()
+
+        entry = _Entry(value, self.timer() + self.ttl, size)
+        segment = self._segment_of(key)
+        if segment is not None:
+            # Replacing keeps the entry's place in the policy
+            segment.pop(key)
+            segment.add(key, entry)
+        else:
+            self.sketch.increment(key)
+            self._window.add(key, entry)
+        self._expiry[key] = entry.expires_at
+        self._expiry.move_to_end(key)
+        self._evict()
+
+    def __delitem__(self, key: Hashable) -> None:
+        segment = self._segment_of(key)
+        if segment is None:
+            raise KeyError(key)
+        self._remove(segment, key)
+
+    def _remove(self, segment: _Segment, key: Hashable) -> _Entry:
+        self._expiry.pop(key, None)
+        return segment.pop(key)
+
+    def expire(self) -> List[Tuple[Hashable, Any]]:
+        """Drop entries past their TTL, oldest first."""
+        now = self.timer()
+        expired = []
+        while self._expiry:
+            key, expires_at = next(iter(self._expiry.items()))
+            if expires_at > now:
+                break
+            expired.append((key, self._remove(self._segment_of(key), key).value))
+        return expired
+
+    def _evict(self) -> None:
+        while self._window.size > self.window_max or self.currsize > self.maxsize:
+            if not self._window.entries:
+                self.popitem()
+                continue
+            candidate = self._window.lru()
+            entry = self._window.pop(candidate)
+            if self._admit(candidate, entry.size):
+                self._probation.add(candidate, entry)
+                self.admitted += 1
+            else:
+                self._expiry.pop(candidate, None)
+                self.rejected += 1
+
+    def _admit(self, candidate: Hashable, size: int) -> bool:
+        """
+        Make room in the main region for the window's evictee if it is more
+        popular than every entry it would displace (probation LRU first).
+        """
+        if size > self.main_max:
+            return False
+        needed = self._probation.size + self._protected.size + size - self.main_max
+        if needed <= 0:
+            return True
+
+        victims: List[Tuple[_Segment, Hashable]] = []
+        freed = 0
+        for segment in (self._probation, self._protected):
+            for key, victim in segment.entries.items():
+                if freed >= needed:
+                    break
+                victims.append((segment, key))
+                freed += victim.size
+        candidate_frequency = self.sketch.frequency(candidate)
+        if any(self.sketch.frequency(key) >= candidate_frequency for _, key in victims):
+            return False
+        for segment, key in victims:
+            self._remove(segment, key)
+        return True
+
+    def popitem(self) -> Tuple[Hashable, Any]:
+        """Evict the entry the policy values least."""
+        for segment in (self._probation, self._window, self._protected):
+            if segment.entries:
+                key = segment.lru()
+                return key, self._remove(segment, key).value
+        raise KeyError("cache is empty")
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "window_size": self._window.size,
+            "probation_size": self._probation.size,
+            "protected_size": self._protected.size,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "sketch_resets": self.sketch.resets,
+        }
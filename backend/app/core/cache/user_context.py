@@ -0,0 +1,120 @@
+import logging
+import uuid
+from typing import Any, Dict, List, Optional
+from cachetools import TTLCache
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import crud
+from app.core.config import settings
+from app.core.security import key_vault
+from app.schemas.gateway_key import GatewayKeyCreate
+
+logger = logging.getLogger(__name__)
+
+class UserContext:
+    """
+    Per-user data the gateway needs on every request: the gateway key used for
+    usage logging and the user's provider keys. Provider keys are decrypted on
+    first use and kept decrypted for the lifetime of the entry.
+    """
+    def __init__(self, user_id: str, gateway_key_id: str, encrypted_keys: Dict[str, str]):
+        self.user_id = user_id
+        self.gateway_key_id = gateway_key_id
+        self._encrypted_keys = encrypted_keys
+        self._api_keys: Dict[str, str] = {}
+
+    @property
+    def providers(self) -> List[str]:
+        return list(self._encrypted_keys.keys())
+
+    def get_api_key(self, provider: str) -> Optional[str]:
+        if provider not in self._api_keys:
+            encrypted = self._encrypted_keys.get(provider)
+            if encrypted is None:
+                return None
+            self._api_keys[provider] = key_vault.decrypt(encrypted)
+        return self._api_keys[provider]
+
+class UserContextCache:
+    def __init__(self, maxsize: Optional[int] = None, ttl: Optional[int] = None):
+        """
+        Initialize the user context cache.
+
+        Args:
+            maxsize: Maximum number of users kept in memory.
+            ttl: Seconds before an entry is reloaded from the database, bounding
+                staleness when a key changes on another worker.
+        """
+        self._cache = TTLCache(
+            maxsize=maxsize or settings.USER_CONTEXT_CACHE_MAXSIZE,
+            ttl=ttl or settings.USER_CONTEXT_CACHE_TTL,
+        )
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+
+    async def get(self, db: AsyncSession, user_id: str) -> UserContext:
+        """
+        Return the cached context for a user, loading it from the database on a miss.
+        """
+        context = self._cache.get(user_id)
+        if context is not None:
+            self._hits += 1
+            return context
+
+        self._misses += 1
+        context = await self._load(db, user_id)
+        self._cache[user_id] = context
+        return context
+
+    async def get_api_key(self, db: AsyncSession, user_id: str, provider: str) -> Optional[str]:
+        context = await self.get(db, user_id)
+        return context.get_api_key(provider)
+
+    async def _load(self, db: AsyncSession, user_id: str) -> UserContext:
+        # Get or create a gateway key for the user (Auto-provision for dashboard)
+        gateway_keys = await crud.gateway_key.get_keys_by_user_async(db, user_id=user_id)
+        if gateway_keys:
+            gateway_key_id = gateway_keys[0].id
+        else:
+            new_key = await crud.gateway_key.create_gateway_key_async(
+                db,
+                obj_in=GatewayKeyCreate(name="Default Dashboard Key", rate_limit=1000),
+                user_id=user_id,
+                key_hash=f"auto-{uuid.uuid4()}",
+                prefix="sk-auto"
+            )
+            gateway_key_id = new_key.id
+
+        provider_keys = await crud.provider_key.get_provider_keys_by_user_async(db, user_id=user_id)
+        encrypted_keys = {pk.provider: pk.encrypted_key for pk in provider_keys}
+        return UserContext(user_id, gateway_key_id, encrypted_keys)
+
+    def invalidate(self, user_id: str) -> None:
+        """
+        Drop a user's context. Call whenever one of their gateway or provider keys changes.
+        """
+        if self._cache.pop(user_id, None) is not None:
+            self._invalidations += 1
+            logger.info(f"Invalidated user context for {user_id}")
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        total = self._hits + self._misses
+        hit_rate = (self._hits / total) if total > 0 else 0
+
+        return {
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": hit_rate,
+            "invalidations": self._invalidations,
+            "current_size": len(self._cache),
+            "max_size": self._cache.maxsize,
+            "ttl": self._cache.ttl
+        }
+
+# Global instance
+user_context_cache = UserContextCache()
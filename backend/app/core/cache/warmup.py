@@ -0,0 +1,113 @@
+import logging
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import IO, Any, Dict, List, NamedTuple, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, every worker warms up
+    fcntl = None
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+def acquire_warmup_lock(path: str) -> Optional[IO]:
+    """
+    Elect one worker per host to replay warm-up prompts, so their provider cost
+    does not scale with the worker count. Returns the open lock file (the lock
+    is held until it is closed or the process exits), or None if another
+    worker holds it.
+    """
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    lock_file = open(path, "a")
+    if fcntl is None:
+        return lock_file
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return None
+    return lock_file
+
+class RecordedPrompt(NamedTuple):
+    tenant: str
+    key: str
+    request: Dict[str, Any]  # the GatewayRequest body, enough to replay it
+    count: int
+
+class PromptRecorder:
+    """
+    Counts requests per (tenant, cache key) in hourly buckets over a rolling
+    window, keeping the request body so the most frequent prompts can be
+    replayed to warm an empty cache. Bounded to max_keys, least recently seen
+    first out. Travels with cache snapshots so it survives deploys.
+    """
+    BUCKET_SECONDS = 3600
+
+    def __init__(self, window_seconds: Optional[int] = None, max_keys: Optional[int] = None):
+        self.window_seconds = window_seconds or settings.CACHE_WARMUP_WINDOW_SECONDS
+        self.max_keys = max_keys or settings.CACHE_WARMUP_MAX_KEYS
+        # (tenant, key) -> (request, {bucket: count})
+        self._prompts: "OrderedDict[Tuple[str, str], Tuple[Dict[str, Any], Dict[int, int]]]" = OrderedDict()
+
+    def _bucket(self, now: float) -> int:
+        return int(now // self.BUCKET_SECONDS)
+
+    def record(self, tenant: str, key: str, request: Any, now: Optional[float] = None) -> None:
+        """Count a request. ``request`` is the request model (dumped only for new keys) or its dict."""
+        bucket = self._bucket(now or time.time())
+        entry = self._prompts.get((tenant, key))
+        if entry is None:
+            entry = (request.model_dump(mode="json") if hasattr(request, "model_dump") else request, {})
+            self._prompts[(tenant, key)] = entry
+        else:
+            self._prompts.move_to_end((tenant, key))
+        entry[1][bucket] = entry[1].get(bucket, 0) + 1
+        while len(self._prompts) > self.max_keys:
+            self._prompts.popitem(last=False)
+
+    def _count(self, buckets: Dict[int, int], oldest: int) -> int:
+        return sum(count for bucket, count in buckets.items() if bucket >= oldest)
+
+    def top(self, n: int, now: Optional[float] = None) -> List[RecordedPrompt]:
+        """The n most requested prompts within the window."""
+        oldest = self._bucket((now or time.time()) - self.window_seconds)
+        prompts = [
+            RecordedPrompt(tenant, key, request, self._count(buckets, oldest))
+            for (tenant, key), (request, buckets) in self._prompts.items()
+        ]
+        prompts = [p for p in prompts if p.count > 0]
+        prompts.sort(key=lambda p: p.count, reverse=True)
+        return prompts[:n]
+
+    def dump(self, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        oldest = self._bucket((now or time.time()) - self.window_seconds)
+        return [
+            {
+                "tenant": tenant,
+                "key": key,
+                "request": request,
+                "buckets": {str(b): c for b, c in buckets.items() if b >= oldest},
+            }
+            for (tenant, key), (request, buckets) in self._prompts.items()
+            if self._count(buckets, oldest) > 0
+        ]
+
+    def load(self, record: Dict[str, Any]) -> None:
+        buckets = {int(b): c for b, c in record["buckets"].items()}
+        existing = self._prompts.get((record["tenant"], record["key"]))
+        if existing is not None:
+            for bucket, count in buckets.items():
+                existing[1][bucket] = existing[1].get(bucket, 0) + count
+        else:
+            self._prompts[(record["tenant"], record["key"])] = (record["request"], buckets)
+        while len(self._prompts) > self.max_keys:
+            self._prompts.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._prompts)
+
+# Global instance
+prompt_recorder = PromptRecorder()
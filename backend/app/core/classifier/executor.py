@@ -0,0 +1,63 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+
+from app.core.config import settings
+from app.schemas.llm import Message
+
+T = TypeVar("T")
+
+def prompt_chars(messages: List[Message]) -> int:
+    return sum(len(m.content) for m in messages)
+
+class TokenizationExecutor:
+    """
+    Runs tokenization-heavy work (classifying, counting) for large prompts on a
+    thread pool so it does not block the event loop; tiktoken releases the GIL
+    while encoding. Smaller prompts run inline, where a thread hop would cost
+    more than the work itself.
+    """
+    def __init__(self, offload_chars: int = 32000, max_workers: int = 4):
+        """
+        Args:
+            offload_chars: Prompts of at least this many characters are offloaded.
+            max_workers: Size of the thread pool. Kept apart from TokenCounter's
+                chunk pool, so offloaded work can wait on chunks without deadlocking.
+        """
+        self.offload_chars = offload_chars
+        self.max_workers = max_workers
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._offloaded = 0
+        self._inline = 0
+
+    async def run(self, chars: int, fn: Callable[..., T], *args: Any) -> T:
+        """
+        Call fn(*args), on the thread pool if the prompt has at least offload_chars characters.
+        """
+        if chars < self.offload_chars:
+            self._inline += 1
+            return fn(*args)
+
+        self._offloaded += 1
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="tokenize")
+        return await asyncio.get_running_loop().run_in_executor(self._pool, fn, *args)
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "offload_chars": self.offload_chars,
+            "offloaded": self._offloaded,
+            "inline": self._inline,
+        }
+
+# Global instance
+tokenization_executor = TokenizationExecutor(
+    offload_chars=settings.TOKENIZE_OFFLOAD_CHARS,
+    max_workers=settings.TOKENIZE_THREADS,
+)
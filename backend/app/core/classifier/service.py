@@ -9,38 +9,62 @@ class RequestClassifier:
     MODERATE_THRESHOLD = 3000
     COMPLEX_THRESHOLD = 15000
     
-    # Feature Patterns (Regex)
+    # Feature keywords, matched case-insensitively anywhere in the prompt
     FEATURES = {
-        "code": r"(def |function |class |import |const |let |var |=>|return )",
-        "sql": r"(SELECT |INSERT |UPDATE |DELETE |FROM |WHERE |JOIN )",
-        "json": r"(\{.*\}|\[.*\])",
-        "refactor": r"(refactor|optimize|rewrite|clean up)",
-        "reasoning": r"(explain|why|how|analyze|compare|evaluate)"
+        "code": ("def ", "function ", "class ", "import ", "const ", "let ", "var ", "=>", "return "),
+        "sql": ("select ", "insert ", "update ", "delete ", "from ", "where ", "join "),
+        "json": (),  # JSON_PATTERN
+        "refactor": ("refactor", "optimize", "rewrite", "clean up"),
+        "reasoning": ("explain", "why", "how", "analyze", "compare", "evaluate"),
     }
+    # A bracket closed later on the same line. Stopping at the next bracket keeps the
+    # scan linear (the previous \{.*\} backtracked quadratically on unclosed brackets).
+    JSON_PATTERN = r"\{[^\n{}]*\}|\[[^\n\[\]]*\]"
+
+    def detect_features(self, prompt: Union[str, List[Dict[str, str]]]) -> List[str]:
+        """
+        Features found in the prompt, in FEATURES order. Each message is scanned
+        once with a single precompiled pattern, and scanning stops as soon as
+        every feature has been found.
+        """
+        if isinstance(prompt, list):
+            texts = (
+                str(msg.get("content", "") if isinstance(msg, dict) else getattr(msg, "content", ""))
+                for msg in prompt
+            )
+        else:
+            texts = (prompt,)
+
+        found = set()
+        for text in texts:
+            text = text.lower()
+            pos = 0
+            while len(found) < len(self.FEATURES):
+                match = _FEATURE_PATTERN.search(text, pos)
+                if match is None:
+                    break
+                keyword = match.group()
+                found.add("json" if keyword[0] in "{[" else _KEYWORD_FEATURES[keyword])
+                # Resume right after the match start: a keyword may begin inside
+                # another match ("hoWHERE "), as with separate searches
+                pos = match.start() + 1
+            if len(found) == len(self.FEATURES):
+                break
+        return [feature for feature in self.FEATURES if feature in found]
 
     def analyze(self, prompt: Union[str, List[Dict[str, str]]]) -> ClassificationResult:
         """
         Analyze the request to determine complexity and recommended provider.
         Accepts either a raw string or a list of messages (chat format).
         """
-        text_content = ""
-        
-        # 1. Calculate Tokens and extract text
+        # 1. Calculate Tokens
         if isinstance(prompt, list):
             tokens = token_counter.count_messages(prompt)
-            # Naive concatenation for feature analysis
-            for msg in prompt:
-                content = msg.get("content", "") if isinstance(msg, dict) else getattr(msg, "content", "")
-                text_content += str(content) + "\n"
         else:
             tokens = token_counter.count_tokens(prompt)
-            text_content = prompt
 
         # 2. Detect Features
-        detected_features = []
-        for feature, pattern in self.FEATURES.items():
-            if re.search(pattern, text_content, re.IGNORECASE):
-                detected_features.append(feature)
+        detected_features = self.detect_features(prompt)
 
         # 3. Determine Complexity
         complexity = "simple"
@@ -80,5 +104,36 @@ class RequestClassifier:
             reasoning=reasoning
         )
 
+def _keyword_trie(keywords: List[str]) -> str:
+    """
+    A regex matching any of the keywords, factored by common prefix. The regex
+    engine then picks a branch per character instead of trying every keyword.
+    """
+    trie: Dict[str, dict] = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def emit(node: Dict[str, dict]) -> str:
+        branches = [re.escape(char) + emit(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        if len(branches) == 1 and "" not in node:
+            return branches[0]
+        pattern = f"(?:{'|'.join(branches)})"
+        return pattern + "?" if "" in node else pattern
+
+    return emit(trie)
+
+_KEYWORD_FEATURES = {
+    keyword: feature for feature, keywords in RequestClassifier.FEATURES.items() for keyword in keywords
+}
+# Matched against lowercased text: case-insensitive, without the cost of re.IGNORECASE.
+# No two keywords (or a keyword and a bracket) can match at the same position, so
+# the match at each position identifies its feature.
+_FEATURE_PATTERN = re.compile(f"{_keyword_trie(list(_KEYWORD_FEATURES))}|{RequestClassifier.JSON_PATTERN}")
+
 # Global instance
 request_classifier = RequestClassifier()
@@ -1,11 +1,69 @@
+import hashlib
 import tiktoken
 import logging
-from typing import List, Dict, Union
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple, Union
+from cachetools import LRUCache
+from tiktoken.model import encoding_name_for_model
+
+from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+def _split_point(text: str, low: int, high: int) -> Optional[int]:
+    """
+    The last position in (low, high) where the text may be split: after a newline
+    followed by a letter, or before a space between two letters. The pre-tokenizer
+    patterns of cl100k_base and o200k_base always end a piece there, and BPE never
+    merges across pieces, so the token counts of the parts add up exactly.
+    """
+    i = high
+    while (i := text.rfind("\n", low, i)) > low:
+        if text[i + 1].isalpha():
+            return i + 1
+    i = high
+    while (i := text.rfind(" ", low, i)) > low:
+        if text[i - 1].isalpha() and text[i + 1].isalpha():
+            return i
+    return None
+
+def split_text(text: str, chunk_chars: int) -> List[str]:
+    """
+    Split text into chunks of about chunk_chars whose token counts sum to the
+    count of the whole text. A chunk is extended to the end of the text when no
+    split point is found in the second half of its range (e.g. CJK text
+    without spaces or newlines).
+    """
+    chunks = []
+    start = 0
+    while len(text) - start > chunk_chars:
+        split = _split_point(text, start + chunk_chars // 2, start + chunk_chars)
+        if split is None:
+            break
+        chunks.append(text[start:split])
+        start = split
+    chunks.append(text[start:])
+    return chunks
+
 class TokenCounter:
-    def __init__(self, default_encoding: str = "cl100k_base"):
+    def __init__(
+        self,
+        default_encoding: str = "cl100k_base",
+        message_cache_size: int = 10000,
+        chunk_chars: int = 0,
+        threads: int = 4,
+    ):
+        """
+        Args:
+            default_encoding: Encoding used without a model or for unknown models.
+            message_cache_size: Per-message token counts kept (LRU), so a
+                multi-turn conversation only encodes its new messages.
+            chunk_chars: Texts longer than this are split and the chunks encoded
+                in parallel on a thread pool (tiktoken releases the GIL while
+                encoding); 0 encodes every text in one call.
+            threads: Size of that thread pool.
+        """
         self.default_encoding = default_encoding
         try:
             self.encoding = tiktoken.get_encoding(default_encoding)
@@ -13,6 +71,37 @@ class TokenCounter:
             logger.error(f"Error loading encoding {default_encoding}: {e}")
             # Fallback for robustness
             self.encoding = tiktoken.get_encoding("cl100k_base")
+        # Resolved encoders by family (o200k_base, cl100k_base, ...) and model -> family
+        self._encodings: Dict[str, Any] = {self.encoding.name: self.encoding}
+        self._model_encodings: Dict[str, str] = {}
+        # (encoding, message content hash) -> tokens of the message, framing included
+        self._message_counts: LRUCache = LRUCache(maxsize=message_cache_size)
+        self._message_hits = 0
+        self._message_misses = 0
+        # Counts may run on tokenization threads as well as on the event loop
+        self._lock = threading.Lock()
+        self.chunk_chars = chunk_chars
+        self.threads = threads
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._parallel_encodes = 0
+
+    def _encoding_for_model(self, model: str):
+        """
+        The model's encoder, resolved once per model and loaded once per family.
+        Unknown models use the default encoding.
+        """
+        name = self._model_encodings.get(model)
+        if name is None:
+            try:
+                name = encoding_name_for_model(model)
+            except KeyError:
+                logger.warning(f"Could not find encoding for model {model}, using default {self.default_encoding}")
+                name = self.encoding.name
+            self._model_encodings[model] = name
+        encoding = self._encodings.get(name)
+        if encoding is None:
+            encoding = self._encodings[name] = tiktoken.get_encoding(name)
+        return encoding
 
     def count_tokens(self, text: str, model: str = None) -> int:
         """
@@ -21,44 +110,98 @@ class TokenCounter:
         """
         if not text:
             return 0
-            
-        encoding = self.encoding
-        if model:
-            try:
-                encoding = tiktoken.encoding_for_model(model)
-            except KeyError:
-                logger.warning(f"Could not find encoding for model {model}, using default {self.default_encoding}")
-        
+
+        encoding = self._encoding_for_model(model) if model else self.encoding
+        return self._encode_len(encoding, text)
+
+    def _encode_len(self, encoding, text: str) -> int:
+        if self.chunk_chars and len(text) > self.chunk_chars:
+            chunks = split_text(text, self.chunk_chars)
+            if len(chunks) > 1:
+                with self._lock:
+                    if self._pool is None:
+                        self._pool = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="tokenize-chunk")
+                    self._parallel_encodes += 1
+                    pool = self._pool
+                return sum(pool.map(lambda chunk: len(encoding.encode(chunk)), chunks))
         return len(encoding.encode(text))
 
+    @staticmethod
+    def _message_fields(message: Union[Dict[str, str], Any]) -> List[Tuple[str, str]]:
+        # Handle Pydantic models or dicts
+        msg_dict = message if isinstance(message, dict) else message.model_dump(exclude_none=True)
+        return [(key, str(value)) for key, value in msg_dict.items()]
+
+    @staticmethod
+    def _message_hash(fields: List[Tuple[str, str]]) -> bytes:
+        digest = hashlib.blake2b(digest_size=16)
+        for key, value in fields:
+            digest.update(key.encode())
+            digest.update(b"\0")
+            digest.update(value.encode("utf-8", "surrogatepass"))
+            digest.update(b"\0")
+        return digest.digest()
+
     def count_messages(self, messages: List[Dict[str, str]], model: str = "gpt-4o") -> int:
         """
         Count tokens for a list of messages (Chat format).
         Logic adapted from OpenAI's cookbook for gpt-3.5/4.
+        Per-message counts are memoized by content hash.
         """
-        encoding = self.encoding
-        try:
-            encoding = tiktoken.encoding_for_model(model)
-        except KeyError:
-            logger.warning(f"Could not find encoding for model {model}, using default")
+        encoding = self._encoding_for_model(model)
 
         tokens_per_message = 3
         tokens_per_name = 1
-        
+
         # Adjust per model logic if needed, but for now 3/1 is a good general approximation for current models
-        
+
         num_tokens = 0
         for message in messages:
-            num_tokens += tokens_per_message
-            # Handle Pydantic models or dicts
-            msg_dict = message if isinstance(message, dict) else message.model_dump(exclude_none=True)
-            for key, value in msg_dict.items():
-                num_tokens += len(encoding.encode(str(value)))
-                if key == "name":
-                    num_tokens += tokens_per_name
-        
+            fields = self._message_fields(message)
+            key = (encoding.name, self._message_hash(fields))
+            with self._lock:
+                message_tokens = self._message_counts.get(key)
+                if message_tokens is not None:
+                    self._message_hits += 1
+                else:
+                    self._message_misses += 1
+            if message_tokens is not None:
+                num_tokens += message_tokens
+                continue
+
+            message_tokens = tokens_per_message
+            for key_name, value in fields:
+                message_tokens += self._encode_len(encoding, value)
+                if key_name == "name":
+                    message_tokens += tokens_per_name
+            with self._lock:
+                self._message_counts[key] = message_tokens
+            num_tokens += message_tokens
+
         num_tokens += 3  # every reply is primed with <|start|>assistant<|message|>
         return num_tokens
 
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        lookups = self._message_hits + self._message_misses
+        return {
+            "encodings": sorted(self._encodings),
+            "message_hits": self._message_hits,
+            "message_misses": self._message_misses,
+            "message_hit_rate": (self._message_hits / lookups) if lookups > 0 else 0,
+            "message_cache_size": len(self._message_counts),
+            "message_cache_max_size": self._message_counts.maxsize,
+            "parallel_encodes": self._parallel_encodes,
+        }
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+
 # Global instance
-token_counter = TokenCounter()
+token_counter = TokenCounter(
+    message_cache_size=settings.TOKEN_COUNT_CACHE_MAXSIZE,
+    chunk_chars=settings.TOKENIZE_CHUNK_CHARS,
+    threads=settings.TOKENIZE_THREADS,
+)
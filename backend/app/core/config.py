@@ -18,7 +18,98 @@ class Settings(BaseSettings):
     # Security
     SECRET_KEY: str = os.getenv("SECRET_KEY", "09d25e094faa6ca2556c818166b7a9563b93f7099f6f0f4caa6cf63b88e8d3e7")
     ALGORITHM: str = "HS256"
+    ADMIN_EMAILS: List[str] = []  # may read gateway-wide metrics, e.g. per-tenant cache usage
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8  # 8 days
     MASTER_ENCRYPTION_KEY: str = os.getenv("MASTER_ENCRYPTION_KEY", "7u8U7z6T7v9T7r8Q7p6K7u8B7z6T7v9T7r8Q7p6K7u8=") # Placeholder 32-byte key
 
+    # Provider HTTP clients (one pooled client per provider)
+    PROVIDER_HTTP2: bool = True
+    PROVIDER_MAX_CONNECTIONS: int = 100
+    PROVIDER_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    PROVIDER_KEEPALIVE_EXPIRY: float = 30.0  # seconds
+    PROVIDER_CONNECT_TIMEOUT: float = 5.0
+    PROVIDER_READ_TIMEOUT: float = 60.0
+    PROVIDER_WRITE_TIMEOUT: float = 10.0
+    PROVIDER_POOL_TIMEOUT: float = 5.0  # max wait for a free connection
+
+    # Failover across RoutingResult.fallback_models
+    FAILOVER_MAX_ATTEMPTS: int = 3
+    GATEWAY_REQUEST_DEADLINE_SECONDS: float = 90.0  # shared by all attempts
+
+    # Hedged requests (opt-in routing_mode="hedged")
+    HEDGE_PERCENTILE: float = 95.0  # fire the hedge once the primary is slower than this percentile
+    HEDGE_MIN_SAMPLES: int = 20  # below this many observations use HEDGE_DEFAULT_DELAY_MS
+    HEDGE_DEFAULT_DELAY_MS: int = 2000
+    HEDGE_LATENCY_WINDOW: int = 200  # latencies kept per model
+    HEDGE_BUDGET_USD: float = 1.0  # extra spend allowed per user per window
+    HEDGE_BUDGET_WINDOW_SECONDS: int = 86400
+
+    # Usage logging (write-behind batches)
+    USAGE_LOG_BATCH_SIZE: int = 100
+    USAGE_LOG_FLUSH_INTERVAL_MS: int = 200
+    USAGE_LOG_QUEUE_SIZE: int = 10000
+
+    # L1 response cache memory ceiling (serialized bytes); 0 bounds by entry count instead
+    CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    CACHE_STRIP_PROVIDER_RESPONSE: bool = True
+    # Each tenant (and the opt-in public partition) is capped at this share, same unit as above
+    CACHE_TENANT_QUOTA: int = 8 * 1024 * 1024
+    CACHE_POLICY: str = "lru"  # "lru" or "tinylfu" (frequency-based admission, resists one-off prompts)
+    # Stale-while-revalidate: past this age (seconds) a cached completion is served and
+    # refreshed in the background; 0 disables it. The hard TTL stays the cache TTL (1 hour).
+    CACHE_SOFT_TTL: int = 0
+
+    # Sampled (temperature > 0) requests keep up to this many distinct responses per key
+    # and serve a random one; 1 caches a single response
+    CACHE_VARIANT_POOL_SIZE: int = 1
+
+    # Near-duplicate cache lookups (opt-in per request with cache_fuzzy, or per gateway key id)
+    CACHE_FUZZY_THRESHOLD: float = 0.8  # estimated Jaccard similarity of normalized word 3-grams
+    CACHE_FUZZY_MAX_ENTRIES: int = 10000
+    CACHE_FUZZY_GATEWAY_KEYS: List[str] = []
+
+    # Cache snapshots: loaded at startup and saved at shutdown when a path is set
+    CACHE_SNAPSHOT_PATH: str = ""
+    # Warm-up: after startup, replay this many of the most frequent recent prompts (0 disables)
+    CACHE_WARMUP_TOP_N: int = 0
+    CACHE_WARMUP_WINDOW_SECONDS: int = 86400
+    CACHE_WARMUP_MAX_KEYS: int = 10000  # prompts whose frequency is tracked
+    CACHE_WARMUP_LOCK_PATH: str = "./cache/warmup.lock"  # only the worker holding it warms up
+
+    # L2 response cache: SQLite file shared by all workers on the host
+    CACHE_L2_ENABLED: bool = True
+    CACHE_L2_PATH: str = "./cache/responses.db"
+    CACHE_L2_WRITE_QUEUE_SIZE: int = 10000  # writes waiting for the L2 writer thread
+
+    # Token counts are memoized per message (LRU), so each chat turn only encodes its new message
+    TOKEN_COUNT_CACHE_MAXSIZE: int = 10000
+    # Large prompts are tokenized on a thread pool instead of the event loop, and texts
+    # longer than TOKENIZE_CHUNK_CHARS are split and encoded in parallel (0 disables splitting)
+    TOKENIZE_OFFLOAD_CHARS: int = 32000  # total message characters
+    TOKENIZE_CHUNK_CHARS: int = 64000
+    TOKENIZE_THREADS: int = 4
+
+    # Classification results per message content (cache hits route without tokenizing)
+    CLASSIFICATION_CACHE_TTL: int = 3600  # seconds, at least the response cache TTL
+    CLASSIFICATION_CACHE_MAXSIZE: int = 50000
+
+    # Per-user request context cache (gateway key, provider keys)
+    USER_CONTEXT_CACHE_TTL: int = 300  # seconds
+    USER_CONTEXT_CACHE_MAXSIZE: int = 10000
+
+    # Verified-token / user snapshot cache for get_current_user
+    AUTH_CACHE_TTL_SECONDS: int = 60
+    AUTH_CACHE_MAXSIZE: int = 10000
+
+    # gw_ API keys: last_used_at is written in batches
+    GATEWAY_KEY_LAST_USED_FLUSH_SECONDS: int = 30
+    # In-memory key index: reloaded this often (deletions on other workers apply within it)
+    GATEWAY_KEY_INDEX_RELOAD_SECONDS: int = 5
+    GATEWAY_KEY_UNKNOWN_CACHE_MAXSIZE: int = 10000
+
+    # Token revocation (in-memory store): logouts from other workers are read every
+    # REVOCATION_SYNC_INTERVAL_SECONDS, expired rows purged every REVOCATION_PURGE_INTERVAL_SECONDS
+    REVOCATION_SYNC_INTERVAL_SECONDS: int = 2
+    REVOCATION_PURGE_INTERVAL_SECONDS: int = 300
+
 settings = Settings()
@@ -15,6 +15,7 @@ async def http_exception_handler(request: Request, exc: StarletteHTTPException):
     return JSONResponse(
         status_code=exc.status_code,
         content={"error": {"code": "http_error", "message": str(exc.detail)}},
+        headers=getattr(exc, "headers", None),
     )
 
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
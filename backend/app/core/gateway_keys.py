@@ -0,0 +1,151 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional
+from cachetools import TTLCache
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import security
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.gateway_key import GatewayKey
+
+logger = logging.getLogger(__name__)
+
+GATEWAY_KEY_PREFIX = "gw_"
+
+class GatewayKeyEntry:
+    """The fields of a GatewayKey needed to authenticate and rate limit a request."""
+    __slots__ = ("id", "user_id", "rate_limit", "is_active")
+
+    def __init__(self, id: str, user_id: str, rate_limit: Optional[int], is_active: Optional[bool]):
+        self.id = id
+        self.user_id = user_id
+        self.rate_limit = rate_limit or 100
+        self.is_active = bool(is_active) if is_active is not None else True
+
+class GatewayKeyIndex:
+    """
+    In-memory key_hash -> gateway key index used to authenticate `gw_` bearer keys
+    without a DB query per request.
+
+    The index is loaded from the gateway_keys table on first use and reloaded by
+    the first request after reload_interval seconds, so keys deleted, disabled
+    or re-limited on another worker stop applying here within that interval. A
+    hash that is not in the index (e.g. a key created on another worker) falls
+    back to a single lookup; unknown hashes are remembered for the same interval,
+    so repeated bad keys do not query the DB on every request. `last_used_at` is
+    recorded in memory and written in batches by a background task instead of
+    once per request.
+    """
+    def __init__(
+        self,
+        session_factory: Callable = AsyncSessionLocal,
+        flush_interval_seconds: Optional[int] = None,
+        reload_interval_seconds: Optional[int] = None,
+        unknown_cache_size: Optional[int] = None,
+    ):
+        self._session_factory = session_factory
+        self.flush_interval = flush_interval_seconds or settings.GATEWAY_KEY_LAST_USED_FLUSH_SECONDS
+        self.reload_interval = reload_interval_seconds or settings.GATEWAY_KEY_INDEX_RELOAD_SECONDS
+        self._by_hash: Dict[str, GatewayKeyEntry] = {}
+        self._unknown = TTLCache(
+            maxsize=unknown_cache_size or settings.GATEWAY_KEY_UNKNOWN_CACHE_MAXSIZE,
+            ttl=self.reload_interval,
+        )
+        self._last_used: Dict[str, datetime] = {}
+        self._loaded_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @staticmethod
+    def is_gateway_key(token: str) -> bool:
+        return token.startswith(GATEWAY_KEY_PREFIX)
+
+    async def authenticate(self, db: AsyncSession, raw_key: str) -> Optional[GatewayKeyEntry]:
+        """
+        Resolve a raw `gw_` key to its entry, or None if it does not exist.
+        """
+        if self._loaded_at is None or time.monotonic() - self._loaded_at >= self.reload_interval:
+            await self.warm(db)
+        key_hash = security.hash_key(raw_key)
+        entry = self._by_hash.get(key_hash)
+        if entry is None:
+            if key_hash in self._unknown:
+                return None
+            result = await db.execute(select(GatewayKey).filter(GatewayKey.key_hash == key_hash).limit(1))
+            db_obj = result.scalars().first()
+            if db_obj is None:
+                self._unknown[key_hash] = True
+                return None
+            entry = self.add(db_obj)
+        return entry
+
+    async def warm(self, db: AsyncSession) -> None:
+        """Replace the index with the current contents of the gateway_keys table."""
+        reloading = self._loaded_at is not None
+        # Concurrent requests keep using the current index instead of reloading too
+        self._loaded_at = time.monotonic()
+        result = await db.execute(
+            select(GatewayKey.id, GatewayKey.user_id, GatewayKey.key_hash, GatewayKey.rate_limit, GatewayKey.is_active)
+        )
+        self._by_hash = {
+            key_hash: GatewayKeyEntry(key_id, user_id, rate_limit, is_active)
+            for key_id, user_id, key_hash, rate_limit, is_active in result.all()
+        }
+        if not reloading:
+            logger.info(f"Gateway key index warmed with {len(self._by_hash)} keys")
+
+    def add(self, db_obj: GatewayKey) -> GatewayKeyEntry:
+        entry = GatewayKeyEntry(db_obj.id, db_obj.user_id, db_obj.rate_limit, db_obj.is_active)
+        self._by_hash[db_obj.key_hash] = entry
+        self._unknown.pop(db_obj.key_hash, None)
+        return entry
+
+    def remove(self, key_hash: str) -> None:
+        self._by_hash.pop(key_hash, None)
+
+    def touch(self, key_id: str) -> None:
+        """Record a use of the key; persisted on the next flush."""
+        self._last_used[key_id] = datetime.now(timezone.utc)
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._loop is not loop:
+            # Start lazily if the app lifespan did not (e.g. in tests)
+            self.start()
+
+    async def flush_last_used(self) -> None:
+        if not self._last_used:
+            return
+        pending, self._last_used = self._last_used, {}
+        try:
+            async with self._session_factory() as db:
+                for key_id, used_at in pending.items():
+                    await db.execute(update(GatewayKey).where(GatewayKey.id == key_id).values(last_used_at=used_at))
+                await db.commit()
+        except Exception as e:
+            logger.error(f"Failed to update last_used_at for {len(pending)} gateway keys: {str(e)}")
+
+    def start(self) -> None:
+        """Start the periodic last_used_at flush on the running event loop."""
+        self._loop = asyncio.get_running_loop()
+        self._task = self._loop.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        await self.flush_last_used()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush_last_used()
+
+# Global instance
+gateway_key_index = GatewayKeyIndex()
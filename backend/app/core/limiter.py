@@ -3,3 +3,57 @@ from slowapi.util import get_remote_address
 
 # Initialize limiter with remote address as default key
 limiter = Limiter(key_func=get_remote_address)
+
+import time
+from typing import Dict, Optional
+
+class TokenBucket:
+    """
+    Classic token bucket: holds up to `capacity` tokens and refills continuously
+    at `capacity / period` tokens per second.
+    """
+    __slots__ = ("capacity", "refill_rate", "tokens", "updated_at")
+
+    def __init__(self, capacity: int, period: float):
+        self.capacity = capacity
+        self.refill_rate = capacity / period
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+
+    def consume(self) -> float:
+        """
+        Take one token. Returns 0 when allowed, otherwise the seconds until a token is available.
+        """
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.refill_rate)
+        self.updated_at = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.refill_rate
+
+class KeyRateLimiter:
+    """
+    In-memory per-key token buckets enforcing GatewayKey.rate_limit (requests per period).
+    """
+    def __init__(self, period: float = 60.0):
+        self.period = period
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    def hit(self, key: str, limit: int) -> Optional[float]:
+        """
+        Count a request against `key`. Returns None when allowed, otherwise the retry-after in seconds.
+        """
+        bucket = self._buckets.get(key)
+        if bucket is None or bucket.capacity != limit:
+            # New key or its rate_limit was changed
+            bucket = TokenBucket(limit, self.period)
+            self._buckets[key] = bucket
+        retry_after = bucket.consume()
+        return retry_after or None
+
+    def reset(self, key: str) -> None:
+        self._buckets.pop(key, None)
+
+# Per gateway key limiter (rate_limit is requests per minute)
+key_rate_limiter = KeyRateLimiter(period=60.0)
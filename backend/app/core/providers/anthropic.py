@@ -1,19 +1,23 @@
 import httpx
-from app.core.providers.base import BaseProvider
-from app.schemas.llm import GenerationRequest, GenerationResponse, GenerationUsage, MessageRole
+from typing import AsyncIterator
+from app.core.providers.base import BaseProvider, iter_sse_data
+from app.schemas.llm import GenerationRequest, GenerationResponse, GenerationUsage, GenerationChunk, MessageRole
 
 class AnthropicProvider(BaseProvider):
+    URL = "https://api.anthropic.com/v1/messages"
+
     @property
     def name(self) -> str:
         return "anthropic"
 
-    async def generate(self, request: GenerationRequest, api_key: str) -> GenerationResponse:
-        headers = {
+    def _build_headers(self, api_key: str) -> dict:
+        return {
             "x-api-key": api_key,
             "anthropic-version": "2023-06-01",
             "Content-Type": "application/json"
         }
-        
+
+    def _build_payload(self, request: GenerationRequest) -> dict:
         # Extract system prompt if present
         system_prompt = None
         messages = []
@@ -22,7 +26,7 @@ class AnthropicProvider(BaseProvider):
                 system_prompt = m.content
             else:
                 messages.append({"role": m.role.value, "content": m.content})
-        
+
         payload = {
             "model": request.model_id,
             "messages": messages,
@@ -34,32 +38,73 @@ class AnthropicProvider(BaseProvider):
             payload["system"] = system_prompt
         if request.stop_sequences:
             payload["stop_sequences"] = request.stop_sequences
+        return payload
+
+    async def generate(self, request: GenerationRequest, api_key: str) -> GenerationResponse:
+        headers = self._build_headers(api_key)
+        payload = self._build_payload(request)
+
+        response = await self.client.post(
+            self.URL,
+            json=payload,
+            headers=headers
+        )
+        response.raise_for_status()
+        data = response.json()
 
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://api.anthropic.com/v1/messages",
-                json=payload,
-                headers=headers,
-                timeout=60.0
+        content = data["content"][0]["text"]
+        finish_reason = data["stop_reason"]
+
+        usage = None
+        if "usage" in data:
+            usage = GenerationUsage(
+                input_tokens=data["usage"]["input_tokens"],
+                output_tokens=data["usage"]["output_tokens"],
+                total_tokens=data["usage"]["input_tokens"] + data["usage"]["output_tokens"]
             )
+
+        return GenerationResponse(
+            content=content,
+            usage=usage,
+            model_used=data.get("model", request.model_id),
+            finish_reason=finish_reason,
+            provider_specific_response=data
+        )
+
+    async def stream(self, request: GenerationRequest, api_key: str) -> AsyncIterator[GenerationChunk]:
+        headers = self._build_headers(api_key)
+        payload = self._build_payload(request)
+        payload["stream"] = True
+
+        async with self.client.stream("POST", self.URL, json=payload, headers=headers) as response:
+            if response.is_error:
+                await response.aread()
             response.raise_for_status()
-            data = response.json()
-            
-            content = data["content"][0]["text"]
-            finish_reason = data["stop_reason"]
-            
-            usage = None
-            if "usage" in data:
-                usage = GenerationUsage(
-                    input_tokens=data["usage"]["input_tokens"],
-                    output_tokens=data["usage"]["output_tokens"],
-                    total_tokens=data["usage"]["input_tokens"] + data["usage"]["output_tokens"]
-                )
-                
-            return GenerationResponse(
-                content=content,
-                usage=usage,
-                model_used=data.get("model", request.model_id),
-                finish_reason=finish_reason,
-                provider_specific_response=data
-            )
+
+            # Anthropic splits usage: input tokens arrive in message_start,
+            # output tokens in the final message_delta.
+            model_used = request.model_id
+            input_tokens = 0
+            async for event in iter_sse_data(response):
+                event_type = event.get("type")
+                if event_type == "message_start":
+                    message = event.get("message", {})
+                    model_used = message.get("model", model_used)
+                    input_tokens = message.get("usage", {}).get("input_tokens", 0)
+                elif event_type == "content_block_delta":
+                    text = event.get("delta", {}).get("text")
+                    if text:
+                        yield GenerationChunk(delta=text, model_used=model_used)
+                elif event_type == "message_delta":
+                    output_tokens = event.get("usage", {}).get("output_tokens", 0)
+                    yield GenerationChunk(
+                        model_used=model_used,
+                        finish_reason=event.get("delta", {}).get("stop_reason"),
+                        usage=GenerationUsage(
+                            input_tokens=input_tokens,
+                            output_tokens=output_tokens,
+                            total_tokens=input_tokens + output_tokens
+                        )
+                    )
+                elif event_type == "error":
+                    raise ValueError(f"Anthropic stream error: {event.get('error', {}).get('message')}")
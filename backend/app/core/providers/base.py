@@ -1,7 +1,26 @@
+import json
 from abc import ABC, abstractmethod
-from app.schemas.llm import GenerationRequest, GenerationResponse
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+import httpx
+from app.schemas.llm import GenerationRequest, GenerationResponse, GenerationChunk
 
 class BaseProvider(ABC):
+    def __init__(self, client_factory: Optional[Callable[[], httpx.AsyncClient]] = None):
+        """
+        Args:
+            client_factory: Returns the shared, pooled HTTP client to use.
+                ProviderManager injects its own pool; standalone providers get a private one.
+        """
+        if client_factory is None:
+            from app.core.providers.http import ProviderClientPool
+            pool = ProviderClientPool()
+            client_factory = lambda: pool.get(self.name)
+        self._client_factory = client_factory
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        return self._client_factory()
+
     @property
     @abstractmethod
     def name(self) -> str:
@@ -15,3 +34,27 @@ class BaseProvider(ABC):
         Must handle its own HTTP calls and response normalization.
         """
         pass
+
+    @abstractmethod
+    def stream(self, request: GenerationRequest, api_key: str) -> AsyncIterator[GenerationChunk]:
+        """
+        Execute a generation request in the provider's native streaming mode.
+        Yields unified GenerationChunk objects as soon as they arrive.
+        """
+        pass
+
+async def iter_sse_data(response: httpx.Response) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Parse a server-sent-events body and yield the JSON payload of every `data:` line.
+    The OpenAI `[DONE]` sentinel and non-JSON keep-alives are skipped.
+    """
+    async for line in response.aiter_lines():
+        if not line.startswith("data:"):
+            continue
+        data = line[len("data:"):].strip()
+        if not data or data == "[DONE]":
+            continue
+        try:
+            yield json.loads(data)
+        except json.JSONDecodeError:
+            continue
@@ -1,27 +1,24 @@
 import httpx
-from app.core.providers.base import BaseProvider
-from app.schemas.llm import GenerationRequest, GenerationResponse, GenerationUsage, MessageRole
+from typing import AsyncIterator
+from app.core.providers.base import BaseProvider, iter_sse_data
+from app.schemas.llm import GenerationRequest, GenerationResponse, GenerationUsage, GenerationChunk, MessageRole
 
 class GoogleProvider(BaseProvider):
+    BASE_URL = "https://generativelanguage.googleapis.com/v1beta/models"
+
     @property
     def name(self) -> str:
         return "google"
 
-    async def generate(self, request: GenerationRequest, api_key: str) -> GenerationResponse:
-        # Google Gemini API REST
-        # https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent?key={api_key}
-        
-        url = f"https://generativelanguage.googleapis.com/v1beta/models/{request.model_id}:generateContent?key={api_key}"
-        headers = {"Content-Type": "application/json"}
-        
+    def _build_payload(self, request: GenerationRequest) -> dict:
         # Format messages for Gemini
         # Gemini expects: contents: [{ role: "user"|"model", parts: [{ text: "..." }] }]
         # System instructions are separate in v1beta but simpler to put in prompt for basic support or use system instruction field.
         # Mapping: user -> user, assistant -> model, system -> system_instruction (if supported) or prepend to user.
-        
+
         contents = []
         system_instruction = None
-        
+
         for m in request.messages:
             if m.role == MessageRole.SYSTEM:
                 # v1beta supports system_instruction
@@ -30,7 +27,7 @@ class GoogleProvider(BaseProvider):
                  contents.append({"role": "user", "parts": [{"text": m.content}]})
             elif m.role == MessageRole.ASSISTANT:
                  contents.append({"role": "model", "parts": [{"text": m.content}]})
-                 
+
         payload = {
             "contents": contents,
             "generationConfig": {
@@ -43,39 +40,76 @@ class GoogleProvider(BaseProvider):
             payload["systemInstruction"] = system_instruction
         if request.stop_sequences:
             payload["generationConfig"]["stopSequences"] = request.stop_sequences
+        return payload
+
+    def _parse_usage(self, data: dict):
+        if "usageMetadata" not in data:
+            return None
+        return GenerationUsage(
+            input_tokens=data["usageMetadata"].get("promptTokenCount", 0),
+            output_tokens=data["usageMetadata"].get("candidatesTokenCount", 0),
+            total_tokens=data["usageMetadata"].get("totalTokenCount", 0)
+        )
 
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                url,
-                json=payload,
-                headers=headers,
-                timeout=60.0
-            )
+    async def generate(self, request: GenerationRequest, api_key: str) -> GenerationResponse:
+        # Google Gemini API REST
+        # https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent?key={api_key}
+
+        url = f"{self.BASE_URL}/{request.model_id}:generateContent?key={api_key}"
+        headers = {"Content-Type": "application/json"}
+        payload = self._build_payload(request)
+
+        response = await self.client.post(
+            url,
+            json=payload,
+            headers=headers
+        )
+        response.raise_for_status()
+        data = response.json()
+
+        # Extract content
+        try:
+            candidate = data["candidates"][0]
+            content = candidate["content"]["parts"][0]["text"]
+            finish_reason = candidate.get("finishReason")
+        except (KeyError, IndexError):
+            # Handle safety blocks or empty responses
+            content = ""
+            finish_reason = "error_or_safety"
+
+        return GenerationResponse(
+            content=content,
+            usage=self._parse_usage(data),
+            model_used=request.model_id, # Google doesn't always echo back specific version in same field
+            finish_reason=finish_reason,
+            provider_specific_response=data
+        )
+
+    async def stream(self, request: GenerationRequest, api_key: str) -> AsyncIterator[GenerationChunk]:
+        # alt=sse switches streamGenerateContent from a JSON array to server-sent events
+        url = f"{self.BASE_URL}/{request.model_id}:streamGenerateContent?alt=sse&key={api_key}"
+        headers = {"Content-Type": "application/json"}
+        payload = self._build_payload(request)
+
+        async with self.client.stream("POST", url, json=payload, headers=headers) as response:
+            if response.is_error:
+                await response.aread()
             response.raise_for_status()
-            data = response.json()
-            
-            # Extract content
-            try:
-                candidate = data["candidates"][0]
-                content = candidate["content"]["parts"][0]["text"]
-                finish_reason = candidate.get("finishReason")
-            except (KeyError, IndexError):
-                # Handle safety blocks or empty responses
-                content = ""
-                finish_reason = "error_or_safety"
-
-            usage = None
-            if "usageMetadata" in data:
-                usage = GenerationUsage(
-                    input_tokens=data["usageMetadata"].get("promptTokenCount", 0),
-                    output_tokens=data["usageMetadata"].get("candidatesTokenCount", 0),
-                    total_tokens=data["usageMetadata"].get("totalTokenCount", 0)
-                )
 
-            return GenerationResponse(
-                content=content,
-                usage=usage,
-                model_used=request.model_id, # Google doesn't always echo back specific version in same field
-                finish_reason=finish_reason,
-                provider_specific_response=data
-            )
+            async for data in iter_sse_data(response):
+                text = ""
+                finish_reason = None
+                candidates = data.get("candidates") or []
+                if candidates:
+                    candidate = candidates[0]
+                    parts = candidate.get("content", {}).get("parts") or []
+                    text = "".join(p.get("text", "") for p in parts)
+                    finish_reason = candidate.get("finishReason")
+
+                # usageMetadata is cumulative, the last event carries the final counts
+                yield GenerationChunk(
+                    delta=text,
+                    model_used=request.model_id,
+                    finish_reason=finish_reason,
+                    usage=self._parse_usage(data)
+                )
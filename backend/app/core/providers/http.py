@@ -0,0 +1,152 @@
+import asyncio
+import importlib.util
+import logging
+from typing import Any, Dict, Optional
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+def _http2_available() -> bool:
+    # httpx only speaks HTTP/2 when the optional `h2` package is installed
+    return importlib.util.find_spec("h2") is not None
+
+class InstrumentedTransport(httpx.AsyncBaseTransport):
+    """
+    Wraps httpx's default transport to collect pool-usage metrics:
+    requests sent, requests in flight, and how many new TCP connections were opened.
+    """
+    def __init__(self, transport: httpx.AsyncHTTPTransport):
+        self._transport = transport
+        self.requests_total = 0
+        self.errors_total = 0
+        self.in_flight = 0
+        self.connections_opened = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        upstream_trace = request.extensions.get("trace")
+
+        async def trace(event_name: str, info: Dict[str, Any]) -> None:
+            if event_name == "connection.connect_tcp.complete":
+                self.connections_opened += 1
+            if upstream_trace is not None:
+                await upstream_trace(event_name, info)
+
+        request.extensions["trace"] = trace
+        self.requests_total += 1
+        self.in_flight += 1
+        try:
+            return await self._transport.handle_async_request(request)
+        except Exception:
+            self.errors_total += 1
+            raise
+        finally:
+            self.in_flight -= 1
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        connections = getattr(getattr(self._transport, "_pool", None), "connections", [])
+        idle = sum(1 for c in connections if c.is_idle())
+        reuse_ratio = 1 - (self.connections_opened / self.requests_total) if self.requests_total else 0
+        return {
+            "requests_total": self.requests_total,
+            "errors_total": self.errors_total,
+            "in_flight": self.in_flight,
+            "connections_opened": self.connections_opened,
+            "connection_reuse_ratio": round(max(reuse_ratio, 0), 4),
+            "open_connections": len(connections),
+            "idle_connections": idle,
+            "active_connections": len(connections) - idle,
+        }
+
+class ProviderClientPool:
+    """
+    Owns one long-lived httpx.AsyncClient per provider so TCP+TLS connections
+    are kept alive and reused across requests.
+    """
+    def __init__(
+        self,
+        *,
+        http2: Optional[bool] = None,
+        max_connections: Optional[int] = None,
+        max_keepalive_connections: Optional[int] = None,
+        keepalive_expiry: Optional[float] = None,
+        connect_timeout: Optional[float] = None,
+        read_timeout: Optional[float] = None,
+        write_timeout: Optional[float] = None,
+        pool_timeout: Optional[float] = None,
+        verify: bool = True,
+    ):
+        if http2 is None:
+            http2 = settings.PROVIDER_HTTP2
+        if http2 and not _http2_available():
+            logger.warning("HTTP/2 requested for provider clients but 'h2' is not installed, using HTTP/1.1")
+            http2 = False
+        self.http2 = http2
+        self.verify = verify
+        self.limits = httpx.Limits(
+            max_connections=max_connections or settings.PROVIDER_MAX_CONNECTIONS,
+            max_keepalive_connections=max_keepalive_connections or settings.PROVIDER_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=keepalive_expiry or settings.PROVIDER_KEEPALIVE_EXPIRY,
+        )
+        self.timeout = httpx.Timeout(
+            connect=connect_timeout or settings.PROVIDER_CONNECT_TIMEOUT,
+            read=read_timeout or settings.PROVIDER_READ_TIMEOUT,
+            write=write_timeout or settings.PROVIDER_WRITE_TIMEOUT,
+            pool=pool_timeout or settings.PROVIDER_POOL_TIMEOUT,
+        )
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._transports: Dict[str, InstrumentedTransport] = {}
+        self._loops: Dict[str, asyncio.AbstractEventLoop] = {}
+
+    def _build_client(self, name: str) -> httpx.AsyncClient:
+        transport = InstrumentedTransport(
+            httpx.AsyncHTTPTransport(http2=self.http2, limits=self.limits, verify=self.verify)
+        )
+        self._transports[name] = transport
+        return httpx.AsyncClient(transport=transport, timeout=self.timeout)
+
+    def get(self, name: str) -> httpx.AsyncClient:
+        """
+        Return the shared client for a provider, creating it on first use.
+        Connections cannot be shared across event loops, so a client created
+        on another (e.g. closed) loop is replaced.
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+
+        client = self._clients.get(name)
+        if client is None or client.is_closed or (loop is not None and self._loops.get(name) not in (None, loop)):
+            client = self._build_client(name)
+            self._clients[name] = client
+            self._loops[name] = loop
+        elif self._loops.get(name) is None:
+            self._loops[name] = loop
+        return client
+
+    async def aclose(self) -> None:
+        for name, client in list(self._clients.items()):
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.error(f"Error closing HTTP client for {name}: {e}")
+        self._clients.clear()
+        self._loops.clear()
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            name: {
+                "http2": self.http2,
+                "max_connections": self.limits.max_connections,
+                "max_keepalive_connections": self.limits.max_keepalive_connections,
+                **transport.metrics,
+            }
+            for name, transport in self._transports.items()
+        }
@@ -1,6 +1,5 @@
-from typing import Dict, Any, Optional
-from sqlalchemy.orm import Session
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+from typing import AsyncIterator, Dict, Any, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
 import httpx
 import logging
 
@@ -8,20 +7,40 @@ from app.core.providers.base import BaseProvider
 from app.core.providers.openai import OpenAIProvider
 from app.core.providers.anthropic import AnthropicProvider
 from app.core.providers.google import GoogleProvider
-from app.schemas.llm import GenerationRequest, GenerationResponse
-from app import crud
+from app.core.providers.http import ProviderClientPool
+from app.schemas.llm import GenerationRequest, GenerationResponse, GenerationChunk
+from app.core.cache.user_context import user_context_cache
 from app.core.registry import model_registry
 
 logger = logging.getLogger(__name__)
 
 class ProviderManager:
     def __init__(self):
+        # One long-lived pooled HTTP client per provider (keep-alive, HTTP/2)
+        self.http = ProviderClientPool()
         self._providers: Dict[str, BaseProvider] = {
-            "openai": OpenAIProvider(),
-            "anthropic": AnthropicProvider(),
-            "google": GoogleProvider(),
+            "openai": OpenAIProvider(client_factory=lambda: self.http.get("openai")),
+            "anthropic": AnthropicProvider(client_factory=lambda: self.http.get("anthropic")),
+            "google": GoogleProvider(client_factory=lambda: self.http.get("google")),
         }
 
+    async def startup(self) -> None:
+        """Create the shared HTTP clients so the first requests don't pay for it."""
+        for name in self._providers:
+            self.http.get(name)
+        logger.info(f"Provider HTTP clients ready (http2={self.http.http2})")
+
+    async def shutdown(self) -> None:
+        """Close the shared HTTP clients and their pooled connections."""
+        await self.http.aclose()
+
+    def get_client(self, provider_name: str) -> httpx.AsyncClient:
+        return self.get_provider(provider_name).client
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        return self.http.metrics
+
     def get_provider(self, provider_name: str) -> BaseProvider:
         if provider_name not in self._providers:
             raise ValueError(f"Provider {provider_name} not supported.")
@@ -42,26 +61,17 @@ class ProviderManager:
             return "google"
         raise ValueError(f"Unknown provider for model {model_id}")
 
-    @retry(
-        retry=retry_if_exception_type((httpx.ConnectError, httpx.ReadTimeout, httpx.ConnectTimeout, httpx.HTTPStatusError)),
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=10),
-        reraise=True
-    )
-    async def execute_request(self, db: Session, request: GenerationRequest, user_id: str) -> GenerationResponse:
+    async def execute_request(self, db: AsyncSession, request: GenerationRequest, user_id: str) -> GenerationResponse:
         """
-        Executes a generation request with automatic retries and key retrieval.
+        Executes a single generation attempt with key retrieval.
+        Retries happen one level up, by failing over to the next model (see router.failover).
         """
         # 1. Determine provider
         provider_name = self._resolve_provider_name(request.model_id)
         provider = self.get_provider(provider_name)
         
         # 2. Retrieve API Key
-        # We need the decrypted key.
-        api_key = crud.provider_key.get_decrypted_provider_key(db, user_id=user_id, provider=provider_name)
-        
-        if not api_key:
-            raise ValueError(f"No API key found for provider {provider_name}. Please configure it in settings.")
+        api_key = await self._get_api_key(db, provider_name, user_id)
 
         # 3. Execute
         try:
@@ -72,7 +82,32 @@ class ProviderManager:
             # If 401/403 -> Authentication error, don't retry, raise immediately
             if e.response.status_code in [401, 403]:
                 raise ValueError(f"Invalid API key for {provider_name}.")
-            raise # Let tenacity handle 429/5xx
+            raise # 429/5xx are retryable, the failover executor moves to the next model
+
+    async def stream_request(self, db: AsyncSession, request: GenerationRequest, user_id: str) -> AsyncIterator[GenerationChunk]:
+        """
+        Executes a generation request in streaming mode.
+        No retries here: once chunks have been forwarded to the client the request cannot be replayed.
+        """
+        provider_name = self._resolve_provider_name(request.model_id)
+        provider = self.get_provider(provider_name)
+        api_key = await self._get_api_key(db, provider_name, user_id)
+
+        try:
+            async for chunk in provider.stream(request, api_key):
+                yield chunk
+        except httpx.HTTPStatusError as e:
+            logger.error(f"Provider {provider_name} stream error: {e.response.text}")
+            if e.response.status_code in [401, 403]:
+                raise ValueError(f"Invalid API key for {provider_name}.")
+            raise
+
+    async def _get_api_key(self, db: AsyncSession, provider_name: str, user_id: str) -> str:
+        # We need the decrypted key, served from the per-user context cache.
+        api_key = await user_context_cache.get_api_key(db, user_id, provider_name)
+        if not api_key:
+            raise ValueError(f"No API key found for provider {provider_name}. Please configure it in settings.")
+        return api_key
 
 # Global instance
 provider_manager = ProviderManager()
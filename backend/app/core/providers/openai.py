@@ -1,21 +1,25 @@
 import httpx
-from app.core.providers.base import BaseProvider
-from app.schemas.llm import GenerationRequest, GenerationResponse, GenerationUsage
+from typing import AsyncIterator
+from app.core.providers.base import BaseProvider, iter_sse_data
+from app.schemas.llm import GenerationRequest, GenerationResponse, GenerationUsage, GenerationChunk
 
 class OpenAIProvider(BaseProvider):
+    URL = "https://api.openai.com/v1/chat/completions"
+
     @property
     def name(self) -> str:
         return "openai"
 
-    async def generate(self, request: GenerationRequest, api_key: str) -> GenerationResponse:
-        headers = {
+    def _build_headers(self, api_key: str) -> dict:
+        return {
             "Authorization": f"Bearer {api_key}",
             "Content-Type": "application/json"
         }
-        
+
+    def _build_payload(self, request: GenerationRequest) -> dict:
         # Convert schemas.Message to dicts
         messages = [{"role": m.role.value, "content": m.content} for m in request.messages]
-        
+
         payload = {
             "model": request.model_id, # This is the original_model_id from registry essentially
             "messages": messages,
@@ -26,34 +30,72 @@ class OpenAIProvider(BaseProvider):
             payload["max_tokens"] = request.max_tokens
         if request.stop_sequences:
             payload["stop"] = request.stop_sequences
+        return payload
+
+    async def generate(self, request: GenerationRequest, api_key: str) -> GenerationResponse:
+        headers = self._build_headers(api_key)
+        payload = self._build_payload(request)
+
+        response = await self.client.post(
+            self.URL,
+            json=payload,
+            headers=headers
+        )
+        response.raise_for_status()
+        data = response.json()
 
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://api.openai.com/v1/chat/completions",
-                json=payload,
-                headers=headers,
-                timeout=60.0
+        # Normalize response
+        choice = data["choices"][0]
+        content = choice["message"]["content"]
+        finish_reason = choice["finish_reason"]
+
+        usage = None
+        if "usage" in data:
+            usage = GenerationUsage(
+                input_tokens=data["usage"]["prompt_tokens"],
+                output_tokens=data["usage"]["completion_tokens"],
+                total_tokens=data["usage"]["total_tokens"]
             )
+
+        return GenerationResponse(
+            content=content,
+            usage=usage,
+            model_used=data.get("model", request.model_id),
+            finish_reason=finish_reason,
+            provider_specific_response=data
+        )
+
+    async def stream(self, request: GenerationRequest, api_key: str) -> AsyncIterator[GenerationChunk]:
+        headers = self._build_headers(api_key)
+        payload = self._build_payload(request)
+        payload["stream"] = True
+        # Ask for a final usage-only chunk so we can log real token counts
+        payload["stream_options"] = {"include_usage": True}
+
+        async with self.client.stream("POST", self.URL, json=payload, headers=headers) as response:
+            if response.is_error:
+                await response.aread()
             response.raise_for_status()
-            data = response.json()
-            
-            # Normalize response
-            choice = data["choices"][0]
-            content = choice["message"]["content"]
-            finish_reason = choice["finish_reason"]
-            
-            usage = None
-            if "usage" in data:
-                usage = GenerationUsage(
-                    input_tokens=data["usage"]["prompt_tokens"],
-                    output_tokens=data["usage"]["completion_tokens"],
-                    total_tokens=data["usage"]["total_tokens"]
-                )
-                
-            return GenerationResponse(
-                content=content,
-                usage=usage,
-                model_used=data.get("model", request.model_id),
-                finish_reason=finish_reason,
-                provider_specific_response=data
-            )
+
+            async for data in iter_sse_data(response):
+                model_used = data.get("model", request.model_id)
+                usage = None
+                if data.get("usage"):
+                    usage = GenerationUsage(
+                        input_tokens=data["usage"]["prompt_tokens"],
+                        output_tokens=data["usage"]["completion_tokens"],
+                        total_tokens=data["usage"]["total_tokens"]
+                    )
+
+                choices = data.get("choices") or []
+                if choices:
+                    choice = choices[0]
+                    yield GenerationChunk(
+                        delta=(choice.get("delta") or {}).get("content") or "",
+                        model_used=model_used,
+                        finish_reason=choice.get("finish_reason"),
+                        usage=usage
+                    )
+                elif usage:
+                    # Final usage-only chunk (empty choices)
+                    yield GenerationChunk(model_used=model_used, usage=usage)
@@ -0,0 +1,181 @@
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+from jose import jwt
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.revoked_token import RevokedToken
+
+logger = logging.getLogger(__name__)
+
+def _claims(token: str) -> Dict[str, Any]:
+    # Only used on tokens that were already verified, or on stored rows to read `exp`
+    try:
+        return jwt.get_unverified_claims(token)
+    except jwt.JWTError:
+        return {}
+
+def _legacy_key(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+class RevocationStore:
+    """
+    In-memory view of the revoked_tokens table, so checking a token costs a set
+    lookup instead of a DB round trip.
+
+    Tokens are identified by their `jti` claim. Tokens issued before `jti`
+    existed are matched by a hash of the full token string. Each entry keeps
+    its `exp` so expired revocations can be dropped from memory and purged from
+    the DB; an expired token is rejected by signature validation anyway.
+
+    The DB stays the source of truth: the store is loaded lazily on first use.
+    A background task reads the rows revoked since its last read every few
+    seconds, which picks up logouts handled by other workers, and periodically
+    purges expired rows and reloads the whole set.
+    """
+    # Rows are read back from this far before the newest revoked_at seen, so a
+    # logout committed late by another worker (or a skewed clock) is not missed
+    SYNC_OVERLAP = timedelta(seconds=60)
+
+    def __init__(
+        self,
+        session_factory: Callable = AsyncSessionLocal,
+        sync_interval_seconds: Optional[int] = None,
+        purge_interval_seconds: Optional[int] = None,
+    ):
+        self._session_factory = session_factory
+        self.sync_interval = sync_interval_seconds or settings.REVOCATION_SYNC_INTERVAL_SECONDS
+        self.purge_interval = purge_interval_seconds or settings.REVOCATION_PURGE_INTERVAL_SECONDS
+        self._revoked: Dict[str, float] = {}  # jti or legacy token hash -> exp
+        # logout is a sync endpoint, so revoke() runs on a threadpool thread
+        # while the sync tasks update the set on the event loop
+        self._lock = threading.Lock()
+        self._newest: Optional[datetime] = None  # newest revoked_at read from the DB
+        self._loaded = False
+        self._load_lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @staticmethod
+    def key_for(token: str, claims: Dict[str, Any]) -> str:
+        return claims.get("jti") or _legacy_key(token)
+
+    async def is_revoked(self, token: str, claims: Dict[str, Any]) -> bool:
+        await self._ensure_loaded()
+        return self.key_for(token, claims) in self._revoked
+
+    def revoke(self, db: Session, token: str) -> None:
+        """
+        Persist a revocation and make it visible to this worker immediately.
+        """
+        claims = _claims(token)
+        key = self.key_for(token, claims)
+        exists = db.query(RevokedToken.id).filter(RevokedToken.token == token).first()
+        if not exists:
+            db.add(RevokedToken(id=claims.get("jti") or str(uuid.uuid4()), token=token))
+            db.commit()
+        with self._lock:
+            self._revoked[key] = float(claims.get("exp", 0))
+
+    async def _ensure_loaded(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Locks are bound to their event loop
+            self._loop = loop
+            self._load_lock = asyncio.Lock()
+        if self._loaded:
+            return
+        async with self._load_lock:
+            if not self._loaded:
+                await self.sync()
+
+    async def sync(self) -> None:
+        """
+        Purge expired revocations from the DB and reload the in-memory set.
+        """
+        now = time.time()
+        revoked: Dict[str, float] = {}
+        expired_ids = []
+        newest = None
+        async with self._session_factory() as db:
+            result = await db.execute(select(RevokedToken.id, RevokedToken.token, RevokedToken.revoked_at))
+            for row_id, token, revoked_at in result.all():
+                if revoked_at is not None and (newest is None or revoked_at > newest):
+                    newest = revoked_at
+                claims = _claims(token)
+                exp = float(claims.get("exp", 0))
+                if exp and exp < now:
+                    expired_ids.append(row_id)
+                else:
+                    revoked[self.key_for(token, claims)] = exp
+            if expired_ids:
+                await db.execute(delete(RevokedToken).where(RevokedToken.id.in_(expired_ids)))
+                await db.commit()
+
+        # Revocations are never undone, so keep live entries added while we were reading
+        with self._lock:
+            for key, exp in self._revoked.items():
+                if key not in revoked and not (exp and exp < now):
+                    revoked[key] = exp
+            self._revoked = revoked
+        self._newest = newest
+        self._loaded = True
+        if expired_ids:
+            logger.info(f"Purged {len(expired_ids)} expired revoked tokens")
+
+    async def sync_recent(self) -> None:
+        """
+        Add the revocations written since the last read (by any worker) to the store.
+        """
+        query = select(RevokedToken.token, RevokedToken.revoked_at)
+        if self._newest is not None:
+            query = query.where(RevokedToken.revoked_at >= self._newest - self.SYNC_OVERLAP)
+        async with self._session_factory() as db:
+            result = await db.execute(query)
+            rows = result.all()
+        for token, revoked_at in rows:
+            claims = _claims(token)
+            with self._lock:
+                self._revoked[self.key_for(token, claims)] = float(claims.get("exp", 0))
+            if revoked_at is not None and (self._newest is None or revoked_at > self._newest):
+                self._newest = revoked_at
+
+    def start(self) -> None:
+        """Start the periodic sync/purge task on the running event loop."""
+        if self._task is not None and not self._task.done():
+            return
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        last_purge = None
+        while True:
+            try:
+                if last_purge is None or time.monotonic() - last_purge >= self.purge_interval:
+                    await self.sync()
+                    last_purge = time.monotonic()
+                else:
+                    await self.sync_recent()
+            except Exception as e:
+                logger.error(f"Revoked token sync failed: {str(e)}")
+            await asyncio.sleep(self.sync_interval)
+
+# Global instance
+revocation_store = RevocationStore()
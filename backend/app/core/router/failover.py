@@ -0,0 +1,169 @@
+import asyncio
+import logging
+import time
+from typing import AsyncIterator, List, Optional
+import httpx
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.providers.manager import provider_manager
+from app.core.registry import model_registry
+from app.core.router.latency import latency_tracker
+from app.schemas.llm import GenerationChunk, GenerationRequest, GenerationResponse
+from app.schemas.registry import ModelDefinition
+from app.schemas.router import FailoverAttempt, RoutingResult
+
+logger = logging.getLogger(__name__)
+
+def is_retryable(exc: BaseException) -> bool:
+    """
+    Errors worth trying on the next model: timeouts, connection failures,
+    rate limiting and provider-side 5xx. Auth and request errors are not.
+    """
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code == 429 or exc.response.status_code >= 500
+    return isinstance(exc, (httpx.TimeoutException, httpx.TransportError, asyncio.TimeoutError))
+
+def error_status_code(exc: BaseException) -> int:
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code
+    if isinstance(exc, (httpx.TimeoutException, asyncio.TimeoutError)):
+        return 504
+    if isinstance(exc, ValueError):
+        return 400
+    return 502
+
+class FailoverError(Exception):
+    """All candidate models failed, or the request deadline ran out."""
+    def __init__(self, message: str, attempts: List[FailoverAttempt], status_code: int):
+        super().__init__(message)
+        self.attempts = attempts
+        self.status_code = status_code
+
+class FailoverResult:
+    def __init__(
+        self,
+        model: ModelDefinition,
+        attempts: List[FailoverAttempt],
+        response: Optional[GenerationResponse] = None,
+        chunks: Optional[AsyncIterator[GenerationChunk]] = None,
+        first_chunk: Optional[GenerationChunk] = None,
+    ):
+        self.model = model
+        self.attempts = attempts
+        self.response = response
+        self.chunks = chunks
+        self.first_chunk = first_chunk
+
+    @property
+    def failed_attempts(self) -> List[FailoverAttempt]:
+        return [a for a in self.attempts if a.error is not None]
+
+class FailoverExecutor:
+    """
+    Runs a request against the selected model and, on retryable errors, moves
+    down RoutingResult.fallback_models (possibly to another provider) instead of
+    retrying the same model. A single deadline is shared by all attempts.
+    """
+    def __init__(self, max_attempts: Optional[int] = None, deadline_seconds: Optional[float] = None):
+        self.max_attempts = max_attempts or settings.FAILOVER_MAX_ATTEMPTS
+        self.deadline_seconds = deadline_seconds or settings.GATEWAY_REQUEST_DEADLINE_SECONDS
+
+    def candidates(self, routing_result: RoutingResult) -> List[ModelDefinition]:
+        model_ids = [routing_result.selected_model_id] + routing_result.fallback_models
+        models = [model_registry.get_model(model_id) for model_id in model_ids]
+        return [m for m in models if m is not None][:self.max_attempts]
+
+    def deadline_from(self, start_time: float) -> float:
+        return start_time + self.deadline_seconds
+
+    async def execute(
+        self,
+        db: AsyncSession,
+        request: GenerationRequest,
+        candidates: List[ModelDefinition],
+        user_id: str,
+        deadline: float,
+    ) -> FailoverResult:
+        async def attempt(model: ModelDefinition, timeout: float) -> FailoverResult:
+            exec_request = request.model_copy(update={"model_id": model.original_model_id})
+            response = await asyncio.wait_for(
+                provider_manager.execute_request(db, exec_request, user_id=user_id), timeout
+            )
+            return FailoverResult(model, [], response=response)
+
+        return await self._run(attempt, candidates, deadline)
+
+    async def open_stream(
+        self,
+        db: AsyncSession,
+        request: GenerationRequest,
+        candidates: List[ModelDefinition],
+        user_id: str,
+        deadline: float,
+    ) -> FailoverResult:
+        """
+        Failover for streaming requests: a model counts as failed if the stream
+        errors before its first chunk. Once a chunk is received the stream is
+        committed to that model, since it cannot be replayed elsewhere.
+        """
+        async def attempt(model: ModelDefinition, timeout: float) -> FailoverResult:
+            exec_request = request.model_copy(update={"model_id": model.original_model_id})
+            chunks = provider_manager.stream_request(db, exec_request, user_id=user_id)
+            try:
+                first_chunk = await asyncio.wait_for(anext(chunks), timeout)
+            except StopAsyncIteration:
+                first_chunk = None
+            except BaseException:
+                await chunks.aclose()
+                raise
+            return FailoverResult(model, [], chunks=chunks, first_chunk=first_chunk)
+
+        return await self._run(attempt, candidates, deadline)
+
+    async def _run(self, attempt, candidates: List[ModelDefinition], deadline: float) -> FailoverResult:
+        if not candidates:
+            raise ValueError("No models available that match requirements.")
+
+        attempts: List[FailoverAttempt] = []
+        last_error: Optional[BaseException] = None
+        for model in candidates:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            start = time.time()
+            try:
+                result = await attempt(model, remaining)
+            except Exception as e:
+                latency_ms = int((time.time() - start) * 1000)
+                attempts.append(FailoverAttempt(
+                    model_id=model.id,
+                    provider=model.provider,
+                    latency_ms=latency_ms,
+                    status_code=error_status_code(e),
+                    error=str(e) or type(e).__name__,
+                ))
+                if not is_retryable(e):
+                    # Business errors (e.g. invalid provider key) stay a 400, anything else from upstream is a 502
+                    raise FailoverError(str(e), attempts, 400 if isinstance(e, ValueError) else 502) from e
+                logger.warning(f"Model {model.id} failed after {latency_ms}ms ({attempts[-1].error}), failing over")
+                last_error = e
+                continue
+
+            latency_ms = int((time.time() - start) * 1000)
+            latency_tracker.record(model.id, latency_ms)
+            attempts.append(FailoverAttempt(
+                model_id=model.id,
+                provider=model.provider,
+                latency_ms=latency_ms,
+                status_code=200,
+            ))
+            result.attempts = attempts
+            return result
+
+        if last_error is None or deadline - time.time() <= 0:
+            raise FailoverError("Request deadline exceeded before a model responded.", attempts, 504)
+        raise FailoverError(f"All {len(attempts)} candidate models failed: {last_error}", attempts, 502)
+
+# Global instance
+failover_executor = FailoverExecutor()
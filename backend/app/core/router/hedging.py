@@ -0,0 +1,200 @@
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.core.providers.manager import provider_manager
+from app.core.router.failover import FailoverError, FailoverResult, error_status_code, is_retryable
+from app.core.router.latency import latency_tracker
+from app.schemas.llm import GenerationRequest
+from app.schemas.registry import ModelDefinition
+from app.schemas.router import FailoverAttempt
+
+logger = logging.getLogger(__name__)
+
+class HedgeBudget:
+    """
+    Caps the extra spend hedging may cause, per user and per rolling window.
+    """
+    def __init__(self, limit_usd: Optional[float] = None, window_seconds: Optional[int] = None):
+        self.limit_usd = limit_usd if limit_usd is not None else settings.HEDGE_BUDGET_USD
+        self.window_seconds = window_seconds or settings.HEDGE_BUDGET_WINDOW_SECONDS
+        self._spent: Dict[str, Tuple[float, float]] = {}  # user_id -> (window start, usd spent)
+
+    def try_spend(self, user_id: str, cost_usd: float) -> bool:
+        now = time.time()
+        window_start, spent = self._spent.get(user_id, (now, 0.0))
+        if now - window_start >= self.window_seconds:
+            window_start, spent = now, 0.0
+        if spent + cost_usd > self.limit_usd:
+            return False
+        self._spent[user_id] = (window_start, spent + cost_usd)
+        return True
+
+    def spent(self, user_id: str) -> float:
+        window_start, spent = self._spent.get(user_id, (0.0, 0.0))
+        return spent if time.time() - window_start < self.window_seconds else 0.0
+
+class HedgedExecutor:
+    """
+    Opt-in tail-latency mode. Sends the request to the selected model and, if it
+    has not answered within a percentile of that model's observed latency, also
+    sends it to the next-best candidate. The first success wins and the other
+    request is cancelled. Errors fail over down the candidate list like
+    FailoverExecutor, under the same shared deadline.
+
+    An AsyncSession must not be used by two tasks at once, so the hedge (sent
+    while the primary is still in flight) runs on its own session.
+    """
+    def __init__(
+        self,
+        percentile: Optional[float] = None,
+        min_samples: Optional[int] = None,
+        default_delay_ms: Optional[int] = None,
+        budget: Optional[HedgeBudget] = None,
+        session_factory: Callable = AsyncSessionLocal,
+    ):
+        self.percentile = percentile or settings.HEDGE_PERCENTILE
+        self.min_samples = min_samples or settings.HEDGE_MIN_SAMPLES
+        self.default_delay_ms = default_delay_ms or settings.HEDGE_DEFAULT_DELAY_MS
+        self.budget = budget or HedgeBudget()
+        self._session_factory = session_factory
+
+        # Metrics
+        self._requests = 0
+        self._fired = 0
+        self._hedge_wins = 0
+        self._budget_denied = 0
+
+    def hedge_delay(self, model_id: str) -> float:
+        """Seconds to wait for the primary before firing the hedge."""
+        observed = latency_tracker.percentile(model_id, self.percentile, min_samples=self.min_samples)
+        return (observed if observed is not None else self.default_delay_ms) / 1000
+
+    @staticmethod
+    def estimate_cost(model: ModelDefinition, input_tokens: int, max_tokens: Optional[int]) -> float:
+        output_tokens = max_tokens or 1024
+        return (input_tokens / 1000) * model.cost_per_1k_input + (output_tokens / 1000) * model.cost_per_1k_output
+
+    async def _execute_own_session(self, request: GenerationRequest, user_id: str):
+        async with self._session_factory() as db:
+            return await provider_manager.execute_request(db, request, user_id=user_id)
+
+    async def execute(
+        self,
+        db: AsyncSession,
+        request: GenerationRequest,
+        candidates: List[ModelDefinition],
+        user_id: str,
+        deadline: float,
+        input_tokens: int = 0,
+    ) -> FailoverResult:
+        if not candidates:
+            raise ValueError("No models available that match requirements.")
+
+        self._requests += 1
+        queue = list(candidates)
+        pending: Dict[asyncio.Task, Tuple[ModelDefinition, float]] = {}
+        attempts: List[FailoverAttempt] = []
+        last_error: Optional[BaseException] = None
+        hedge_task: Optional[asyncio.Task] = None
+        hedge_fired = False
+
+        def launch(model: ModelDefinition) -> asyncio.Task:
+            exec_request = request.model_copy(update={"model_id": model.original_model_id})
+            if pending:
+                coro = self._execute_own_session(exec_request, user_id)
+            else:
+                coro = provider_manager.execute_request(db, exec_request, user_id=user_id)
+            task = asyncio.create_task(coro)
+            pending[task] = (model, time.time())
+            return task
+
+        primary = queue.pop(0)
+        launch(primary)
+        hedge_at = time.time() + self.hedge_delay(primary.id)
+
+        try:
+            while pending:
+                now = time.time()
+                if now >= deadline:
+                    break
+                timeout = deadline - now
+                if not hedge_fired and queue:
+                    timeout = min(timeout, max(hedge_at - now, 0))
+
+                done, _ = await asyncio.wait(pending.keys(), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    if not hedge_fired and queue and time.time() >= hedge_at:
+                        hedge_fired = True
+                        backup = queue[0]
+                        if self.budget.try_spend(user_id, self.estimate_cost(backup, input_tokens, request.max_tokens)):
+                            queue.pop(0)
+                            hedge_task = launch(backup)
+                            self._fired += 1
+                            logger.info(f"Hedging {primary.id} with {backup.id} after {self.hedge_delay(primary.id) * 1000:.0f}ms")
+                        else:
+                            self._budget_denied += 1
+                            logger.info(f"Hedge budget exhausted for user {user_id}, not hedging {primary.id}")
+                    continue
+
+                for task in done:
+                    model, started = pending.pop(task)
+                    latency_ms = int((time.time() - started) * 1000)
+                    error = task.exception()
+                    if error is None:
+                        latency_tracker.record(model.id, latency_ms)
+                        attempts.append(FailoverAttempt(
+                            model_id=model.id, provider=model.provider, latency_ms=latency_ms, status_code=200
+                        ))
+                        if task is hedge_task:
+                            self._hedge_wins += 1
+                            logger.info(f"Hedge {model.id} beat {primary.id} ({latency_ms}ms)")
+                        return FailoverResult(model, attempts, response=task.result())
+
+                    attempts.append(FailoverAttempt(
+                        model_id=model.id,
+                        provider=model.provider,
+                        latency_ms=latency_ms,
+                        status_code=error_status_code(error),
+                        error=str(error) or type(error).__name__,
+                    ))
+                    if not is_retryable(error):
+                        raise FailoverError(str(error), attempts, 400 if isinstance(error, ValueError) else 502) from error
+                    last_error = error
+
+                # Nothing left in flight: fail over to the next candidate
+                if not pending and queue:
+                    primary = queue.pop(0)
+                    launch(primary)
+                    hedge_at = time.time() + self.hedge_delay(primary.id)
+        finally:
+            # Cancel the losing (or timed-out) requests
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        if last_error is None or time.time() >= deadline:
+            raise FailoverError("Request deadline exceeded before a model responded.", attempts, 504)
+        raise FailoverError(f"All {len(attempts)} candidate models failed: {last_error}", attempts, 502)
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "hedged_requests": self._requests,
+            "hedges_fired": self._fired,
+            "hedge_wins": self._hedge_wins,
+            "budget_denied": self._budget_denied,
+            "fire_rate": (self._fired / self._requests) if self._requests else 0,
+            "win_rate": (self._hedge_wins / self._fired) if self._fired else 0,
+            "percentile": self.percentile,
+            "budget_usd": self.budget.limit_usd,
+        }
+
+# Global instance
+hedged_executor = HedgedExecutor()
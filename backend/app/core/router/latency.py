@@ -0,0 +1,37 @@
+import math
+from collections import deque
+from typing import Deque, Dict, Optional
+
+from app.core.config import settings
+
+class LatencyTracker:
+    """
+    Sliding window of successful response latencies per model, used to pick
+    hedging thresholds from each model's observed percentiles.
+    """
+    def __init__(self, window: Optional[int] = None):
+        self.window = window or settings.HEDGE_LATENCY_WINDOW
+        self._samples: Dict[str, Deque[int]] = {}
+
+    def record(self, model_id: str, latency_ms: int) -> None:
+        samples = self._samples.get(model_id)
+        if samples is None:
+            samples = self._samples[model_id] = deque(maxlen=self.window)
+        samples.append(latency_ms)
+
+    def percentile(self, model_id: str, percentile: float, min_samples: int = 1) -> Optional[float]:
+        """
+        Nearest-rank percentile of the model's recent latencies, or None without enough samples.
+        """
+        samples = self._samples.get(model_id)
+        if not samples or len(samples) < min_samples:
+            return None
+        ordered = sorted(samples)
+        rank = max(math.ceil(percentile / 100 * len(ordered)), 1)
+        return float(ordered[rank - 1])
+
+    def count(self, model_id: str) -> int:
+        return len(self._samples.get(model_id, ()))
+
+# Global instance
+latency_tracker = LatencyTracker()
@@ -1,10 +1,12 @@
 import logging
 import uuid
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Union
 from datetime import datetime, timezone
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.models.request_log import RequestLog
+from app.core.usage.writer import usage_writer
 from app.schemas.llm import GenerationUsage
 
 logger = logging.getLogger(__name__)
@@ -38,9 +40,8 @@ class UsageLogger:
         
         return round(input_cost + output_cost, 6)
 
-    async def log_request(
+    def build_entry(
         self,
-        db: Session,
         *,
         user_id: str,
         gateway_key_id: Optional[str] = None, # Make optional for internal testing if needed
@@ -55,36 +56,51 @@ class UsageLogger:
         cache_hit: bool = False
     ) -> RequestLog:
         """
-        Log a request to the database.
+        Build (but don't persist) the RequestLog row for a request.
+        """
+        cost = self.calculate_cost(model, usage)
+
+        # If gateway_key_id is missing (e.g. direct API usage), we might need a fallback or handle it
+        # For now assuming it's passed or we use a dummy if appropriate, 
+        # but model definition says nullable=False. 
+        # We will handle it in the caller or here.
+
+        return RequestLog(
+            user_id=user_id,
+            gateway_key_id=gateway_key_id if gateway_key_id else "direct-access", # Fallback or handle error
+            endpoint=endpoint,
+            provider=provider,
+            model=model,
+            complexity=complexity,
+            prompt_tokens=usage.input_tokens,
+            completion_tokens=usage.output_tokens,
+            total_tokens=usage.total_tokens,
+            cost_usd=cost,
+            latency_ms=latency_ms,
+            cache_hit=1 if cache_hit else 0,
+            status_code=status_code,
+            error_message=error_message
+        )
+
+    async def log_request(
+        self,
+        db: Union[Session, AsyncSession],
+        **kwargs: Any
+    ) -> RequestLog:
+        """
+        Log a request to the database synchronously (add + commit + refresh).
+        Prefer record_request on the request path.
         """
         try:
-            cost = self.calculate_cost(model, usage)
-            
-            # If gateway_key_id is missing (e.g. direct API usage), we might need a fallback or handle it
-            # For now assuming it's passed or we use a dummy if appropriate, 
-            # but model definition says nullable=False. 
-            # We will handle it in the caller or here.
-            
-            log_entry = RequestLog(
-                user_id=user_id,
-                gateway_key_id=gateway_key_id if gateway_key_id else "direct-access", # Fallback or handle error
-                endpoint=endpoint,
-                provider=provider,
-                model=model,
-                complexity=complexity,
-                prompt_tokens=usage.input_tokens,
-                completion_tokens=usage.output_tokens,
-                total_tokens=usage.total_tokens,
-                cost_usd=cost,
-                latency_ms=latency_ms,
-                cache_hit=1 if cache_hit else 0,
-                status_code=status_code,
-                error_message=error_message
-            )
+            log_entry = self.build_entry(**kwargs)
             
             db.add(log_entry)
-            db.commit()
-            db.refresh(log_entry)
+            if isinstance(db, AsyncSession):
+                await db.commit()
+                await db.refresh(log_entry)
+            else:
+                db.commit()
+                db.refresh(log_entry)
             
             return log_entry
             
@@ -93,4 +109,17 @@ class UsageLogger:
             # We don't want to fail the request if logging fails, just log the error
             return None
 
+    async def record_request(self, **kwargs: Any) -> Optional[RequestLog]:
+        """
+        Queue a request log for the write-behind writer; the row is bulk-inserted
+        in the background. Accepts the same keyword arguments as build_entry.
+        """
+        try:
+            log_entry = self.build_entry(**kwargs)
+            await usage_writer.enqueue(log_entry)
+            return log_entry
+        except Exception as e:
+            logger.error(f"Failed to queue request usage: {str(e)}")
+            return None
+
 usage_logger = UsageLogger()
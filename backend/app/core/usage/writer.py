@@ -0,0 +1,139 @@
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.request_log import RequestLog
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+class UsageWriter:
+    """
+    Write-behind writer for RequestLog rows.
+
+    The request path only enqueues; a single background task drains the queue
+    and bulk-inserts rows in batches, flushing when a batch is full or when the
+    flush interval elapses. A bounded queue applies backpressure to callers.
+    """
+    def __init__(
+        self,
+        session_factory: Callable = AsyncSessionLocal,
+        batch_size: Optional[int] = None,
+        flush_interval_ms: Optional[int] = None,
+        max_queue_size: Optional[int] = None,
+    ):
+        self._session_factory = session_factory
+        self.batch_size = batch_size or settings.USAGE_LOG_BATCH_SIZE
+        self.flush_interval = (flush_interval_ms or settings.USAGE_LOG_FLUSH_INTERVAL_MS) / 1000
+        self.max_queue_size = max_queue_size or settings.USAGE_LOG_QUEUE_SIZE
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        # Metrics
+        self._batches = 0
+        self._rows_written = 0
+        self._rows_failed = 0
+        self._last_batch_size = 0
+        self._last_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+        self._max_flush_ms = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start the background drain task on the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self.running and self._loop is loop:
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._task = loop.create_task(self._run())
+        logger.info(
+            f"Usage writer started (batch_size={self.batch_size}, "
+            f"flush_interval={self.flush_interval * 1000:.0f}ms, queue={self.max_queue_size})"
+        )
+
+    async def stop(self) -> None:
+        """Flush everything still queued and stop the background task."""
+        if not self.running:
+            return
+        await self._queue.put(_STOP)
+        await self._task
+        self._task = None
+        logger.info("Usage writer stopped")
+
+    async def enqueue(self, entry: RequestLog) -> None:
+        """
+        Queue a row for writing. Waits when the queue is full (backpressure).
+        Starts the writer lazily if the app lifespan did not (e.g. in tests).
+        """
+        if not self.running or self._loop is not asyncio.get_running_loop():
+            self.start()
+        await self._queue.put(entry)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is _STOP:
+                break
+            batch: List[RequestLog] = [item]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._flush(batch)
+
+    async def _flush(self, batch: List[RequestLog]) -> None:
+        start = time.perf_counter()
+        try:
+            async with self._session_factory() as db:
+                db.add_all(batch)
+                await db.commit()
+            self._rows_written += len(batch)
+        except Exception as e:
+            # Usage logging must never take the gateway down, drop the batch
+            self._rows_failed += len(batch)
+            logger.error(f"Failed to write usage batch of {len(batch)} rows: {str(e)}")
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self._batches += 1
+        self._last_batch_size = len(batch)
+        self._last_flush_ms = elapsed_ms
+        self._total_flush_ms += elapsed_ms
+        self._max_flush_ms = max(self._max_flush_ms, elapsed_ms)
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "queue_max_size": self.max_queue_size,
+            "batches_flushed": self._batches,
+            "rows_written": self._rows_written,
+            "rows_failed": self._rows_failed,
+            "last_batch_size": self._last_batch_size,
+            "avg_batch_size": round((self._rows_written + self._rows_failed) / self._batches, 2) if self._batches else 0,
+            "last_flush_ms": round(self._last_flush_ms, 2),
+            "avg_flush_ms": round(self._total_flush_ms / self._batches, 2) if self._batches else 0,
+            "max_flush_ms": round(self._max_flush_ms, 2),
+        }
+
+# Global instance
+usage_writer = UsageWriter()
@@ -1,3 +1,5 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.models.gateway_key import GatewayKey
 from app.schemas.gateway_key import GatewayKeyCreate
@@ -33,3 +35,24 @@ def remove_gateway_key(db: Session, key_id: str) -> Optional[GatewayKey]:
         db.delete(key)
         db.commit()
     return key
+
+# Async variants (gateway hot path)
+
+async def get_keys_by_user_async(db: AsyncSession, user_id: str) -> List[GatewayKey]:
+    result = await db.execute(select(GatewayKey).filter(GatewayKey.user_id == user_id))
+    return list(result.scalars().all())
+
+async def create_gateway_key_async(
+    db: AsyncSession, *, obj_in: GatewayKeyCreate, user_id: str, key_hash: str, prefix: str
+) -> GatewayKey:
+    db_obj = GatewayKey(
+        user_id=user_id,
+        key_hash=key_hash,
+        prefix=prefix,
+        name=obj_in.name,
+        rate_limit=obj_in.rate_limit,
+    )
+    db.add(db_obj)
+    await db.commit()
+    await db.refresh(db_obj)
+    return db_obj
@@ -1,3 +1,5 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.models.provider_key import ProviderKey
 from app.schemas.provider_key import ProviderKeyCreate
@@ -27,6 +29,7 @@ def get_decrypted_provider_key(db: Session, user_id: str, provider: str) -> Opti
     if db_obj:
         return key_vault.decrypt(db_obj.encrypted_key)
     return None
+
 def remove_provider_key(db: Session, *, user_id: str, provider_key_id: str) -> Optional[ProviderKey]:
     db_obj = db.query(ProviderKey).filter(
         ProviderKey.id == provider_key_id,
@@ -36,3 +39,21 @@ def remove_provider_key(db: Session, *, user_id: str, provider_key_id: str) -> O
         db.delete(db_obj)
         db.commit()
     return db_obj
+
+# Async variants (gateway hot path)
+
+async def get_provider_keys_by_user_async(db: AsyncSession, user_id: str) -> List[ProviderKey]:
+    result = await db.execute(select(ProviderKey).filter(ProviderKey.user_id == user_id))
+    return list(result.scalars().all())
+
+async def get_decrypted_provider_key_async(db: AsyncSession, user_id: str, provider: str) -> Optional[str]:
+    result = await db.execute(
+        select(ProviderKey).filter(
+            ProviderKey.user_id == user_id,
+            ProviderKey.provider == provider
+        ).limit(1)
+    )
+    db_obj = result.scalars().first()
+    if db_obj:
+        return key_vault.decrypt(db_obj.encrypted_key)
+    return None
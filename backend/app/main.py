@@ -1,3 +1,7 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from pathlib import Path
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
@@ -19,16 +23,60 @@ from app.core.errors import (
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException
 from sqlalchemy.exc import SQLAlchemyError
+from app.core.providers.manager import provider_manager
+from app.core.usage.writer import usage_writer
+from app.core.revocation import revocation_store
+from app.core.gateway_keys import gateway_key_index
+from app.core.cache.service import cache_manager
+from app.core.cache.snapshot import load_snapshot, save_snapshot
+from app.core.cache.warmup import acquire_warmup_lock, prompt_recorder
+from app.api.v1.endpoints.gateway import warm_up_cache
+from app.core.classifier.executor import tokenization_executor
+from app.core.classifier.tokenizer import token_counter
 
 # Setup logging
 
 # Setup logging
 setup_logging()
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup
+    await provider_manager.startup()
+    usage_writer.start()
+    revocation_store.start()
+    gateway_key_index.start()
+    if settings.CACHE_SNAPSHOT_PATH and Path(settings.CACHE_SNAPSHOT_PATH).exists():
+        try:
+            load_snapshot(settings.CACHE_SNAPSHOT_PATH, cache_manager, prompt_recorder)
+        except Exception:
+            logger.exception("Could not load the cache snapshot, starting with an empty cache")
+    warmup_lock = acquire_warmup_lock(settings.CACHE_WARMUP_LOCK_PATH) if settings.CACHE_WARMUP_TOP_N else None
+    if settings.CACHE_WARMUP_TOP_N and warmup_lock is None:
+        logger.info("Another worker is warming up the cache")
+    warmup_task = asyncio.create_task(warm_up_cache(settings.CACHE_WARMUP_TOP_N)) if warmup_lock is not None else None
+    yield
+    # Shutdown
+    if warmup_task is not None:
+        warmup_task.cancel()
+    if warmup_lock is not None:
+        warmup_lock.close()
+    if settings.CACHE_SNAPSHOT_PATH:
+        save_snapshot(settings.CACHE_SNAPSHOT_PATH, cache_manager, prompt_recorder)
+    await asyncio.to_thread(cache_manager.flush)
+    await gateway_key_index.stop()
+    await revocation_store.stop()
+    await usage_writer.stop()
+    await provider_manager.shutdown()
+    tokenization_executor.shutdown()
+    token_counter.shutdown()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version=settings.VERSION,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan
 )
 
 # Initialize rate limiter
@@ -32,3 +32,8 @@ class GatewayKeyInDBBase(GatewayKeyBase):
 
 class GatewayKey(GatewayKeyInDBBase):
     pass
+
+class GatewayCaller(BaseModel):
+    """Who is calling the gateway: a dashboard session (JWT) or a gw_ API key."""
+    user_id: str
+    gateway_key_id: Optional[str] = None  # None for JWT sessions
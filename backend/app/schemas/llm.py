@@ -20,6 +20,7 @@ class GenerationRequest(BaseModel):
     temperature: Optional[float] = 0.7
     top_p: Optional[float] = 1.0
     stop_sequences: Optional[List[str]] = None
+    stream: bool = False
 
 class GenerationUsage(BaseModel):
     input_tokens: int
@@ -32,3 +33,14 @@ class GenerationResponse(BaseModel):
     model_used: str
     finish_reason: Optional[str] = None
     provider_specific_response: Optional[Any] = Field(None, description="Raw response for debugging")
+
+class GenerationChunk(BaseModel):
+    """
+    Unified streaming chunk emitted by every provider.
+    `usage` and `finish_reason` are only set on the chunks that carry them
+    (usually the last ones of the stream).
+    """
+    delta: str = ""
+    model_used: str
+    finish_reason: Optional[str] = None
+    usage: Optional[GenerationUsage] = None
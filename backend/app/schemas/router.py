@@ -8,6 +8,10 @@ class RoutingStrategy(str, Enum):
     QUALITY = "quality"
     BALANCED = "balanced"
 
+class RoutingMode(str, Enum):
+    STANDARD = "standard"  # selected model, failover on errors
+    HEDGED = "hedged"  # also race the next-best model when the primary is slow
+
 class RoutingRequirements(BaseModel):
     input_tokens: int = Field(..., description="Estimated input tokens")
     max_output_tokens: Optional[int] = Field(None, description="Expected max output tokens")
@@ -20,3 +24,10 @@ class RoutingResult(BaseModel):
     fallback_models: List[str] = Field(default_factory=list)
     reasoning: str
     strategy_used: RoutingStrategy
+
+class FailoverAttempt(BaseModel):
+    model_id: str
+    provider: str
+    latency_ms: int
+    status_code: int
+    error: Optional[str] = None
@@ -0,0 +1,79 @@
+"""
+Benchmark: hit rate of the response cache eviction policies on a request-key trace.
+
+Replays a stream of cache keys through each policy the way CacheManager uses
+it (look up, store on miss) and reports the hit rate at several cache sizes.
+
+A trace is a text file with one key per line (e.g. the cache keys of recorded
+requests, in arrival order; blank lines and lines starting with # are ignored).
+Without --trace a synthetic trace is generated: a Zipf-distributed hot set of
+repeated prompts mixed with a long tail of one-off prompts.
+
+Usage (from backend/):
+    python -m benchmarks.bench_cache_policy --sizes 100 500 1000
+    python -m benchmarks.bench_cache_policy --trace keys.txt --sizes 1000
+"""
+import argparse
+import random
+import time
+from typing import Iterable, List
+
+from app.core.cache.service import CACHE_POLICIES
+
+def load_trace(path: str) -> List[str]:
+    with open(path) as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+def synthetic_trace(length: int, hot_keys: int, one_off_ratio: float, zipf_s: float, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    weights = [1 / (rank ** zipf_s) for rank in range(1, hot_keys + 1)]
+    hot = rng.choices(range(hot_keys), weights=weights, k=length)
+    trace = []
+    for i in range(length):
+        if rng.random() < one_off_ratio:
+            trace.append(f"once-{i}")
+        else:
+            trace.append(f"hot-{hot[i]}")
+    return trace
+
+def replay(policy: str, trace: Iterable[str], size: int) -> float:
+    # TTL far beyond the replay so only the eviction policy decides
+    cache = CACHE_POLICIES[policy](maxsize=size, ttl=10 ** 9)
+    hits = lookups = 0
+    for key in trace:
+        lookups += 1
+        if cache.get(key) is not None:
+            hits += 1
+        else:
+            cache[key] = True
+    return hits / lookups if lookups else 0.0
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trace", help="file with one request key per line")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 500, 1000])
+    parser.add_argument("--length", type=int, default=200_000, help="synthetic trace length")
+    parser.add_argument("--hot-keys", type=int, default=5_000, help="distinct repeated prompts in the synthetic trace")
+    parser.add_argument("--one-off-ratio", type=float, default=0.5, help="share of one-off prompts in the synthetic trace")
+    parser.add_argument("--zipf", type=float, default=0.9, help="skew of the synthetic hot set")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    if args.trace:
+        trace = load_trace(args.trace)
+        source = args.trace
+    else:
+        trace = synthetic_trace(args.length, args.hot_keys, args.one_off_ratio, args.zipf, args.seed)
+        source = f"synthetic (hot_keys={args.hot_keys}, one_off_ratio={args.one_off_ratio}, zipf={args.zipf})"
+    print(f"trace: {source}, {len(trace)} requests, {len(set(trace))} distinct keys")
+
+    for size in args.sizes:
+        results = []
+        for policy in CACHE_POLICIES:
+            start = time.perf_counter()
+            hit_rate = replay(policy, trace, size)
+            results.append(f"{policy}={hit_rate:6.2%} ({time.perf_counter() - start:5.2f}s)")
+        print(f"size={size:<7} " + "  ".join(results))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Benchmark: event-loop stall caused by the gateway's DB calls, sync vs async.
+
+Each simulated gateway request runs the hot-path queries (gateway keys,
+provider keys, decrypted provider key) and commits one RequestLog row, first
+through a sync Session on the event loop (the old path) and then through an
+AsyncSession (aiosqlite). A heartbeat task ticking every 1 ms measures how long
+the loop was blocked.
+
+Usage (from backend/):
+    python -m benchmarks.bench_db_event_loop --requests 200 --concurrency 20
+"""
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+
+from app import crud
+from app.db.base import Base
+from app.db.session import get_async_database_url
+from app.models.request_log import RequestLog
+from app.schemas.gateway_key import GatewayKeyCreate
+from app.schemas.user import UserCreate
+
+TICK = 0.001
+
+def _full_sync(dbapi_connection, connection_record):
+    # Make every commit pay for an fsync, like a production SQLite file
+    dbapi_connection.execute("PRAGMA synchronous=FULL")
+
+def seed(db_url: str) -> str:
+    engine = create_engine(db_url)
+    Base.metadata.create_all(bind=engine)
+    with sessionmaker(bind=engine)() as db:
+        user = crud.user.create_user(db, UserCreate(email="bench@example.com", password="password123"))
+        crud.gateway_key.create_gateway_key(
+            db, obj_in=GatewayKeyCreate(name="bench"), user_id=user.id, key_hash="bench-hash", prefix="gw_bench"
+        )
+        crud.provider_key.create_provider_key(db, user_id=user.id, provider="openai", raw_key="sk-bench")
+        user_id = user.id
+    engine.dispose()
+    return user_id
+
+def _log_row(user_id: str, gateway_key_id: str) -> RequestLog:
+    return RequestLog(
+        user_id=user_id, gateway_key_id=gateway_key_id, endpoint="/chat/completions",
+        provider="openai", model="gpt-4o", complexity="simple", prompt_tokens=10,
+        completion_tokens=10, total_tokens=20, cost_usd=0.0, latency_ms=1, cache_hit=0, status_code=200,
+    )
+
+async def sync_request(SessionLocal, user_id: str):
+    with SessionLocal() as db:
+        keys = crud.gateway_key.get_keys_by_user(db, user_id=user_id)
+        crud.provider_key.get_provider_keys_by_user(db, user_id=user_id)
+        crud.provider_key.get_decrypted_provider_key(db, user_id=user_id, provider="openai")
+        await asyncio.sleep(0)  # provider call would happen here
+        db.add(_log_row(user_id, keys[0].id))
+        db.commit()
+
+async def async_request(AsyncSessionLocal, user_id: str):
+    async with AsyncSessionLocal() as db:
+        keys = await crud.gateway_key.get_keys_by_user_async(db, user_id=user_id)
+        await crud.provider_key.get_provider_keys_by_user_async(db, user_id=user_id)
+        await crud.provider_key.get_decrypted_provider_key_async(db, user_id=user_id, provider="openai")
+        await asyncio.sleep(0)
+        db.add(_log_row(user_id, keys[0].id))
+        await db.commit()
+
+async def run(mode: str, db_url: str, user_id: str, total: int, concurrency: int):
+    if mode == "sync":
+        # Size the pool to the concurrency: a sync pool wait would block the whole loop
+        engine = create_engine(db_url, connect_args={"check_same_thread": False}, pool_size=concurrency)
+        event.listen(engine, "connect", _full_sync)
+        factory = sessionmaker(bind=engine, autoflush=False)
+        request = sync_request
+    else:
+        engine = create_async_engine(get_async_database_url(db_url))
+        event.listen(engine.sync_engine, "connect", _full_sync)
+        factory = async_sessionmaker(bind=engine, expire_on_commit=False, autoflush=False)
+        request = async_request
+
+    lags = []
+    stop = asyncio.Event()
+
+    async def heartbeat():
+        while not stop.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(TICK)
+            lags.append(max(0.0, time.perf_counter() - start - TICK) * 1000)
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            await request(factory, user_id)
+
+    beat = asyncio.create_task(heartbeat())
+    wall = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    wall = time.perf_counter() - wall
+    stop.set()
+    await beat
+
+    if mode == "sync":
+        engine.dispose()
+    else:
+        await engine.dispose()
+    return lags, wall
+
+def report(mode: str, lags, wall: float, total: int):
+    lags = sorted(lags)
+    p99 = lags[int(len(lags) * 0.99) - 1] if lags else 0.0
+    print(
+        f"{mode:<6} requests={total:<5} wall={wall * 1000:8.1f}ms "
+        f"loop_lag_max={max(lags, default=0):7.2f}ms p99={p99:6.2f}ms "
+        f"mean={statistics.mean(lags) if lags else 0:5.2f}ms stalls_over_5ms={sum(1 for lag in lags if lag > 5)}"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_url = f"sqlite:///{Path(tmp) / 'bench.db'}"
+        user_id = seed(db_url)
+        for mode in ("sync", "async"):
+            lags, wall = asyncio.run(run(mode, db_url, user_id, args.requests, args.concurrency))
+            report(mode, lags, wall, args.requests)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Benchmark: RequestClassifier feature detection, single-pass combined pattern vs
+the previous implementation (string concatenation of every message, then five
+separate case-insensitive searches), on 1 KB, 100 KB and 1 MB prompts.
+
+Each size is measured on four inputs, split into chat messages of ~1 KB:
+  - early:       every feature appears in the first message (early stop)
+  - none:        prose with no feature at all (full scan)
+  - mixed:       features scattered through the prompt
+  - adversarial: long lines of unclosed brackets, which the previous
+                 \\{.*\\} pattern backtracked over quadratically
+
+The previous implementation is skipped on adversarial inputs above
+--old-adversarial-max characters, where it would run for minutes.
+
+Usage (from backend/):
+    python -m benchmarks.bench_feature_detector --sizes 1000 100000 1000000
+"""
+import argparse
+import random
+import re
+import time
+from typing import Callable, Dict, List
+
+from app.core.classifier.service import RequestClassifier
+
+OLD_FEATURES = {
+    "code": r"(def |function |class |import |const |let |var |=>|return )",
+    "sql": r"(SELECT |INSERT |UPDATE |DELETE |FROM |WHERE |JOIN )",
+    "json": r"(\{.*\}|\[.*\])",
+    "refactor": r"(refactor|optimize|rewrite|clean up)",
+    "reasoning": r"(explain|why|how|analyze|compare|evaluate)"
+}
+PROSE = "the quarterly figures look solid and the team expects steady growth in all regions".split()
+FEATURE_SNIPPETS = [
+    "def handler(event): pass", "SELECT id FROM users", '{"a": 1}', "please refactor it", "explain the result",
+]
+
+def old_detect(messages: List[Dict[str, str]]) -> List[str]:
+    text_content = ""
+    for msg in messages:
+        text_content += str(msg.get("content", "")) + "\n"
+    return [f for f, p in OLD_FEATURES.items() if re.search(p, text_content, re.IGNORECASE)]
+
+def prose(rng: random.Random, chars: int) -> str:
+    words, size = [], 0
+    while size < chars:
+        word = rng.choice(PROSE)
+        words.append(word)
+        size += len(word) + 1
+    return " ".join(words)
+
+def make_prompt(kind: str, size: int, rng: random.Random) -> List[Dict[str, str]]:
+    chunk = 1000
+    contents = [prose(rng, min(chunk, size)) for _ in range(max(1, size // chunk))]
+    if kind == "early":
+        contents[0] = " ".join(FEATURE_SNIPPETS) + " " + contents[0]
+    elif kind == "mixed":
+        for snippet in FEATURE_SNIPPETS:
+            i = rng.randrange(len(contents))
+            contents[i] += " " + snippet
+    elif kind == "adversarial":
+        contents = ["{[" * (min(chunk, size) // 2) for _ in range(max(1, size // chunk))]
+        # One line: the messages are joined by newlines only in the old implementation
+        contents = ["".join(contents)]
+    return [{"role": "user", "content": c} for c in contents]
+
+def timed(fn: Callable[[], object], min_seconds: float = 0.2) -> float:
+    runs, start = 0, time.perf_counter()
+    while True:
+        fn()
+        runs += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return elapsed / runs
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--old-adversarial-max", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    classifier = RequestClassifier()
+    rng = random.Random(args.seed)
+    print(f"{'size':>9} {'input':<12}{'previous ms':>13}{'single-pass ms':>16}{'speedup':>9}  features")
+    for size in args.sizes:
+        for kind in ("early", "none", "mixed", "adversarial"):
+            messages = make_prompt(kind, size, rng)
+            new_s = timed(lambda: classifier.detect_features(messages))
+            features = classifier.detect_features(messages)
+            if kind == "adversarial" and size > args.old_adversarial_max:
+                old_col, speedup = f"{'skipped':>13}", f"{'-':>9}"
+            else:
+                old_s = timed(lambda: old_detect(messages))
+                assert old_detect(messages) == features, f"feature mismatch on {kind}/{size}"
+                old_col, speedup = f"{old_s * 1000:>13.3f}", f"{old_s / new_s:>8.1f}x"
+            print(f"{size:>9} {kind:<12}{old_col}{new_s * 1000:>16.3f}{speedup}  {','.join(features) or '-'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmark: CPU time of each gateway pipeline stage on the cache hit and miss paths.
+
+Runs the stages of /chat/completions that precede the provider call
+(classification, routing, cache key, cache lookup, and cache store on a miss)
+on generated prompts and reports the mean CPU time per request of each stage.
+The miss path uses a new prompt per request; the hit path repeats prompts that
+were answered before, so classification comes from the classification cache
+and the response from the L1 cache. With --uncached-classification the hit
+path classifies every request again, as the gateway did before classifications
+were cached.
+
+Usage (from backend/):
+    python -m benchmarks.bench_gateway_stages --requests 2000 --prompt-chars 4000
+"""
+import argparse
+import random
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+from app.api.v1.endpoints.gateway import GatewayRequest, _cache_params, _route
+from app.core.cache.classification import ClassificationCache
+from app.core.cache.service import CacheManager
+from app.core.classifier.service import request_classifier
+from app.core.registry import model_registry
+from app.schemas.llm import GenerationResponse, GenerationUsage
+
+STAGES = ["classification", "routing", "cache_key", "lookup", "store"]
+WORDS = "the gateway routes each request to a model that fits its size and content quickly".split()
+
+def make_payload(rng: random.Random, index: int, chars: int) -> GatewayRequest:
+    words = []
+    while sum(len(w) + 1 for w in words) < chars:
+        words.append(rng.choice(WORDS))
+    return GatewayRequest(messages=[
+        {"role": "system", "content": "You are a helpful assistant."},
+        {"role": "user", "content": f"Request {index}: " + " ".join(words)},
+    ])
+
+def run(payloads: List[GatewayRequest], cache: CacheManager, classifications: ClassificationCache,
+        providers: List[str], uncached_classification: bool) -> Dict[str, float]:
+    """Run the pre-execution stages for every payload; returns CPU nanoseconds per stage."""
+    totals: Dict[str, float] = defaultdict(float)
+    response = GenerationResponse(
+        content="cached", model_used="bench", usage=GenerationUsage(input_tokens=1, output_tokens=1, total_tokens=2)
+    )
+
+    def timed(stage, fn, *args, **kwargs):
+        start = time.process_time_ns()
+        result = fn(*args, **kwargs)
+        totals[stage] += time.process_time_ns() - start
+        return result
+
+    for payload in payloads:
+        if uncached_classification:
+            classification = timed("classification", request_classifier.analyze, payload.messages)
+        else:
+            classification = timed("classification", classifications.classify, payload.messages)
+        routing_result = timed("routing", _route, payload, classification, providers)
+        params = _cache_params(payload, routing_result)
+        timed("cache_key", cache.cache_key, payload.messages, params)
+        cached = timed("lookup", cache.lookup, payload.messages, params, tenant="bench")
+        if cached.response is None:
+            timed("store", cache.store_response, payload.messages, params, response,
+                  tenant="bench", classification=classification)
+    return totals
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--prompt-chars", type=int, default=4000, help="approximate size of each user message")
+    parser.add_argument("--uncached-classification", action="store_true",
+                        help="classify every request, as before classifications were cached")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    payloads = [make_payload(rng, i, args.prompt_chars) for i in range(args.requests)]
+    providers = sorted({m.provider for m in model_registry.list_models()})
+    cache = CacheManager(maxsize=args.requests * 2, ttl=10 ** 9)
+    classifications = ClassificationCache(maxsize=args.requests * 2, ttl=10 ** 9)
+
+    # The miss path fills both caches; the hit path then replays the same prompts
+    paths = {
+        "miss": run(payloads, cache, classifications, providers, uncached_classification=False),
+        "hit": run(payloads, cache, classifications, providers, args.uncached_classification),
+    }
+    assert cache.metrics["hits"] == args.requests, "hit path did not hit the cache"
+
+    print(f"{args.requests} requests, ~{args.prompt_chars} chars per prompt, mean CPU time per request (us)")
+    print(f"{'stage':<16}" + "".join(f"{path:>12}" for path in paths))
+    for stage in STAGES:
+        print(f"{stage:<16}" + "".join(f"{totals.get(stage, 0) / args.requests / 1000:>12.1f}" for totals in paths.values()))
+    print(f"{'total':<16}" + "".join(f"{sum(totals.values()) / args.requests / 1000:>12.1f}" for totals in paths.values()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Benchmark: fresh httpx.AsyncClient per request vs. the shared pooled client.
+
+Starts a local mock OpenAI-compatible provider over TLS (self-signed cert) and
+sends the same sequence of requests through both strategies, so the cost of the
+per-request TCP+TLS handshake shows up in the latency numbers.
+
+Usage (from backend/):
+    python -m benchmarks.bench_provider_pool --requests 200 --concurrency 10
+"""
+import argparse
+import asyncio
+import datetime
+import ipaddress
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import httpx
+import uvicorn
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from app.core.providers.http import ProviderClientPool
+
+MOCK_BODY = {
+    "model": "gpt-4o-mock",
+    "choices": [{"message": {"content": "pong"}, "finish_reason": "stop"}],
+    "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+}
+
+async def chat_completions(request):
+    await request.body()
+    return JSONResponse(MOCK_BODY)
+
+def _self_signed_cert(directory: Path):
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "localhost")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now)
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .add_extension(x509.SubjectAlternativeName([x509.IPAddress(ipaddress.ip_address("127.0.0.1"))]), critical=False)
+        .sign(key, hashes.SHA256())
+    )
+    cert_path, key_path = directory / "cert.pem", directory / "key.pem"
+    cert_path.write_bytes(cert.public_bytes(serialization.Encoding.PEM))
+    key_path.write_bytes(key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.TraditionalOpenSSL,
+        serialization.NoEncryption(),
+    ))
+    return cert_path, key_path
+
+def start_mock_provider(port: int, certdir: Path) -> uvicorn.Server:
+    cert_path, key_path = _self_signed_cert(certdir)
+    app = Starlette(routes=[Route("/v1/chat/completions", chat_completions, methods=["POST"])])
+    config = uvicorn.Config(
+        app, host="127.0.0.1", port=port, log_level="warning",
+        ssl_certfile=str(cert_path), ssl_keyfile=str(key_path),
+    )
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+async def run(strategy: str, url: str, total: int, concurrency: int):
+    # The mock uses a self-signed certificate
+    pool = ProviderClientPool(verify=False)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            if strategy == "fresh":
+                async with httpx.AsyncClient(verify=False) as client:
+                    response = await client.post(url, json={"messages": []})
+            else:
+                response = await pool.get("mock").post(url, json={"messages": []})
+            response.raise_for_status()
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    wall = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    wall = time.perf_counter() - wall
+    metrics = pool.metrics.get("mock", {})
+    await pool.aclose()
+    return latencies, wall, metrics
+
+def report(name: str, latencies, wall: float, metrics: dict):
+    latencies = sorted(latencies)
+    p50 = statistics.median(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(
+        f"{name:<8} n={len(latencies):<5} p50={p50:7.2f}ms p95={p95:7.2f}ms "
+        f"mean={statistics.mean(latencies):7.2f}ms throughput={len(latencies) / wall:8.1f} req/s"
+        + (f" connections_opened={metrics.get('connections_opened')}" if metrics else "")
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--port", type=int, default=8443)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as certdir:
+        server = start_mock_provider(args.port, Path(certdir))
+        url = f"https://127.0.0.1:{args.port}/v1/chat/completions"
+        try:
+            for strategy in ("fresh", "pooled"):
+                latencies, wall, metrics = asyncio.run(run(strategy, url, args.requests, args.concurrency))
+                report(strategy, latencies, wall, metrics)
+        finally:
+            server.should_exit = True
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Benchmark: event-loop stall caused by tokenizing large prompts, inline vs
+offloaded to the tokenization thread pool (with parallel chunk encoding).
+
+Each simulated request counts the tokens of a large document prompt (a unique
+one per request, so the per-message count cache never hits), first on the
+event loop (the old path) and then through TokenizationExecutor. A heartbeat
+task ticking every 1 ms measures how long the loop was blocked. Both modes must
+produce identical token counts.
+
+Usage (from backend/):
+    python -m benchmarks.bench_tokenize_event_loop --requests 20 --concurrency 4 --prompt-chars 400000
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from app.core.classifier.executor import TokenizationExecutor, prompt_chars
+from app.core.classifier.tokenizer import TokenCounter
+from app.schemas.llm import Message
+
+TICK = 0.001
+WORDS = "the report describes quarterly revenue growth across regions and the risks ahead".split()
+
+def make_document(rng: random.Random, index: int, chars: int) -> str:
+    lines, size = [f"Document {index}"], 0
+    while size < chars:
+        line = " ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 20))) + f" ({rng.randint(0, 10 ** 6)})."
+        lines.append(line)
+        size += len(line) + 1
+    return "\n".join(lines)
+
+async def run(mode: str, documents, concurrency: int, chunk_chars: int, threads: int):
+    if mode == "inline":
+        counter = TokenCounter(message_cache_size=1)
+        executor = None
+    else:
+        counter = TokenCounter(message_cache_size=1, chunk_chars=chunk_chars, threads=threads)
+        executor = TokenizationExecutor(offload_chars=0, max_workers=threads)
+
+    lags = []
+    counts = []
+    stop = asyncio.Event()
+
+    async def heartbeat():
+        while not stop.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(TICK)
+            lags.append(max(0.0, time.perf_counter() - start - TICK) * 1000)
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(document: str):
+        messages = [Message(role="user", content=document)]
+        async with semaphore:
+            if executor is None:
+                counts.append(counter.count_messages(messages))
+            else:
+                counts.append(await executor.run(prompt_chars(messages), counter.count_messages, messages))
+            await asyncio.sleep(0)  # provider call would happen here
+
+    beat = asyncio.create_task(heartbeat())
+    wall = time.perf_counter()
+    await asyncio.gather(*(one(d) for d in documents))
+    wall = time.perf_counter() - wall
+    stop.set()
+    await beat
+
+    counter.shutdown()
+    if executor is not None:
+        executor.shutdown()
+    return lags, wall, sorted(counts)
+
+def report(mode: str, lags, wall: float, total: int):
+    lags = sorted(lags)
+    p99 = lags[int(len(lags) * 0.99) - 1] if lags else 0.0
+    print(
+        f"{mode:<8} requests={total:<4} wall={wall * 1000:8.1f}ms "
+        f"loop_lag_max={max(lags, default=0):7.2f}ms p99={p99:6.2f}ms "
+        f"mean={statistics.mean(lags) if lags else 0:5.2f}ms stalls_over_5ms={sum(1 for lag in lags if lag > 5)}"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--prompt-chars", type=int, default=400_000, help="about 100k tokens of English")
+    parser.add_argument("--chunk-chars", type=int, default=64_000)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    documents = [make_document(rng, i, args.prompt_chars) for i in range(args.requests)]
+    results = {}
+    for mode in ("inline", "offload"):
+        lags, wall, counts = asyncio.run(run(mode, documents, args.concurrency, args.chunk_chars, args.threads))
+        report(mode, lags, wall, args.requests)
+        results[mode] = counts
+    assert results["inline"] == results["offload"], "offloaded counts differ from inline counts"
+    print("token counts identical in both modes")
+
+if __name__ == "__main__":
+    main()
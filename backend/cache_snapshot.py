@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Export, import and warm the response cache of a running gateway through its
+admin endpoints (the token must belong to a user listed in ADMIN_EMAILS).
+
+Usage (from backend/):
+    python cache_snapshot.py export cache-snapshot.jsonl.gz
+    python cache_snapshot.py import cache-snapshot.jsonl.gz
+    python cache_snapshot.py warmup --top-n 200
+
+The token is read from --token or the GATEWAY_ADMIN_TOKEN environment variable.
+"""
+import argparse
+import os
+import sys
+
+import httpx
+
+API_PREFIX = "/api/v1"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=os.getenv("GATEWAY_URL", "http://localhost:8000"))
+    parser.add_argument("--token", default=os.getenv("GATEWAY_ADMIN_TOKEN"))
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("export", help="download a snapshot of the cache").add_argument("path")
+    commands.add_parser("import", help="load a snapshot into the cache").add_argument("path")
+    warmup = commands.add_parser("warmup", help="replay the most frequent recent prompts")
+    warmup.add_argument("--top-n", type=int, default=100)
+    args = parser.parse_args()
+
+    if not args.token:
+        parser.error("an admin token is required (--token or GATEWAY_ADMIN_TOKEN)")
+
+    headers = {"Authorization": f"Bearer {args.token}"}
+    with httpx.Client(base_url=args.url + API_PREFIX, headers=headers, timeout=600) as client:
+        if args.command == "export":
+            response = client.get("/cache/snapshot")
+            response.raise_for_status()
+            with open(args.path, "wb") as f:
+                f.write(response.content)
+            print(f"Exported {response.headers.get('X-Snapshot-Entries')} entries to {args.path}")
+        elif args.command == "import":
+            with open(args.path, "rb") as f:
+                response = client.post("/cache/snapshot", content=f.read())
+            response.raise_for_status()
+            print(f"Imported: {response.json()}")
+        else:
+            response = client.post("/cache/warmup", params={"top_n": args.top_n})
+            response.raise_for_status()
+            print(f"Warm-up: {response.json()}")
+
+if __name__ == "__main__":
+    try:
+        main()
+    except httpx.HTTPStatusError as e:
+        sys.exit(f"{e.response.status_code}: {e.response.text}")
@@ -0,0 +1,5 @@
+import os
+import tempfile
+
+# Give each test run a fresh L2 response cache instead of the on-disk one under ./cache
+os.environ.setdefault("CACHE_L2_PATH", os.path.join(tempfile.mkdtemp(prefix="gateway-l2-"), "responses.db"))
@@ -0,0 +1,69 @@
+import pytest
+import time
+import uuid
+from datetime import timedelta
+from unittest.mock import AsyncMock, patch
+from jose import jwt
+
+from app import crud
+from app.api import deps
+from app.core import security
+from app.core.cache.auth import AuthCache, auth_cache
+from app.db.session import SessionLocal
+from app.schemas.user import UserCreate
+
+def _make_user(db):
+    return crud.user.create_user(db, UserCreate(email=f"auth-cache-{uuid.uuid4().hex[:8]}@example.com", password="password123"))
+
+def test_auth_cache_entry_never_outlives_token():
+    cache = AuthCache(maxsize=10, ttl=1)
+    token = security.create_access_token("x@example.com")
+    expired = security.create_access_token("x@example.com", expires_delta=timedelta(seconds=-1))
+
+    with SessionLocal() as db:
+        user = _make_user(db)
+        cache.store(token, jwt.get_unverified_claims(token), user)
+        cache.store(expired, jwt.get_unverified_claims(expired), user)
+
+    hit = cache.get(token)
+    assert hit is not None
+    cached_claims, cached_user = hit
+    assert cached_claims == jwt.get_unverified_claims(token)
+    assert cached_user.id == user.id
+    assert cached_user is not user
+
+    # Capped by the token's exp
+    assert cache.get(expired) is None
+
+    # Capped by the cache TTL
+    time.sleep(1.1)
+    assert cache.get(token) is None
+    assert cache.metrics["hits"] == 1
+    assert cache.metrics["misses"] == 2
+
+def test_auth_cache_invalidated_on_user_update():
+    with SessionLocal() as db:
+        user = _make_user(db)
+        token = security.create_access_token(user.email)
+        auth_cache.store(token, jwt.get_unverified_claims(token), user)
+        assert auth_cache.get(token) is not None
+
+        user.is_active = False
+        db.commit()
+
+    assert auth_cache.get(token) is None
+
+@pytest.mark.asyncio
+async def test_get_current_user_warm_token_skips_db():
+    with SessionLocal() as db:
+        user = _make_user(db)
+    token = security.create_access_token(user.email)
+
+    with patch("app.api.deps.crud.user.get_user_by_email_async", new_callable=AsyncMock) as mock_lookup:
+        mock_lookup.return_value = user
+        first = await deps.get_current_user(db=None, token=token)
+        with patch("app.api.deps.jwt.decode", side_effect=AssertionError("re-verified")):
+            second = await deps.get_current_user(db=None, token=token)
+
+    assert mock_lookup.await_count == 1
+    assert first.id == second.id == user.id
@@ -1,6 +1,6 @@
 import pytest
 import time
-from app.core.cache.service import CacheManager
+from app.core.cache.service import PUBLIC_PARTITION, CacheManager
 from app.schemas.llm import Message, MessageRole, GenerationResponse, GenerationUsage
 
 def test_cache_key_consistency():
@@ -67,3 +67,546 @@ def test_cache_ttl():
     time.sleep(1.1)
     assert cache.get_response(msg, {}) is None
     assert cache.metrics["misses"] == 1
+
+@pytest.mark.asyncio
+async def test_user_context_cache_hit_miss_invalidate():
+    from unittest.mock import AsyncMock, MagicMock, patch
+    from app.core.cache.user_context import UserContextCache
+    from app.core.security import key_vault
+
+    cache = UserContextCache(maxsize=10, ttl=60)
+    provider_keys = [MagicMock(provider="openai", encrypted_key=key_vault.encrypt("sk-test"))]
+
+    with patch("app.core.cache.user_context.crud.gateway_key.get_keys_by_user_async", new_callable=AsyncMock) as mock_gw, \
+         patch("app.core.cache.user_context.crud.provider_key.get_provider_keys_by_user_async", new_callable=AsyncMock) as mock_pk, \
+         patch("app.core.cache.user_context.key_vault.decrypt", wraps=key_vault.decrypt) as mock_decrypt:
+        mock_gw.return_value = [MagicMock(id="gw-1")]
+        mock_pk.return_value = provider_keys
+
+        # Miss loads from the database
+        context = await cache.get(MagicMock(), "user-1")
+        assert context.gateway_key_id == "gw-1"
+        assert context.providers == ["openai"]
+        assert cache.metrics["misses"] == 1
+
+        # Hit reuses the context and decrypts each key only once
+        assert await cache.get_api_key(MagicMock(), "user-1", "openai") == "sk-test"
+        assert await cache.get_api_key(MagicMock(), "user-1", "openai") == "sk-test"
+        assert await cache.get_api_key(MagicMock(), "user-1", "google") is None
+        assert mock_gw.await_count == 1
+        assert mock_pk.await_count == 1
+        assert mock_decrypt.call_count == 1
+        assert cache.metrics["hits"] == 3
+
+        # Invalidation forces a reload on the next request
+        cache.invalidate("user-1")
+        await cache.get(MagicMock(), "user-1")
+        assert mock_pk.await_count == 2
+        assert cache.metrics["invalidations"] == 1
+
+@pytest.mark.asyncio
+async def test_single_flight_coalesces_and_shares_errors():
+    import asyncio
+    from app.core.cache.singleflight import SingleFlight
+
+    flight = SingleFlight()
+    calls = 0
+
+    async def provider_call():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return "response"
+
+    results = await asyncio.gather(*(flight.do("key", provider_call) for _ in range(5)))
+    assert calls == 1
+    assert [shared for _, shared in results] == [False, True, True, True, True]
+    assert all(value == "response" for value, _ in results)
+    assert flight.metrics["calls_saved"] == 4
+    assert flight.metrics["in_flight"] == 0
+
+    async def failing_call():
+        await asyncio.sleep(0.05)
+        raise ValueError("provider down")
+
+    outcomes = await asyncio.gather(*(flight.do("key", failing_call) for _ in range(3)), return_exceptions=True)
+    assert all(isinstance(o, ValueError) for o in outcomes)
+    assert flight.metrics["shared_errors"] == 2
+
+    # Once finished, the key is free again
+    assert await flight.do("key", provider_call) == ("response", False)
+    assert calls == 2
+
+def test_l2_cache_promotion_and_tier_metrics(tmp_path):
+    from app.core.cache.disk import DiskCache
+
+    path = str(tmp_path / "l2.db")
+    messages = [Message(role=MessageRole.USER, content="Persist me")]
+    response = GenerationResponse(
+        content="persisted", model_used="m",
+        usage=GenerationUsage(input_tokens=1, output_tokens=1, total_tokens=2),
+        provider_specific_response={"id": "raw"}
+    )
+
+    # Worker A stores the response
+    worker_a = CacheManager(l2=DiskCache(path, ttl=60))
+    worker_a.store_response(messages, {}, response)
+    worker_a.flush()
+
+    # Worker B (cold L1, same file) finds it in L2 and promotes it to L1
+    worker_b = CacheManager(l2=DiskCache(path, ttl=60))
+    cached = worker_b.get_response(messages, {})
+    assert cached == response
+    assert worker_b.metrics["l2"]["hits"] == 1
+    assert worker_b.metrics["l1"]["hits"] == 0
+
+    assert worker_b.get_response(messages, {}) == response
+    assert worker_b.metrics["l1"]["hits"] == 1
+    assert worker_b.metrics["l2"]["current_size"] == 1
+
+    # Misses fall through both tiers
+    assert worker_b.get_response([Message(role=MessageRole.USER, content="other")], {}) is None
+    assert worker_b.metrics["l2"]["misses"] == 1
+    assert worker_b.metrics["misses"] == 1
+
+@pytest.mark.asyncio
+async def test_l2_io_never_waits_on_the_write_lock(tmp_path):
+    import sqlite3
+    from app.core.cache.disk import DiskCache
+
+    path = str(tmp_path / "l2.db")
+    messages = [Message(role=MessageRole.USER, content="Persist me")]
+    response = GenerationResponse(content="persisted", model_used="m")
+    worker_a = CacheManager(l2=DiskCache(path, ttl=60))
+    worker_b = CacheManager(l2=DiskCache(path, ttl=60))
+
+    # Another process holds the write lock: storing only queues the row
+    other = sqlite3.connect(path, isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")
+    start = time.perf_counter()
+    worker_a.store_response(messages, {}, response)
+    assert time.perf_counter() - start < 0.5
+    assert worker_b.metrics["l2"]["current_size"] == 0
+    other.execute("COMMIT")
+    other.close()
+
+    # Once written, another worker reads it off the event loop and promotes it
+    worker_a.flush()
+    lookup = await worker_b.lookup_async(messages, {})
+    assert lookup.response == response
+    assert worker_b.metrics["l2"]["hits"] == 1
+    assert (await worker_b.lookup_async(messages, {})).response == response
+    assert worker_b.metrics["l1"]["hits"] == 1
+
+def test_l2_cache_ttl(tmp_path):
+    from app.core.cache.disk import DiskCache
+
+    l2 = DiskCache(str(tmp_path / "l2.db"), ttl=1)
+    response = GenerationResponse(content="short lived", model_used="m")
+    l2.set("key", response)
+    l2.flush()
+    assert l2.get("key") == response
+    time.sleep(1.1)
+    assert l2.get("key") is None
+    # Reads leave expired rows to the purge, which the writer runs periodically
+    assert len(l2) == 1
+    assert l2.purge_expired() == 1
+    assert len(l2) == 0
+
+def test_cache_byte_budget():
+    cache = CacheManager(max_bytes=2000, strip_provider_response=True)
+    usage = GenerationUsage(input_tokens=1, output_tokens=1, total_tokens=2)
+
+    # Raw provider payload is dropped before the entry is weighed
+    big_raw = GenerationResponse(content="small", model_used="m", usage=usage, provider_specific_response={"raw": "x" * 10000})
+    msg = [Message(role=MessageRole.USER, content="raw")]
+    cache.store_response(msg, {}, big_raw)
+    cached = cache.get_response(msg, {})
+    assert cached.content == "small"
+    assert cached.provider_specific_response is None
+    assert big_raw.provider_specific_response is not None  # caller's object untouched
+    assert 0 < cache.metrics["current_bytes"] < 2000
+
+    # Eviction keeps usage under the ceiling
+    for i in range(20):
+        res = GenerationResponse(content="y" * 300, model_used="m", usage=usage)
+        cache.store_response([Message(role=MessageRole.USER, content=str(i))], {}, res)
+    assert cache.metrics["current_bytes"] <= 2000
+    assert cache.metrics["current_size"] < 20
+
+    # An entry larger than the whole budget is skipped instead of raising
+    cache.store_response(msg, {"huge": True}, GenerationResponse(content="z" * 5000, model_used="m"))
+    assert cache.metrics["too_large"] == 1
+
+def test_cache_tenant_partitions_and_fair_eviction():
+    cache = CacheManager(maxsize=4, tenant_quota=3)
+    res = GenerationResponse(content="res", model_used="m", usage=GenerationUsage(input_tokens=1, output_tokens=1, total_tokens=2))
+    msg = [Message(role=MessageRole.USER, content="same prompt")]
+
+    # One tenant's completion is never served to another
+    cache.store_response(msg, {}, res, tenant="alice")
+    assert cache.get_response(msg, {}, tenant="alice") is not None
+    assert cache.get_response(msg, {}, tenant="bob") is None
+
+    # A heavy tenant is capped by its quota and evicts its own entries, not alice's
+    for i in range(10):
+        cache.store_response([Message(role=MessageRole.USER, content=str(i))], {}, res, tenant="bob")
+    assert cache.get_response(msg, {}, tenant="alice") is not None
+    assert cache.tenant_metrics("bob")["current_size"] == 3
+    assert cache.metrics["current_size"] == 4
+
+    # Global pressure evicts from the largest partition
+    cache.store_response([Message(role=MessageRole.USER, content="carol")], {}, res, tenant="carol")
+    assert cache.metrics["current_size"] == 4
+    assert cache.tenant_metrics("bob")["current_size"] == 2
+    assert cache.tenant_metrics("alice")["current_size"] == 1
+    assert cache.metrics["fair_evictions"] == 1
+
+    stats = cache.tenant_metrics("alice")
+    assert stats["hits"] == 2 and stats["misses"] == 0 and stats["hit_rate"] == 1
+    assert cache.tenant_metrics("bob")["misses"] == 1
+    assert set(cache.all_tenant_metrics()) == {"alice", "bob", "carol"}
+
+def test_cache_public_partition_is_opt_in():
+    cache = CacheManager()
+    res = GenerationResponse(content="shared", model_used="m", usage=GenerationUsage(input_tokens=1, output_tokens=1, total_tokens=2))
+    msg = [Message(role=MessageRole.USER, content="What is 2+2?")]
+
+    cache.store_response(msg, {}, res, tenant="alice", shareable=True)
+    # Visible to other tenants only when they also opt in
+    assert cache.get_response(msg, {}, tenant="bob") is None
+    assert cache.get_response(msg, {}, tenant="bob", shareable=True).content == "shared"
+    assert cache.tenant_metrics(PUBLIC_PARTITION)["current_size"] == 1
+
+def test_tinylfu_keeps_hot_set_under_one_off_scan():
+    from cachetools import TTLCache
+    from app.core.cache.tinylfu import TinyLFUCache
+
+    def replay(cache):
+        hits = 0
+        for i in range(2000):
+            # A hot set of 20 repeated prompts interleaved with a stream of one-offs
+            for key in (f"hot-{i % 20}", f"once-{i}", f"once-{i}-b"):
+                if cache.get(key) is not None:
+                    hits += 1
+                else:
+                    cache[key] = True
+        return hits
+
+    assert replay(TinyLFUCache(maxsize=50, ttl=3600)) > 2 * replay(TTLCache(maxsize=50, ttl=3600))
+
+def test_tinylfu_ttl_and_size_limits():
+    from app.core.cache.tinylfu import TinyLFUCache
+
+    now = [0.0]
+    cache = TinyLFUCache(maxsize=100, ttl=10, getsizeof=len, timer=lambda: now[0])
+    cache["a"] = "x" * 40
+    assert cache["a"] == "x" * 40
+    assert cache.currsize == 40
+
+    with pytest.raises(ValueError):
+        cache["big"] = "x" * 101
+
+    now[0] = 11.0
+    assert cache.get("a") is None
+    assert len(cache) == 0 and cache.currsize == 0
+
+def test_cache_manager_tinylfu_policy():
+    cache = CacheManager(maxsize=2, policy="tinylfu")
+    res = GenerationResponse(content="res", model_used="m", usage=GenerationUsage(input_tokens=1, output_tokens=1, total_tokens=2))
+    for i in range(5):
+        cache.store_response([Message(role=MessageRole.USER, content=str(i))], {}, res)
+    assert cache.metrics["current_size"] <= 2
+    assert cache.metrics["policy"] == "tinylfu"
+    assert cache.metrics["admission"]["rejected"] > 0
+
+    with pytest.raises(ValueError):
+        CacheManager(policy="fifo")
+
+def test_cache_soft_and_hard_ttl():
+    cache = CacheManager(ttl=1, soft_ttl=0.3)
+    msg = [Message(role=MessageRole.USER, content="SWR")]
+    res = GenerationResponse(content="res", model_used="m", usage=GenerationUsage(input_tokens=1, output_tokens=1, total_tokens=2))
+
+    cache.store_response(msg, {}, res)
+    assert cache.lookup(msg, {}).stale is False
+
+    time.sleep(0.4)
+    lookup = cache.lookup(msg, {})
+    assert lookup.response.content == "res" and lookup.stale is True
+    assert cache.metrics["stale_hits"] == 1
+
+    # One refresh per entry at a time
+    assert cache.begin_refresh("k") is True
+    assert cache.begin_refresh("k") is False
+    cache.end_refresh("k")
+    assert cache.begin_refresh("k") is True
+
+    # Past the hard TTL it is a miss
+    time.sleep(0.7)
+    assert cache.lookup(msg, {}).response is None
+
+def test_fuzzy_cache_matches_trivial_differences():
+    from app.core.cache.fuzzy import FuzzyIndex
+
+    cache = CacheManager(fuzzy=FuzzyIndex(threshold=0.8))
+    res = GenerationResponse(content="fuzzy", model_used="m", usage=GenerationUsage(input_tokens=1, output_tokens=1, total_tokens=2))
+    prompt = "Summarize the quarterly report for the sales team. Focus on revenue growth in Europe. Generated at 2024-05-01 10:32."
+    cache.store_response([Message(role=MessageRole.USER, content=prompt)], {"temperature": 0.2}, res, tenant="alice", fuzzy=True)
+
+    variant = "  summarize the QUARTERLY report for the sales   team!  Generated at 2024-06-17 08:05. Focus on revenue growth in Europe."
+    messages = [Message(role=MessageRole.USER, content=variant)]
+    assert cache.get_response(messages, {"temperature": 0.2}, tenant="alice", fuzzy=True).content == "fuzzy"
+    assert cache.metrics["fuzzy"]["hits"] == 1
+
+    # Opt-in only, params must be identical and tenants stay isolated
+    assert cache.get_response(messages, {"temperature": 0.2}, tenant="alice") is None
+    assert cache.get_response(messages, {"temperature": 0.9}, tenant="alice", fuzzy=True) is None
+    assert cache.get_response(messages, {"temperature": 0.2}, tenant="bob", fuzzy=True) is None
+
+    different = "Summarize the incident postmortem for the platform team. Focus on root causes in the EU region."
+    assert cache.get_response([Message(role=MessageRole.USER, content=different)], {"temperature": 0.2}, tenant="alice", fuzzy=True) is None
+
+def test_fuzzy_cache_never_matches_different_numbers():
+    from app.core.cache.fuzzy import FuzzyIndex
+
+    cache = CacheManager(fuzzy=FuzzyIndex(threshold=0.5))
+    res = GenerationResponse(content="4", model_used="m", usage=GenerationUsage(input_tokens=1, output_tokens=1, total_tokens=2))
+    transfer = (
+        "Prepare the wire transfer instructions for our treasury team using the standard template. "
+        "Include the compliance checklist, the approval chain and the cut-off times. "
+        "Transfer {amount} EUR from account {account} to the supplier account on file."
+    )
+    for prompt in ("What is 2+2?", transfer.format(amount="1,250.00", account="DE44500105175407324931")):
+        cache.store_response([Message(role=MessageRole.USER, content=prompt)], {}, res, tenant="alice", fuzzy=True)
+
+    for prompt in ("What is 7+9?", transfer.format(amount="9,800.00", account="DE89370400440532013000")):
+        assert cache.get_response([Message(role=MessageRole.USER, content=prompt)], {}, tenant="alice", fuzzy=True) is None
+    assert cache.metrics["fuzzy"]["hits"] == 0
+
+def test_fuzzy_index_keeps_each_partition_entry():
+    from app.core.cache.fuzzy import FuzzyIndex
+
+    index = FuzzyIndex()
+    messages = [Message(role=MessageRole.USER, content="Summarize the quarterly report for the sales team.")]
+    alice, bob = (FuzzyIndex.scope(tenant, messages, {}) for tenant in ("alice", "bob"))
+    index.add(alice, messages, "same-key")
+    index.add(bob, messages, "same-key")
+    assert index.find(alice, messages) == "same-key"
+    assert index.find(bob, messages) == "same-key"
+
+def test_fuzzy_index_lookup_is_fast():
+    from app.core.cache.fuzzy import FuzzyIndex
+
+    index = FuzzyIndex()
+    words = [f"word{i % 97}" for i in range(2000)]
+    for n in range(200):
+        messages = [Message(role=MessageRole.USER, content=" ".join(words[n:n + 300]) + f" topic{n}.")]
+        index.add("scope", messages, f"key-{n}")
+    query = [Message(role=MessageRole.USER, content=" ".join(words[:1500]))]
+
+    start = time.perf_counter()
+    index.find("scope", query)
+    assert (time.perf_counter() - start) * 1000 < 50
+
+def test_cache_key_canonicalization():
+    from app.core.cache.canonical import RESOLVED_MODEL_PARAM
+
+    cache = CacheManager()
+    res = GenerationResponse(content="canonical", model_used="m", usage=GenerationUsage(input_tokens=1, output_tokens=1, total_tokens=2))
+    stored = [Message(role=MessageRole.USER, content="Explain recursion.")]
+    cache.store_response(stored, {"max_tokens": 100, "routing_strategy": "cost", RESOLVED_MODEL_PARAM: "gpt-4o-mini"}, res)
+
+    # Default temperature, trailing whitespace, CRLF and a strategy resolving to the same model
+    variant = [Message(role=MessageRole.USER, content="Explain recursion.  \r\n", name=None)]
+    params = {"max_tokens": 100, "temperature": 0.7, "top_p": 1, "stop_sequences": [],
+              "routing_strategy": "speed", RESOLVED_MODEL_PARAM: "gpt-4o-mini"}
+    assert cache.get_response(variant, params).content == "canonical"
+    assert cache.metrics["canonical_hits"] == 1
+
+    # The raw request hits without canonicalization's help
+    cache.get_response(stored, {"max_tokens": 100, "routing_strategy": "cost", RESOLVED_MODEL_PARAM: "gpt-4o-mini"})
+    assert cache.metrics["canonical_hits"] == 1
+
+    # Real differences still miss
+    assert cache.get_response(variant, {**params, "temperature": 0.2}) is None
+    assert cache.get_response(variant, {**params, RESOLVED_MODEL_PARAM: "gpt-4o"}) is None
+    assert cache.get_response([Message(role=MessageRole.USER, content="Explain recursion.", name="bob")], params) is None
+
+def test_cache_variant_pool_for_sampled_requests():
+    from unittest.mock import patch
+
+    cache = CacheManager(variant_pool_size=3)
+    usage = GenerationUsage(input_tokens=1, output_tokens=1, total_tokens=2)
+    msg = [Message(role=MessageRole.USER, content="Write a haiku about caching.")]
+    params = {"temperature": 0.9}
+
+    cache.store_response(msg, params, GenerationResponse(content="v1", model_used="m", usage=usage))
+    # While the pool fills, a share of requests go to the provider for new samples
+    with patch("app.core.cache.service.random.random", return_value=0.99):
+        assert cache.get_response(msg, params) is None
+    with patch("app.core.cache.service.random.random", return_value=0.0):
+        assert cache.get_response(msg, params).content == "v1"
+    cache.store_response(msg, params, GenerationResponse(content="v2", model_used="m", usage=usage))
+    cache.store_response(msg, params, GenerationResponse(content="v3", model_used="m", usage=usage))
+
+    # Full pool: always served, uniformly across the samples
+    with patch("app.core.cache.service.random.random", return_value=0.99):
+        served = {cache.get_response(msg, params).content for _ in range(50)}
+    assert served == {"v1", "v2", "v3"}
+    assert cache.metrics["variants"]["fresh_calls"] == 1
+
+    # A refresh of the full pool replaces the oldest sample only
+    cache.store_response(msg, params, GenerationResponse(content="v4", model_used="m", usage=usage))
+    with patch("app.core.cache.service.random.random", return_value=0.99):
+        served = {cache.get_response(msg, params).content for _ in range(50)}
+    assert served == {"v2", "v3", "v4"}
+
+    # A repeated sample closes the pool early
+    other = [Message(role=MessageRole.USER, content="Name a color.")]
+    cache.store_response(other, params, GenerationResponse(content="blue", model_used="m", usage=usage))
+    cache.store_response(other, params, GenerationResponse(content="blue", model_used="m", usage=usage))
+    with patch("app.core.cache.service.random.random", return_value=0.99):
+        assert cache.get_response(other, params).content == "blue"
+
+    # Greedy requests keep a single response
+    cache.store_response(other, {"temperature": 0}, GenerationResponse(content="red", model_used="m", usage=usage))
+    with patch("app.core.cache.service.random.random", return_value=0.99):
+        assert cache.get_response(other, {"temperature": 0}).content == "red"
+
+def test_cache_snapshot_round_trip():
+    import io
+    from app.core.cache.service import CacheEntry
+    from app.core.cache.snapshot import read_snapshot, write_snapshot
+    from app.core.cache.warmup import PromptRecorder
+
+    source = CacheManager(variant_pool_size=2)
+    usage = GenerationUsage(input_tokens=1, output_tokens=1, total_tokens=2)
+    msg = [Message(role=MessageRole.USER, content="Snapshot me")]
+    source.store_response(msg, {"temperature": 0}, GenerationResponse(content="one", model_used="m", usage=usage), tenant="alice")
+    source.store_response(msg, {"temperature": 1}, GenerationResponse(content="a", model_used="m", usage=usage), tenant="alice")
+    source.store_response(msg, {"temperature": 1}, GenerationResponse(content="b", model_used="m", usage=usage), tenant="alice")
+    recorder = PromptRecorder()
+    for _ in range(3):
+        recorder.record("alice", "hot", {"messages": [{"role": "user", "content": "hot"}]})
+    recorder.record("alice", "cold", {"messages": [{"role": "user", "content": "cold"}]})
+
+    buffer = io.BytesIO()
+    assert write_snapshot(buffer, source, recorder) == {"entries": 2, "prompts": 2}
+
+    target, target_recorder = CacheManager(variant_pool_size=2), PromptRecorder()
+    counts = read_snapshot(io.BytesIO(buffer.getvalue()), target, target_recorder)
+    assert counts == {"entries": 2, "expired": 0, "prompts": 2}
+    assert target.get_response(msg, {"temperature": 0}, tenant="alice").content == "one"
+    assert target.get_response(msg, {"temperature": 0}, tenant="bob") is None
+    served = {target.get_response(msg, {"temperature": 1}, tenant="alice").content for _ in range(30)}
+    assert served == {"a", "b"}
+    assert [p.key for p in target_recorder.top(1)] == ["hot"]
+
+    # Remaining TTL is preserved: an entry older than the TTL is not imported
+    old = CacheEntry(GenerationResponse(content="old", model_used="m", usage=usage), time.time() - 3600)
+    assert target.import_entry("alice", "old-key", old) is False
+
+def test_cache_snapshot_save_and_warmup_coordination(tmp_path):
+    from app.core.cache.disk import DiskCache
+    from app.core.cache.snapshot import load_snapshot, save_snapshot
+    from app.core.cache.warmup import PromptRecorder, acquire_warmup_lock
+
+    usage = GenerationUsage(input_tokens=1, output_tokens=1, total_tokens=2)
+    msg = [Message(role=MessageRole.USER, content="Warm me up.")]
+    path = str(tmp_path / "l2.db")
+    worker_a = CacheManager(l2=DiskCache(path, ttl=60))
+    worker_a.store_response(msg, {}, GenerationResponse(content="warm", model_used="m", usage=usage), tenant="alice")
+    worker_a.flush()
+
+    # Saved through a per-call temp file, then renamed into place
+    snapshot = tmp_path / "snapshot.gz"
+    save_snapshot(str(snapshot), worker_a, PromptRecorder())
+    assert [p.name for p in tmp_path.iterdir() if p.name.startswith("snapshot")] == ["snapshot.gz"]
+    assert load_snapshot(str(snapshot), CacheManager(), PromptRecorder())["entries"] == 1
+
+    # A prompt another worker stored in L2 is not warmed up again
+    worker_b = CacheManager(l2=DiskCache(path, ttl=60))
+    key = worker_b.cache_key(msg, {})
+    assert worker_b.contains(key, tenant="alice")
+    assert not worker_b.contains(key, tenant="bob")
+
+    # One worker at a time warms up
+    lock_path = str(tmp_path / "warmup.lock")
+    leader = acquire_warmup_lock(lock_path)
+    assert leader is not None
+    assert acquire_warmup_lock(lock_path) is None
+    leader.close()
+    assert acquire_warmup_lock(lock_path) is not None
+
+def test_classification_stored_with_cached_responses():
+    import io
+    from unittest.mock import patch
+    from app.core.cache.classification import ClassificationCache
+    from app.core.cache.snapshot import read_snapshot, write_snapshot
+    from app.core.cache.warmup import PromptRecorder
+    from app.schemas.classifier import ClassificationResult
+
+    classification = ClassificationResult(complexity="complex", tokens=42, detected_features=["code"])
+    msg = [Message(role=MessageRole.USER, content="def f(): return 1")]
+    usage = GenerationUsage(input_tokens=1, output_tokens=1, total_tokens=2)
+
+    # Classified once per message content
+    classifications = ClassificationCache(maxsize=10, ttl=60)
+    with patch("app.core.cache.classification.request_classifier.analyze", return_value=classification) as analyze:
+        assert classifications.classify(msg) is classification
+        assert classifications.classify([Message(role=MessageRole.USER, content="def f(): return 1")]) is classification
+        assert analyze.call_count == 1
+    assert classifications.metrics["hits"] == 1
+
+    source = CacheManager(classifications=classifications)
+    source.store_response(msg, {}, GenerationResponse(content="ok", model_used="m", usage=usage),
+                          tenant="alice", classification=classification)
+
+    # A snapshot carries the classification and seeds the importer's classification cache
+    buffer = io.BytesIO()
+    write_snapshot(buffer, source, PromptRecorder())
+    target_classifications = ClassificationCache(maxsize=10, ttl=60)
+    target = CacheManager(classifications=target_classifications)
+    read_snapshot(io.BytesIO(buffer.getvalue()), target, PromptRecorder())
+    restored = target_classifications.get(ClassificationCache.content_hash(msg))
+    assert restored == classification
+    with patch("app.core.cache.classification.request_classifier.analyze") as analyze:
+        target_classifications.classify(msg)
+        analyze.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_classification_survives_l2_and_canonical_hits(tmp_path):
+    from unittest.mock import patch
+    from app.core.cache.classification import ClassificationCache
+    from app.core.cache.disk import DiskCache
+    from app.schemas.classifier import ClassificationResult
+
+    classification = ClassificationResult(complexity="moderate", tokens=7, detected_features=["reasoning"])
+    msg = [Message(role=MessageRole.USER, content="Explain recursion.")]
+    usage = GenerationUsage(input_tokens=1, output_tokens=1, total_tokens=2)
+    path = str(tmp_path / "l2.db")
+    worker_a = CacheManager(l2=DiskCache(path, ttl=60), classifications=ClassificationCache(maxsize=10, ttl=60))
+    worker_a.store_response(msg, {}, GenerationResponse(content="ok", model_used="m", usage=usage),
+                            tenant="alice", classification=classification)
+    worker_a.flush()
+
+    # Another worker (or a restart) classifies before its cache lookup, as the
+    # gateway does: a cold classification cache finds the classification in L2
+    l2 = DiskCache(path, ttl=60)
+    classifications = ClassificationCache(maxsize=10, ttl=60, l2=l2)
+    worker_b = CacheManager(l2=l2, classifications=classifications)
+    with patch("app.core.cache.classification.request_classifier.analyze") as analyze:
+        assert await classifications.classify_async(msg) == classification
+        assert (await worker_b.lookup_async(msg, {}, tenant="alice")).response.content == "ok"
+
+        # Keyed like the response cache: a canonical variant of the prompt shares it
+        variant = [Message(role=MessageRole.USER, content="Explain recursion.  \r\n")]
+        assert ClassificationCache(maxsize=10, ttl=60, l2=l2).classify(variant) == classification
+        analyze.assert_not_called()
+    assert classifications.metrics["l2_hits"] == 1
+
+    # Prompts L2 has no entry for are classified
+    with patch("app.core.cache.classification.request_classifier.analyze", return_value=classification) as analyze:
+        await classifications.classify_async([Message(role=MessageRole.USER, content="Something new")])
+        analyze.assert_called_once()
@@ -0,0 +1,38 @@
+import pytest
+from unittest.mock import patch
+
+from app.core import security
+from app.core.gateway_keys import GatewayKeyIndex
+from app.crud.gateway_key import create_gateway_key, remove_gateway_key
+from app.db.session import SessionLocal, AsyncSessionLocal
+from app.schemas.gateway_key import GatewayKeyCreate
+
+@pytest.mark.asyncio
+async def test_gateway_key_index_drops_keys_deleted_on_other_workers():
+    raw_key = security.generate_gateway_key()
+    with SessionLocal() as db:
+        db_obj = create_gateway_key(
+            db, obj_in=GatewayKeyCreate(name="Index Key"), user_id="index-user",
+            key_hash=security.hash_key(raw_key), prefix=raw_key[:10]
+        )
+        key_id = db_obj.id
+
+    index = GatewayKeyIndex(reload_interval_seconds=60)
+    async with AsyncSessionLocal() as db:
+        assert (await index.authenticate(db, raw_key)).id == key_id
+
+        # Deleted by another worker: this index never sees remove()
+        with SessionLocal() as sync_db:
+            remove_gateway_key(sync_db, key_id=key_id)
+        assert (await index.authenticate(db, raw_key)).id == key_id
+
+        with patch("app.core.gateway_keys.time.monotonic", return_value=index._loaded_at + 60):
+            assert await index.authenticate(db, raw_key) is None
+
+@pytest.mark.asyncio
+async def test_gateway_key_index_remembers_unknown_keys():
+    index = GatewayKeyIndex(reload_interval_seconds=60)
+    async with AsyncSessionLocal() as db:
+        assert await index.authenticate(db, "gw_unknown-key") is None
+        with patch.object(db, "execute", side_effect=AssertionError("DB hit")):
+            assert await index.authenticate(db, "gw_unknown-key") is None
@@ -0,0 +1,26 @@
+import time
+from app.core.limiter import KeyRateLimiter
+
+def test_key_rate_limiter_token_bucket():
+    limiter = KeyRateLimiter(period=1.0)
+
+    # Bucket starts full: `limit` requests pass, the next one is rejected
+    assert limiter.hit("key1", 3) is None
+    assert limiter.hit("key1", 3) is None
+    assert limiter.hit("key1", 3) is None
+    retry_after = limiter.hit("key1", 3)
+    assert retry_after is not None and 0 < retry_after <= 1 / 3
+
+    # Keys are limited independently
+    assert limiter.hit("key2", 3) is None
+
+    # Tokens refill over time
+    time.sleep(retry_after + 0.01)
+    assert limiter.hit("key1", 3) is None
+
+def test_key_rate_limiter_picks_up_new_limit():
+    limiter = KeyRateLimiter(period=60.0)
+    assert limiter.hit("key1", 1) is None
+    assert limiter.hit("key1", 1) is not None
+    # Raising the key's rate_limit resets its bucket
+    assert limiter.hit("key1", 5) is None
@@ -0,0 +1,110 @@
+import pytest
+from datetime import timedelta
+from unittest.mock import patch
+from jose import jwt
+
+from app.core import security
+from app.core.revocation import RevocationStore
+from app.db.session import SessionLocal, AsyncSessionLocal
+from app.models.revoked_token import RevokedToken
+
+def _claims(token: str) -> dict:
+    return jwt.get_unverified_claims(token)
+
+def test_access_token_has_unique_jti():
+    token1 = security.create_access_token("same@example.com")
+    token2 = security.create_access_token("same@example.com")
+    assert _claims(token1)["jti"] != _claims(token2)["jti"]
+
+@pytest.mark.asyncio
+async def test_revocation_checks_memory_not_db():
+    store = RevocationStore(session_factory=AsyncSessionLocal)
+    token = security.create_access_token("revoke-me@example.com")
+    other = security.create_access_token("revoke-me@example.com")
+
+    with SessionLocal() as db:
+        store.revoke(db, token)
+        assert db.query(RevokedToken).filter(RevokedToken.id == _claims(token)["jti"]).first() is not None
+
+    await store.sync()
+    # Once loaded, checks never open a session
+    with patch.object(store, "_session_factory", side_effect=AssertionError("DB hit")):
+        assert await store.is_revoked(token, _claims(token))
+        assert not await store.is_revoked(other, _claims(other))
+
+@pytest.mark.asyncio
+async def test_revocation_purges_expired_tokens():
+    store = RevocationStore(session_factory=AsyncSessionLocal)
+    expired = security.create_access_token("expired@example.com", expires_delta=timedelta(seconds=-10))
+    live = security.create_access_token("live@example.com")
+
+    with SessionLocal() as db:
+        store.revoke(db, expired)
+        store.revoke(db, live)
+
+    await store.sync()
+
+    with SessionLocal() as db:
+        assert db.query(RevokedToken).filter(RevokedToken.token == expired).first() is None
+        assert db.query(RevokedToken).filter(RevokedToken.token == live).first() is not None
+    assert not await store.is_revoked(expired, _claims(expired))
+    assert await store.is_revoked(live, _claims(live))
+
+@pytest.mark.asyncio
+async def test_revocation_matches_legacy_tokens_without_jti():
+    store = RevocationStore(session_factory=AsyncSessionLocal)
+    legacy = jwt.encode(
+        {"sub": "legacy@example.com", "exp": 4102444800},
+        "not-checked", algorithm="HS256"
+    )
+    with SessionLocal() as db:
+        store.revoke(db, legacy)
+
+    fresh = RevocationStore(session_factory=AsyncSessionLocal)
+    assert await fresh.is_revoked(legacy, _claims(legacy))
+
+@pytest.mark.asyncio
+async def test_revocation_picks_up_other_workers_logouts():
+    store = RevocationStore(session_factory=AsyncSessionLocal)
+    other_worker = RevocationStore(session_factory=AsyncSessionLocal)
+    token = security.create_access_token("other-worker@example.com")
+    await store.sync()
+    assert not await store.is_revoked(token, _claims(token))
+
+    with SessionLocal() as db:
+        other_worker.revoke(db, token)
+
+    await store.sync_recent()
+    assert await store.is_revoked(token, _claims(token))
+
+@pytest.mark.asyncio
+async def test_revocation_sync_tolerates_concurrent_logouts():
+    import asyncio
+    import threading
+    from unittest.mock import MagicMock
+
+    store = RevocationStore(session_factory=AsyncSessionLocal)
+    await store.sync()
+    # A large set keeps sync's merge busy while logouts land from threadpool threads
+    store._revoked.update({f"jti-{i}": 4102444800.0 for i in range(200_000)})
+    db = MagicMock()  # the revocation is already persisted
+    stop = threading.Event()
+    revoked = []
+
+    def logouts():
+        while not stop.is_set():
+            token = security.create_access_token("threaded@example.com")
+            store.revoke(db, token)
+            revoked.append(token)
+
+    worker = threading.Thread(target=logouts)
+    worker.start()
+    try:
+        for _ in range(5):
+            await store.sync()
+            await asyncio.sleep(0)
+    finally:
+        stop.set()
+        worker.join()
+    assert revoked
+    assert all([await store.is_revoked(token, _claims(token)) for token in revoked])
@@ -49,3 +49,74 @@ async def test_log_request():
     
     mock_db.add.assert_called_once()
     mock_db.commit.assert_called_once()
+
+class FakeSession:
+    """Collects the batches a UsageWriter flushes."""
+    batches = []
+
+    def __init__(self):
+        self.rows = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    def add_all(self, rows):
+        self.rows.extend(rows)
+
+    async def commit(self):
+        FakeSession.batches.append(list(self.rows))
+
+@pytest.mark.asyncio
+async def test_usage_writer_batches_and_flushes_on_stop():
+    from app.core.usage.writer import UsageWriter
+
+    FakeSession.batches = []
+    writer = UsageWriter(session_factory=FakeSession, batch_size=3, flush_interval_ms=10000, max_queue_size=100)
+    usage = GenerationUsage(input_tokens=1, output_tokens=1, total_tokens=2)
+
+    for i in range(5):
+        entry = usage_logger.build_entry(
+            user_id=f"user{i}", gateway_key_id="key1", endpoint="/test", provider="openai",
+            model="gpt-4", complexity="simple", usage=usage, latency_ms=1
+        )
+        await writer.enqueue(entry)
+
+    # Stop flushes the partial batch instead of waiting for the interval
+    await writer.stop()
+
+    assert [len(b) for b in FakeSession.batches] == [3, 2]
+    assert writer.metrics["rows_written"] == 5
+    assert writer.metrics["batches_flushed"] == 2
+    assert writer.metrics["queue_depth"] == 0
+
+@pytest.mark.asyncio
+async def test_usage_writer_backpressure():
+    import asyncio
+    from app.core.usage.writer import UsageWriter
+
+    gate = asyncio.Event()
+
+    class SlowSession(FakeSession):
+        async def commit(self):
+            await gate.wait()
+            await super().commit()
+
+    FakeSession.batches = []
+    writer = UsageWriter(session_factory=SlowSession, batch_size=1, flush_interval_ms=10, max_queue_size=1)
+
+    # First row is taken by the writer and stuck in a slow commit, second fills the queue
+    await writer.enqueue(MagicMock())
+    await asyncio.sleep(0.01)
+    await writer.enqueue(MagicMock())
+
+    blocked = asyncio.create_task(writer.enqueue(MagicMock()))
+    await asyncio.sleep(0.01)
+    assert not blocked.done()
+
+    gate.set()
+    await asyncio.wait_for(blocked, timeout=1)
+    await writer.stop()
+    assert [len(b) for b in FakeSession.batches] == [1, 1, 1]
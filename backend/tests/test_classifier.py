@@ -47,3 +47,61 @@ def test_classifier_chat_format():
     result = request_classifier.analyze(messages)
     assert "sql" in result.detected_features
     assert result.complexity != "simple"
+
+def test_token_counter_memoizes_messages():
+    from unittest.mock import patch
+    from app.core.classifier.tokenizer import TokenCounter
+
+    counter = TokenCounter(message_cache_size=100)
+    conversation = [
+        {"role": "user", "content": "Hello"},
+        {"role": "assistant", "content": "Hi there, how can I help?"},
+    ]
+    first = counter.count_messages(conversation)
+    encoding = counter._encoding_for_model("gpt-4o")
+    assert counter._encoding_for_model("gpt-4o-mini") is encoding  # same o200k family, loaded once
+
+    # The next turn only encodes the new message's fields (role and content)
+    conversation.append({"role": "user", "content": "Tell me a joke."})
+    with patch.object(encoding, "encode", wraps=encoding.encode) as encode:
+        second = counter.count_messages(conversation)
+    assert encode.call_count == 2
+    assert second == TokenCounter(message_cache_size=100).count_messages(conversation)
+    assert second > first
+    assert counter.metrics["message_hits"] == 2
+
+def test_token_counter_parallel_chunks_match_single_count():
+    from app.core.classifier.tokenizer import TokenCounter, split_text
+    text = ("The quick brown fox jumps over the lazy dog.\n" "def f(x):\n    return x * 2  # twice\n" "Любой текст 世界 ") * 400
+    assert "".join(split_text(text, 1000)) == text
+    assert len(split_text(text, 1000)) > 10
+
+    single = TokenCounter(message_cache_size=10)
+    parallel = TokenCounter(message_cache_size=10, chunk_chars=1000, threads=4)
+    messages = [{"role": "user", "content": text}]
+    assert parallel.count_tokens(text) == single.count_tokens(text)
+    assert parallel.count_messages(messages) == single.count_messages(messages)
+    assert parallel.metrics["parallel_encodes"] == 2
+    parallel.shutdown()
+
+@pytest.mark.asyncio
+async def test_tokenization_executor_offloads_large_prompts():
+    import threading
+    from app.core.classifier.executor import TokenizationExecutor
+
+    executor = TokenizationExecutor(offload_chars=1000, max_workers=2)
+    thread_name = lambda: threading.current_thread().name
+    assert await executor.run(999, thread_name) == threading.current_thread().name
+    assert (await executor.run(1000, thread_name)).startswith("tokenize")
+    assert executor.metrics["offloaded"] == 1 and executor.metrics["inline"] == 1
+    executor.shutdown()
+
+def test_classifier_feature_detection():
+    detect = request_classifier.detect_features
+    # A keyword starting inside another one is still found
+    assert detect("hoWHERE clause") == ["sql", "reasoning"]
+    assert detect([{"role": "user", "content": "plain text"}, {"role": "user", "content": 'a {"k": 1} b'}]) == ["json"]
+    # Brackets only count when closed on the same line
+    assert detect("{ open\n} closed") == []
+    assert detect("{[" * 50000) == []
+    assert detect("import x; SELECT 1; [1]; refactor; why") == ["code", "sql", "json", "refactor", "reasoning"]
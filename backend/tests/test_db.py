@@ -66,3 +66,38 @@ def test_relationships(db_session):
     assert user.gateway_keys[0].id == gw_key.id
     assert len(user.provider_keys) == 1
     assert user.provider_keys[0].provider == "openai"
+
+@pytest.mark.asyncio
+async def test_async_crud(tmp_path):
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+    from app.crud.user import get_user_by_email_async
+    from app.crud.gateway_key import create_gateway_key_async, get_keys_by_user_async
+    from app.crud.provider_key import get_provider_keys_by_user_async, get_decrypted_provider_key_async
+
+    db_url = f"sqlite:///{tmp_path / 'async.db'}"
+    sync_engine = create_engine(db_url)
+    Base.metadata.create_all(bind=sync_engine)
+    with sessionmaker(bind=sync_engine)() as db:
+        user = create_user(db, UserCreate(email="async@example.com", password="password123"))
+        user_id = user.id
+        create_provider_key(db, user_id=user_id, provider="openai", raw_key="sk-async")
+
+    async_engine = create_async_engine(db_url.replace("sqlite:///", "sqlite+aiosqlite:///"))
+    AsyncTestingSession = async_sessionmaker(bind=async_engine, expire_on_commit=False)
+    try:
+        async with AsyncTestingSession() as db:
+            user = await get_user_by_email_async(db, email="async@example.com")
+            assert user.id == user_id
+
+            key = await create_gateway_key_async(
+                db, obj_in=GatewayKeyCreate(name="Async Key"), user_id=user_id, key_hash="async-hash", prefix="gw_async"
+            )
+            keys = await get_keys_by_user_async(db, user_id=user_id)
+            assert [k.id for k in keys] == [key.id]
+
+            provider_keys = await get_provider_keys_by_user_async(db, user_id=user_id)
+            assert [pk.provider for pk in provider_keys] == ["openai"]
+            assert await get_decrypted_provider_key_async(db, user_id=user_id, provider="openai") == "sk-async"
+            assert await get_decrypted_provider_key_async(db, user_id=user_id, provider="google") is None
+    finally:
+        await async_engine.dispose()
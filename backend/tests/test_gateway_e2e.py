@@ -1,15 +1,18 @@
 import pytest
+import time
 from httpx import AsyncClient
 from unittest.mock import patch, AsyncMock, MagicMock
 from app.main import app
 from app.core.config import settings
 from app.schemas.llm import GenerationResponse, GenerationUsage
+from app.core.cache.classification import classification_cache
 from app.core.classifier.service import request_classifier
 from app.schemas.classifier import ClassificationResult
 
 @pytest.fixture(autouse=True)
 def mock_classifier():
-    with patch("app.api.v1.endpoints.gateway.request_classifier.analyze") as m:
+    classification_cache.clear()
+    with patch.object(request_classifier, "analyze") as m:
         m.return_value = ClassificationResult(
             complexity="simple",
             tokens=10,
@@ -45,7 +48,7 @@ async def test_gateway_e2e_flow():
             finish_reason="stop"
         )
         
-        with patch("app.api.v1.endpoints.gateway.crud.provider_key.get_provider_keys_by_user") as mock_keys, \
+        with patch("app.api.v1.endpoints.gateway.crud.provider_key.get_provider_keys_by_user_async", new_callable=AsyncMock) as mock_keys, \
              patch("app.api.v1.endpoints.gateway.provider_manager.execute_request", new_callable=AsyncMock) as mock_exec:
             
             mock_keys.return_value = [MagicMock(provider="openai")]
@@ -111,3 +114,367 @@ async def test_gateway_error_handling_no_keys():
         # Should return 400 Bad Request due to no models available (no keys)
         assert res.status_code == 400
         assert "No models available" in res.json()["detail"]
+
+@pytest.mark.asyncio
+async def test_gateway_streaming():
+    from app.schemas.llm import GenerationChunk
+
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        email = "gateway-stream@example.com"
+        password = "testpassword"
+        await ac.post(
+            f"{settings.API_V1_STR}/auth/signup",
+            json={"email": email, "password": password}
+        )
+        login_res = await ac.post(
+            f"{settings.API_V1_STR}/auth/login",
+            json={"email": email, "password": password}
+        )
+        token = login_res.json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        async def fake_stream(*args, **kwargs):
+            yield GenerationChunk(delta="Once upon ", model_used="gpt-4o")
+            yield GenerationChunk(delta="a time.", model_used="gpt-4o", finish_reason="stop")
+            yield GenerationChunk(
+                model_used="gpt-4o",
+                usage=GenerationUsage(input_tokens=12, output_tokens=5, total_tokens=17)
+            )
+
+        with patch("app.api.v1.endpoints.gateway.crud.provider_key.get_provider_keys_by_user_async", new_callable=AsyncMock) as mock_keys, \
+             patch("app.api.v1.endpoints.gateway.provider_manager.stream_request", side_effect=fake_stream), \
+             patch("app.api.v1.endpoints.gateway.usage_logger.record_request", new_callable=AsyncMock) as mock_log:
+
+            mock_keys.return_value = [MagicMock(provider="openai")]
+
+            payload = {
+                "messages": [{"role": "user", "content": "Tell me a streaming story."}],
+                "stream": True
+            }
+            res = await ac.post(
+                f"{settings.API_V1_STR}/chat/completions",
+                json=payload,
+                headers=headers
+            )
+
+            assert res.status_code == 200
+            assert res.headers["content-type"].startswith("text/event-stream")
+            events = [line[len("data: "):] for line in res.text.split("\n\n") if line.startswith("data: ")]
+            assert events[-1] == "[DONE]"
+            assert "Once upon " in events[0]
+
+            # Usage is logged once, with the counts from the final provider event
+            mock_log.assert_awaited_once()
+            assert mock_log.call_args.kwargs["usage"].total_tokens == 17
+
+@pytest.mark.asyncio
+async def test_gateway_api_key_auth_and_rate_limit():
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        email = "gateway-apikey@example.com"
+        password = "testpassword"
+        await ac.post(
+            f"{settings.API_V1_STR}/auth/signup",
+            json={"email": email, "password": password}
+        )
+        login_res = await ac.post(
+            f"{settings.API_V1_STR}/auth/login",
+            json={"email": email, "password": password}
+        )
+        token = login_res.json()["access_token"]
+        create_res = await ac.post(
+            f"{settings.API_V1_STR}/keys/",
+            json={"name": "SDK Key", "rate_limit": 2},
+            headers={"Authorization": f"Bearer {token}"}
+        )
+        key_data = create_res.json()
+        headers = {"Authorization": f"Bearer {key_data['key']}"}
+
+        mock_response = GenerationResponse(
+            content="Answered with an API key.",
+            model_used="gpt-4o",
+            usage=GenerationUsage(input_tokens=5, output_tokens=5, total_tokens=10),
+            finish_reason="stop"
+        )
+
+        with patch("app.api.v1.endpoints.gateway.crud.provider_key.get_provider_keys_by_user_async", new_callable=AsyncMock) as mock_keys, \
+             patch("app.api.v1.endpoints.gateway.provider_manager.execute_request", new_callable=AsyncMock) as mock_exec, \
+             patch("app.api.v1.endpoints.gateway.usage_logger.record_request", new_callable=AsyncMock) as mock_log:
+            mock_keys.return_value = [MagicMock(provider="openai")]
+            mock_exec.return_value = mock_response
+
+            statuses = []
+            for i in range(3):
+                res = await ac.post(
+                    f"{settings.API_V1_STR}/chat/completions",
+                    json={"messages": [{"role": "user", "content": f"api key request {i}"}]},
+                    headers=headers
+                )
+                statuses.append(res.status_code)
+
+            # rate_limit=2 per minute: the third request is rejected
+            assert statuses == [200, 200, 429]
+            assert "Retry-After" in res.headers
+            # Usage is attributed to the key that made the call
+            assert mock_log.await_args.kwargs["gateway_key_id"] == key_data["id"]
+
+        bad = await ac.post(
+            f"{settings.API_V1_STR}/chat/completions",
+            json={"messages": [{"role": "user", "content": "hi"}]},
+            headers={"Authorization": "Bearer gw_not-a-real-key"}
+        )
+        assert bad.status_code == 401
+
+@pytest.mark.asyncio
+async def test_gateway_failover_logs_each_attempt():
+    import httpx
+
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        email = "gateway-failover@example.com"
+        password = "testpassword"
+        await ac.post(
+            f"{settings.API_V1_STR}/auth/signup",
+            json={"email": email, "password": password}
+        )
+        login_res = await ac.post(
+            f"{settings.API_V1_STR}/auth/login",
+            json={"email": email, "password": password}
+        )
+        headers = {"Authorization": f"Bearer {login_res.json()['access_token']}"}
+
+        upstream = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+        server_error = httpx.HTTPStatusError(
+            "Service Unavailable", request=upstream, response=httpx.Response(503, request=upstream)
+        )
+        mock_response = GenerationResponse(
+            content="Served by the fallback model.",
+            model_used="fallback",
+            usage=GenerationUsage(input_tokens=10, output_tokens=5, total_tokens=15),
+            finish_reason="stop"
+        )
+
+        with patch("app.api.v1.endpoints.gateway.crud.provider_key.get_provider_keys_by_user_async", new_callable=AsyncMock) as mock_keys, \
+             patch("app.api.v1.endpoints.gateway.provider_manager.execute_request", new_callable=AsyncMock) as mock_exec, \
+             patch("app.api.v1.endpoints.gateway.usage_logger.record_request", new_callable=AsyncMock) as mock_log:
+            mock_keys.return_value = [MagicMock(provider="openai"), MagicMock(provider="anthropic")]
+            mock_exec.side_effect = [server_error, mock_response]
+
+            res = await ac.post(
+                f"{settings.API_V1_STR}/chat/completions",
+                json={"messages": [{"role": "user", "content": "Fail over please."}]},
+                headers=headers
+            )
+
+            assert res.status_code == 200
+            assert res.json()["content"] == "Served by the fallback model."
+            logged = [call.kwargs for call in mock_log.await_args_list]
+            assert [entry["status_code"] for entry in logged] == [503, 200]
+            assert logged[0]["model"] != logged[1]["model"]
+            assert res.json()["model_used"] == logged[1]["model"]
+
+@pytest.mark.asyncio
+async def test_gateway_coalesces_identical_concurrent_requests():
+    import asyncio
+
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        email = "gateway-coalesce@example.com"
+        password = "testpassword"
+        await ac.post(
+            f"{settings.API_V1_STR}/auth/signup",
+            json={"email": email, "password": password}
+        )
+        login_res = await ac.post(
+            f"{settings.API_V1_STR}/auth/login",
+            json={"email": email, "password": password}
+        )
+        headers = {"Authorization": f"Bearer {login_res.json()['access_token']}"}
+
+        async def slow_execute(*args, **kwargs):
+            await asyncio.sleep(0.2)
+            return GenerationResponse(
+                content="One call for everyone.",
+                model_used="gpt-4o",
+                usage=GenerationUsage(input_tokens=3, output_tokens=4, total_tokens=7),
+                finish_reason="stop"
+            )
+
+        with patch("app.api.v1.endpoints.gateway.crud.provider_key.get_provider_keys_by_user_async", new_callable=AsyncMock) as mock_keys, \
+             patch("app.api.v1.endpoints.gateway.provider_manager.execute_request", side_effect=slow_execute) as mock_exec, \
+             patch("app.api.v1.endpoints.gateway.usage_logger.record_request", new_callable=AsyncMock) as mock_log:
+            mock_keys.return_value = [MagicMock(provider="openai")]
+            payload = {"messages": [{"role": "user", "content": f"Coalesce me {time.time()}"}]}
+
+            responses = await asyncio.gather(*(
+                ac.post(f"{settings.API_V1_STR}/chat/completions", json=payload, headers=headers)
+                for _ in range(4)
+            ))
+
+            assert [r.status_code for r in responses] == [200] * 4
+            assert all(r.json()["content"] == "One call for everyone." for r in responses)
+            assert mock_exec.call_count == 1
+            assert sorted(call.kwargs["cache_hit"] for call in mock_log.await_args_list) == [False, True, True, True]
+
+@pytest.mark.asyncio
+async def test_gateway_serves_stale_and_refreshes_once():
+    import asyncio
+    from app.api.v1.endpoints import gateway
+    from app.core.cache.service import cache_manager
+
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        email = "gateway-stale@example.com"
+        password = "testpassword"
+        await ac.post(
+            f"{settings.API_V1_STR}/auth/signup",
+            json={"email": email, "password": password}
+        )
+        login_res = await ac.post(
+            f"{settings.API_V1_STR}/auth/login",
+            json={"email": email, "password": password}
+        )
+        headers = {"Authorization": f"Bearer {login_res.json()['access_token']}"}
+
+        def response(content):
+            return GenerationResponse(
+                content=content,
+                model_used="gpt-4o",
+                usage=GenerationUsage(input_tokens=3, output_tokens=4, total_tokens=7),
+                finish_reason="stop"
+            )
+
+        with patch("app.api.v1.endpoints.gateway.crud.provider_key.get_provider_keys_by_user_async", new_callable=AsyncMock) as mock_keys, \
+             patch("app.api.v1.endpoints.gateway.provider_manager.execute_request", new_callable=AsyncMock) as mock_exec, \
+             patch("app.api.v1.endpoints.gateway.usage_logger.record_request", new_callable=AsyncMock), \
+             patch.object(cache_manager, "soft_ttl", 0.05):
+            mock_keys.return_value = [MagicMock(provider="openai")]
+            release_refresh = asyncio.Event()
+
+            async def execute(*args, **kwargs):
+                if mock_exec.call_count == 1:
+                    return response("first")
+                await release_refresh.wait()
+                return response("refreshed")
+            mock_exec.side_effect = execute
+            payload = {"messages": [{"role": "user", "content": f"Stale me {time.time()}"}]}
+            url = f"{settings.API_V1_STR}/chat/completions"
+
+            res = await ac.post(url, json=payload, headers=headers)
+            assert res.headers["X-Cache"] == "MISS"
+            res = await ac.post(url, json=payload, headers=headers)
+            assert res.headers["X-Cache"] == "HIT"
+
+            await asyncio.sleep(0.1)
+            stale_before = cache_manager.metrics["stale_hits"]
+            responses = [await ac.post(url, json=payload, headers=headers) for _ in range(3)]
+            assert [r.headers["X-Cache"] for r in responses] == ["STALE"] * 3
+            assert all(r.json()["content"] == "first" for r in responses)
+            assert cache_manager.metrics["stale_hits"] - stale_before == 3
+
+            # Exactly one background refresh, which replaces the entry
+            release_refresh.set()
+            await asyncio.gather(*gateway._background_tasks)
+            assert mock_exec.call_count == 2
+            res = await ac.post(url, json=payload, headers=headers)
+            assert res.headers["X-Cache"] == "HIT"
+            assert res.json()["content"] == "refreshed"
+
+@pytest.mark.asyncio
+async def test_gateway_cache_snapshot_and_warmup_endpoints():
+    from app.core.cache.service import cache_manager
+
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        email = "gateway-snapshot@example.com"
+        password = "testpassword"
+        await ac.post(
+            f"{settings.API_V1_STR}/auth/signup",
+            json={"email": email, "password": password}
+        )
+        login_res = await ac.post(
+            f"{settings.API_V1_STR}/auth/login",
+            json={"email": email, "password": password}
+        )
+        headers = {"Authorization": f"Bearer {login_res.json()['access_token']}"}
+
+        # Admin only
+        assert (await ac.get(f"{settings.API_V1_STR}/cache/snapshot", headers=headers)).status_code == 403
+
+        with patch.object(settings, "ADMIN_EMAILS", [email]), \
+             patch("app.api.v1.endpoints.gateway.crud.provider_key.get_provider_keys_by_user_async", new_callable=AsyncMock) as mock_keys, \
+             patch("app.api.v1.endpoints.gateway.provider_manager.execute_request", new_callable=AsyncMock) as mock_exec, \
+             patch("app.api.v1.endpoints.gateway.usage_logger.record_request", new_callable=AsyncMock):
+            mock_keys.return_value = [MagicMock(provider="openai")]
+            mock_exec.return_value = GenerationResponse(
+                content="Warm me up.",
+                model_used="gpt-4o",
+                usage=GenerationUsage(input_tokens=3, output_tokens=4, total_tokens=7),
+                finish_reason="stop"
+            )
+            payload = {"messages": [{"role": "user", "content": f"Snapshot me {time.time()}"}]}
+            res = await ac.post(f"{settings.API_V1_STR}/chat/completions", json=payload, headers=headers)
+            assert res.status_code == 200
+
+            snapshot = await ac.get(f"{settings.API_V1_STR}/cache/snapshot", headers=headers)
+            assert snapshot.status_code == 200
+            assert int(snapshot.headers["X-Snapshot-Entries"]) >= 1
+
+            # Drop this user's partition, then restore it from the snapshot
+            tenant = next(name for name, _, entry in cache_manager.export_entries() if entry.response.content == "Warm me up.")
+            cache_manager._partitions.pop(tenant)
+            imported = await ac.post(f"{settings.API_V1_STR}/cache/snapshot", content=snapshot.content, headers=headers)
+            assert imported.status_code == 200 and imported.json()["entries"] >= 1
+            res = await ac.post(f"{settings.API_V1_STR}/chat/completions", json=payload, headers=headers)
+            assert res.headers["X-Cache"] == "HIT"
+            assert mock_exec.call_count == 1
+
+            # Warm-up skips prompts still cached in L2 and replays the others
+            cache_manager._partitions.pop(tenant)
+            cache_manager.flush()
+            if cache_manager._l2 is not None:
+                warmup = await ac.post(f"{settings.API_V1_STR}/cache/warmup", params={"top_n": 1000}, headers=headers)
+                assert warmup.json()["already_cached"] >= 1
+                assert mock_exec.call_count == 1
+                cache_manager._partitions.pop(tenant, None)
+                cache_manager._l2.clear()
+            warmup = await ac.post(f"{settings.API_V1_STR}/cache/warmup", params={"top_n": 1000}, headers=headers)
+            assert warmup.status_code == 200
+            assert warmup.json()["replayed"] >= 1
+            assert mock_exec.call_count >= 2
+            res = await ac.post(f"{settings.API_V1_STR}/chat/completions", json=payload, headers=headers)
+            assert res.headers["X-Cache"] == "HIT"
+
+            bad = await ac.post(f"{settings.API_V1_STR}/cache/snapshot", content=b"not a snapshot", headers=headers)
+            assert bad.status_code == 400
+
+@pytest.mark.asyncio
+async def test_gateway_cache_hit_does_not_classify(mock_classifier):
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        email = "gateway-classify-once@example.com"
+        password = "testpassword"
+        await ac.post(
+            f"{settings.API_V1_STR}/auth/signup",
+            json={"email": email, "password": password}
+        )
+        login_res = await ac.post(
+            f"{settings.API_V1_STR}/auth/login",
+            json={"email": email, "password": password}
+        )
+        headers = {"Authorization": f"Bearer {login_res.json()['access_token']}"}
+
+        with patch("app.api.v1.endpoints.gateway.crud.provider_key.get_provider_keys_by_user_async", new_callable=AsyncMock) as mock_keys, \
+             patch("app.api.v1.endpoints.gateway.provider_manager.execute_request", new_callable=AsyncMock) as mock_exec, \
+             patch("app.api.v1.endpoints.gateway.usage_logger.record_request", new_callable=AsyncMock) as mock_log:
+            mock_keys.return_value = [MagicMock(provider="openai")]
+            mock_exec.return_value = GenerationResponse(
+                content="Classified once.",
+                model_used="gpt-4o",
+                usage=GenerationUsage(input_tokens=3, output_tokens=3, total_tokens=6),
+                finish_reason="stop"
+            )
+            payload = {"messages": [{"role": "user", "content": f"Classify me once {time.time()}"}]}
+
+            first = await ac.post(f"{settings.API_V1_STR}/chat/completions", json=payload, headers=headers)
+            second = await ac.post(f"{settings.API_V1_STR}/chat/completions", json=payload, headers=headers)
+
+            assert first.headers["X-Cache"] == "MISS"
+            assert second.headers["X-Cache"] == "HIT"
+            assert mock_classifier.call_count == 1
+            # The hit is still logged with the request's complexity
+            assert mock_log.await_args_list[-1].kwargs["complexity"] == "simple"
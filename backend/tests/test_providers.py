@@ -16,7 +16,7 @@ def mock_db():
 
 @pytest.fixture
 def mock_get_key():
-    with patch("app.core.providers.manager.crud.provider_key.get_decrypted_provider_key", return_value=MOCK_API_KEY) as m:
+    with patch("app.core.providers.manager.user_context_cache.get_api_key", new_callable=AsyncMock, return_value=MOCK_API_KEY) as m:
         yield m
 
 @pytest.fixture
@@ -97,5 +97,75 @@ async def test_manager_orchestration(mock_db, mock_get_key, mock_httpx):
     
     assert result.content == "Manager Result"
     # Verify key lookup happened
-    mock_get_key.assert_called_with(mock_db, user_id=MOCK_USER_ID, provider="openai")
+    mock_get_key.assert_awaited_with(mock_db, MOCK_USER_ID, "openai")
 
+
+# TEST STREAMING ADAPTERS
+def _sse_client_factory(body: str):
+    """Build a client factory backed by a mock transport returning an SSE body."""
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, text=body, headers={"content-type": "text/event-stream"})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return lambda: client
+
+@pytest.mark.asyncio
+async def test_openai_stream_adapter():
+    body = (
+        'data: {"model": "gpt-4o", "choices": [{"delta": {"content": "Hel"}, "finish_reason": null}]}\n\n'
+        'data: {"model": "gpt-4o", "choices": [{"delta": {"content": "lo"}, "finish_reason": "stop"}]}\n\n'
+        'data: {"model": "gpt-4o", "choices": [], "usage": {"prompt_tokens": 3, "completion_tokens": 2, "total_tokens": 5}}\n\n'
+        'data: [DONE]\n\n'
+    )
+    provider = OpenAIProvider(client_factory=_sse_client_factory(body))
+    request = GenerationRequest(messages=[Message(role=MessageRole.USER, content="Hi")], model_id="gpt-4o")
+
+    chunks = [c async for c in provider.stream(request, "key")]
+
+    assert "".join(c.delta for c in chunks) == "Hello"
+    assert chunks[1].finish_reason == "stop"
+    assert chunks[-1].usage.total_tokens == 5
+
+@pytest.mark.asyncio
+async def test_anthropic_stream_adapter():
+    body = (
+        'event: message_start\ndata: {"type": "message_start", "message": {"model": "claude-3-5-sonnet", "usage": {"input_tokens": 7}}}\n\n'
+        'event: content_block_delta\ndata: {"type": "content_block_delta", "delta": {"type": "text_delta", "text": "Hi "}}\n\n'
+        'event: content_block_delta\ndata: {"type": "content_block_delta", "delta": {"type": "text_delta", "text": "human"}}\n\n'
+        'event: message_delta\ndata: {"type": "message_delta", "delta": {"stop_reason": "end_turn"}, "usage": {"output_tokens": 4}}\n\n'
+        'event: message_stop\ndata: {"type": "message_stop"}\n\n'
+    )
+    provider = AnthropicProvider(client_factory=_sse_client_factory(body))
+    request = GenerationRequest(messages=[Message(role=MessageRole.USER, content="Hi")], model_id="claude-3-5-sonnet")
+
+    chunks = [c async for c in provider.stream(request, "key")]
+
+    assert "".join(c.delta for c in chunks) == "Hi human"
+    assert chunks[-1].finish_reason == "end_turn"
+    assert chunks[-1].usage.input_tokens == 7
+    assert chunks[-1].usage.total_tokens == 11
+
+# TEST SHARED HTTP CLIENTS
+@pytest.mark.asyncio
+async def test_client_pool_reuses_clients():
+    from app.core.providers.http import ProviderClientPool
+
+    pool = ProviderClientPool(max_connections=10, connect_timeout=1.0)
+    client = pool.get("openai")
+
+    assert pool.get("openai") is client
+    assert pool.get("anthropic") is not client
+    assert client.timeout.connect == 1.0
+    assert pool.metrics["openai"]["max_connections"] == 10
+
+    await pool.aclose()
+    assert client.is_closed
+    # A closed client is transparently replaced
+    assert pool.get("openai") is not client
+    await pool.aclose()
+
+@pytest.mark.asyncio
+async def test_manager_providers_share_pooled_client():
+    client = provider_manager.get_client("openai")
+    assert provider_manager.get_provider("openai").client is client
+    assert "openai" in provider_manager.metrics
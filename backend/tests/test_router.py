@@ -50,3 +50,129 @@ def test_router_fallback_list(mock_registry):
     assert len(result.fallback_models) == 3
     # Next cheapest is Mini
     assert result.fallback_models[0] == "gpt-4o-mini"
+
+# FAILOVER
+import asyncio
+import httpx
+import time
+from unittest.mock import AsyncMock
+from app.core.router.failover import FailoverExecutor, FailoverError
+from app.schemas.llm import GenerationRequest, GenerationResponse, Message, MessageRole
+
+def _http_error(status_code: int) -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "https://provider.test")
+    return httpx.HTTPStatusError("error", request=request, response=httpx.Response(status_code, request=request))
+
+FAILOVER_REQUEST = GenerationRequest(messages=[Message(role=MessageRole.USER, content="hi")], model_id="gpt-4o")
+
+@pytest.mark.asyncio
+async def test_failover_moves_to_next_model_on_5xx():
+    executor = FailoverExecutor(max_attempts=3, deadline_seconds=5)
+
+    async def fake_execute(db, request, user_id):
+        if request.model_id == "gpt-4o":
+            raise _http_error(503)
+        return GenerationResponse(content="from fallback", model_used=request.model_id)
+
+    with patch("app.core.router.failover.provider_manager.execute_request", side_effect=fake_execute) as mock_exec:
+        result = await executor.execute(None, FAILOVER_REQUEST, MOCK_MODELS[:3], "user", time.time() + 5)
+
+    assert result.model.id == "gpt-4o-mini"
+    assert result.response.content == "from fallback"
+    assert mock_exec.call_count == 2
+    assert [(a.model_id, a.status_code) for a in result.attempts] == [("gpt-4o", 503), ("gpt-4o-mini", 200)]
+    assert len(result.failed_attempts) == 1
+
+@pytest.mark.asyncio
+async def test_failover_stops_on_non_retryable_error():
+    executor = FailoverExecutor(max_attempts=3, deadline_seconds=5)
+
+    with patch("app.core.router.failover.provider_manager.execute_request", new_callable=AsyncMock) as mock_exec:
+        mock_exec.side_effect = ValueError("Invalid API key for openai.")
+        with pytest.raises(FailoverError) as exc_info:
+            await executor.execute(None, FAILOVER_REQUEST, MOCK_MODELS[:3], "user", time.time() + 5)
+
+    assert exc_info.value.status_code == 400
+    assert mock_exec.call_count == 1
+
+@pytest.mark.asyncio
+async def test_failover_shares_deadline_across_attempts():
+    executor = FailoverExecutor(max_attempts=3, deadline_seconds=0.2)
+
+    async def slow_execute(db, request, user_id):
+        await asyncio.sleep(1)
+
+    start = time.time()
+    with patch("app.core.router.failover.provider_manager.execute_request", side_effect=slow_execute):
+        with pytest.raises(FailoverError) as exc_info:
+            await executor.execute(None, FAILOVER_REQUEST, MOCK_MODELS[:3], "user", start + 0.2)
+
+    # The first attempt eats the whole budget, no time is left for the fallbacks
+    assert time.time() - start < 0.5
+    assert exc_info.value.status_code == 504
+    assert len(exc_info.value.attempts) == 1
+
+# HEDGING
+from app.core.router.hedging import HedgedExecutor, HedgeBudget
+
+@pytest.mark.asyncio
+async def test_hedge_fires_and_wins_when_primary_is_slow():
+    hedge_db = MagicMock()
+    hedge_session = MagicMock()
+    hedge_session.__aenter__ = AsyncMock(return_value=hedge_db)
+    hedge_session.__aexit__ = AsyncMock(return_value=None)
+    executor = HedgedExecutor(
+        default_delay_ms=50, min_samples=1000, budget=HedgeBudget(limit_usd=10),
+        session_factory=lambda: hedge_session,
+    )
+    cancelled = []
+    sessions = {}
+
+    async def fake_execute(db, request, user_id):
+        sessions[request.model_id] = db
+        if request.model_id == "gpt-4o":
+            try:
+                await asyncio.sleep(2)
+            except asyncio.CancelledError:
+                cancelled.append(request.model_id)
+                raise
+        return GenerationResponse(content=request.model_id, model_used=request.model_id)
+
+    start = time.time()
+    with patch("app.core.router.hedging.provider_manager.execute_request", side_effect=fake_execute):
+        result = await executor.execute("request-db", FAILOVER_REQUEST, MOCK_MODELS[:3], "user", time.time() + 5, input_tokens=10)
+
+    assert result.model.id == "gpt-4o-mini"
+    # The hedge runs concurrently with the primary, on its own session
+    assert sessions == {"gpt-4o": "request-db", "gpt-4o-mini": hedge_db}
+    assert time.time() - start < 1
+    assert cancelled == ["gpt-4o"]
+    assert executor.metrics["hedges_fired"] == 1
+    assert executor.metrics["hedge_wins"] == 1
+
+@pytest.mark.asyncio
+async def test_hedge_not_fired_for_fast_primary_or_without_budget():
+    executor = HedgedExecutor(default_delay_ms=50, min_samples=1000, budget=HedgeBudget(limit_usd=0))
+    calls = []
+
+    async def fake_execute(db, request, user_id):
+        calls.append(request.model_id)
+        if request.model_id == "gpt-4o":
+            await asyncio.sleep(0.2)
+        return GenerationResponse(content=request.model_id, model_used=request.model_id)
+
+    with patch("app.core.router.hedging.provider_manager.execute_request", side_effect=fake_execute):
+        result = await executor.execute(None, FAILOVER_REQUEST, MOCK_MODELS[:3], "user", time.time() + 5, input_tokens=10)
+
+    # Slow primary, but a zero budget means no hedge is sent
+    assert result.model.id == "gpt-4o"
+    assert calls == ["gpt-4o"]
+    assert executor.metrics["hedges_fired"] == 0
+    assert executor.metrics["budget_denied"] == 1
+
+def test_hedge_budget_window():
+    budget = HedgeBudget(limit_usd=1.0, window_seconds=3600)
+    assert budget.try_spend("user", 0.6)
+    assert not budget.try_spend("user", 0.6)
+    assert budget.try_spend("other", 0.6)
+    assert budget.spent("user") == pytest.approx(0.6)